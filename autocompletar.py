@@ -0,0 +1,189 @@
+"""Sugestões de preenchimento para Fornecedor, Produto e Descrição.
+
+Para cada coluna guardamos a frequência de cada valor distinto e a lista dos
+valores em ordem alfabética (sem diferenciar maiúsculas), onde um prefixo é
+um intervalo encontrado com bisect; os valores do intervalo saem ordenados
+pela frequência. Prefixos de uma ou duas letras têm intervalos grandes demais
+para varrer a cada tecla: as listas deles são calculadas ao montar a coluna
+(numa passada só, em ordem de frequência), assim como as de prefixos maiores
+com intervalos grandes, na primeira consulta. Cada lista guarda uma folga
+além do que é exibido e é corrigida no lugar a cada inclusão e remoção; só é
+refeita quando as remoções consomem a folga.
+"""
+import heapq
+from bisect import bisect_left, insort
+
+COLUNAS_SUGESTAO = ("Fornecedor", "Produto", "Descrição")
+
+# Intervalos maiores que isso têm as sugestões guardadas em cache
+LIMITE_VARREDURA = 2000
+# Quantas sugestões cada lista em cache garante
+TAMANHO_CACHE = 20
+# Quantos valores cada lista guarda: a folga absorve remoções sem varrer o intervalo
+CAPACIDADE_CACHE = 2 * TAMANHO_CACHE
+# Prefixos até esse tamanho têm as listas calculadas ao montar a coluna
+TAMANHO_PREFIXO_MONTADO = 2
+
+# Maior caractere possível: (prefixo + FIM) fica depois de tudo que começa com o prefixo
+FIM = "\U0010ffff"
+
+
+class _SugestoesColuna:
+    def __init__(self, contagens=None):
+        self.frequencias = dict(contagens or {})
+        self.chaves = sorted((valor.casefold(), valor) for valor in self.frequencias)
+        # prefixo (já em casefold) -> até CAPACIDADE_CACHE valores, os mais frequentes primeiro.
+        # Cada lista é sempre o começo exato da ordem do prefixo; pode ter menos
+        # valores que o intervalo depois de remoções (então é refeita ao faltar)
+        self.cache = {}
+        for valor in sorted(self.frequencias, key=self._posicao):
+            dobrado = valor.casefold()
+            for tamanho in range(1, min(len(dobrado), TAMANHO_PREFIXO_MONTADO) + 1):
+                lista = self.cache.setdefault(dobrado[:tamanho], [])
+                if len(lista) < CAPACIDADE_CACHE:
+                    lista.append(valor)
+
+    def _posicao(self, valor):
+        return (-self.frequencias[valor], valor.casefold(), valor)
+
+    def _intervalo(self, dobrado):
+        """Quantos valores começam com o prefixo (duas buscas binárias)"""
+        return bisect_left(self.chaves, (dobrado + FIM,)) - bisect_left(self.chaves, (dobrado,))
+
+    def _prefixos_em_cache(self, dobrado):
+        for tamanho in range(1, len(dobrado) + 1):
+            prefixo = dobrado[:tamanho]
+            if prefixo in self.cache:
+                yield prefixo
+
+    def _corrigir(self, valor, subiu):
+        """Reposiciona `valor` nas listas em cache dos prefixos dele, depois de mudar a frequência.
+
+        Uma lista incompleta (há valores do intervalo fora dela) só pode ficar
+        com o valor se ele estiver garantidamente à frente de todos os de fora:
+        se já estava na lista e subiu, ou se ficou antes do último dela.
+        """
+        dobrado = valor.casefold()
+        existe = valor in self.frequencias
+        for prefixo in list(self._prefixos_em_cache(dobrado)):
+            lista = self.cache[prefixo]
+            estava = valor in lista
+            completa = len(lista) + (0 if estava or not existe else 1) >= self._intervalo(prefixo)
+            if estava:
+                lista.remove(valor)
+            if existe:
+                posicao = self._posicao(valor)
+                if completa or (estava and subiu) or (lista and posicao < self._posicao(lista[-1])):
+                    lista.append(valor)
+                    lista.sort(key=self._posicao)
+                    del lista[CAPACIDADE_CACHE:]
+            if len(lista) < TAMANHO_CACHE and len(lista) < self._intervalo(prefixo):
+                # A folga acabou: a lista é refeita na próxima consulta
+                del self.cache[prefixo]
+        if existe:
+            # Prefixos curtos de um valor novo ainda sem lista (ex.: primeira letra inédita)
+            for tamanho in range(1, min(len(dobrado), TAMANHO_PREFIXO_MONTADO) + 1):
+                prefixo = dobrado[:tamanho]
+                if prefixo not in self.cache and self._intervalo(prefixo) == 1:
+                    self.cache[prefixo] = [valor]
+
+    def adicionar(self, valor, quantidade=1):
+        atual = self.frequencias.get(valor)
+        if atual is None:
+            insort(self.chaves, (valor.casefold(), valor))
+            self.frequencias[valor] = quantidade
+        else:
+            self.frequencias[valor] = atual + quantidade
+        self._corrigir(valor, subiu=True)
+
+    def remover(self, valor, quantidade=1):
+        atual = self.frequencias.get(valor)
+        if atual is None:
+            return
+        if atual > quantidade:
+            self.frequencias[valor] = atual - quantidade
+        else:
+            del self.frequencias[valor]
+            chave = (valor.casefold(), valor)
+            i = bisect_left(self.chaves, chave)
+            if i < len(self.chaves) and self.chaves[i] == chave:
+                del self.chaves[i]
+        self._corrigir(valor, subiu=False)
+
+    def sugerir(self, prefixo, limite):
+        dobrado = prefixo.casefold()
+        lista = self.cache.get(dobrado)
+        if lista is not None and (len(lista) >= limite or len(lista) >= self._intervalo(dobrado)):
+            return lista[:limite]
+        inicio = bisect_left(self.chaves, (dobrado,))
+        fim = bisect_left(self.chaves, (dobrado + FIM,))
+        valores = (valor for _, valor in self.chaves[inicio:fim])
+        if fim - inicio <= LIMITE_VARREDURA and len(dobrado) > TAMANHO_PREFIXO_MONTADO:
+            return heapq.nsmallest(limite, valores, key=self._posicao)
+        self.cache[dobrado] = heapq.nsmallest(max(limite, CAPACIDADE_CACHE), valores, key=self._posicao)
+        return self.cache[dobrado][:limite]
+
+
+def _contar(dados, coluna):
+    """{valor: quantidade de linhas} de uma coluna, ignorando valores vazios"""
+    # Em colunas categóricas a contagem é feita pelos códigos, sem materializar os textos
+    contagens = dados[coluna].value_counts()
+    contagens = contagens[contagens > 0]
+    contagens.index = contagens.index.astype(str)
+    return contagens[contagens.index.str.strip() != ""].to_dict()
+
+
+class Autocompletar:
+    """Sugestões por coluna, ordenadas por frequência, mantidas a cada inclusão e remoção.
+
+    As colunas podem ser montadas em segundo plano (`montar` numa thread de
+    trabalho, `instalar` na thread da tela); senão, cada coluna é montada na
+    primeira sugestão pedida (e de novo depois de `invalidar`).
+    """
+
+    def __init__(self, colunas=COLUNAS_SUGESTAO):
+        self.colunas = colunas
+        self.sugestoes = dict.fromkeys(colunas)
+
+    def invalidar(self):
+        self.sugestoes = dict.fromkeys(self.colunas)
+
+    def montar(self, dados, progresso=None):
+        """{coluna: sugestões} montadas a partir de `dados`, sem tocar neste objeto (roda fora da tela)"""
+        montadas = {}
+        for i, coluna in enumerate(self.colunas):
+            if progresso:
+                progresso(i / len(self.colunas), coluna)
+            montadas[coluna] = _SugestoesColuna(_contar(dados, coluna))
+        return montadas
+
+    def instalar(self, montadas):
+        """Usa as colunas de `montar`; as já montadas (e corrigidas desde então) ficam"""
+        for coluna, sugestoes in montadas.items():
+            if self.sugestoes.get(coluna, False) is None:
+                self.sugestoes[coluna] = sugestoes
+
+    def _coluna(self, coluna, dados):
+        if self.sugestoes[coluna] is None:
+            self.sugestoes[coluna] = _SugestoesColuna(_contar(dados, coluna))
+        return self.sugestoes[coluna]
+
+    def adicionar(self, linhas):
+        """Inclui os valores das linhas (DataFrame) nas colunas já montadas"""
+        for coluna, sugestoes in self.sugestoes.items():
+            if sugestoes is not None:
+                for valor, quantidade in _contar(linhas, coluna).items():
+                    sugestoes.adicionar(valor, quantidade)
+
+    def remover(self, linhas):
+        """Retira os valores das linhas (antes de saírem do DataFrame)"""
+        for coluna, sugestoes in self.sugestoes.items():
+            if sugestoes is not None:
+                for valor, quantidade in _contar(linhas, coluna).items():
+                    sugestoes.remover(valor, quantidade)
+
+    def sugerir(self, coluna, prefixo, dados, limite=8):
+        """Até `limite` valores da coluna que começam com `prefixo`, os mais frequentes primeiro"""
+        if not prefixo:
+            return []
+        return self._coluna(coluna, dados).sugerir(prefixo, limite)
@@ -0,0 +1,198 @@
+"""Banco SQLite com todos os orçamentos salvos, para consultas entre orçamentos.
+
+Cada orçamento é um registro em `orcamentos` e suas linhas ficam em
+`cotacoes`, chaveadas por (orçamento, id da linha). Os índices por
+fornecedor, produto e data tornam consultas como "todas as cotações de
+Roteador da Huawei no último ano" uma busca indexada, sem abrir arquivo por
+arquivo. `migrar_backups` importa os backups da pasta que ainda não estão no
+banco e reimporta os que mudaram desde a importação (backups abertos e
+editados no aplicativo), comparando a assinatura mtime/tamanho do arquivo e
+do diário guardada com cada orçamento.
+
+Preços e totais ficam em centavos e IPI/desconto em pontos-base, como no
+DataFrame; bancos criados antes disso (versão 0, valores em reais) são
+convertidos ao abrir.
+"""
+import glob
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from dinheiro import para_centavos, para_pontos_base
+from indice_arquivos import assinatura_arquivo
+from persistencia import COLUNAS, FORMATO_DATA, FORMATOS, obter_diario, tipar
+
+# Coluna do DataFrame -> coluna da tabela `cotacoes`
+CAMPOS = {
+    "Data": "data",
+    "Fornecedor": "fornecedor",
+    "Produto": "produto",
+    "Descrição": "descricao",
+    "Preço Unitário": "preco",
+    "Quantidade": "quantidade",
+    "IPI": "ipi",
+    "Desconto": "desconto",
+    "Total Final": "total",
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS orcamentos (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE,
+    origem TEXT,
+    salvo_em TEXT NOT NULL,
+    assinatura TEXT
+);
+CREATE TABLE IF NOT EXISTS cotacoes (
+    orcamento_id INTEGER NOT NULL REFERENCES orcamentos(id) ON DELETE CASCADE,
+    id INTEGER NOT NULL,
+    data TEXT,
+    fornecedor TEXT COLLATE NOCASE,
+    produto TEXT COLLATE NOCASE,
+    descricao TEXT,
+    preco INTEGER,
+    quantidade INTEGER,
+    ipi INTEGER,
+    desconto INTEGER,
+    total INTEGER,
+    PRIMARY KEY (orcamento_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_cotacoes_fornecedor ON cotacoes (fornecedor, produto, data);
+CREATE INDEX IF NOT EXISTS idx_cotacoes_produto ON cotacoes (produto, data);
+CREATE INDEX IF NOT EXISTS idx_cotacoes_data ON cotacoes (data);
+"""
+
+# PRAGMA user_version: 0 = valores em reais e %, 1 = centavos e pontos-base,
+# 2 = assinatura do arquivo de origem em `orcamentos`
+VERSAO_ESQUEMA = 2
+
+
+class BancoOrcamentos:
+    """Orçamentos salvos num único arquivo SQLite"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA foreign_keys = ON")
+        self.conexao.executescript(ESQUEMA)
+        self._migrar()
+
+    def _migrar(self):
+        versao = self.conexao.execute("PRAGMA user_version").fetchone()[0]
+        if versao >= VERSAO_ESQUEMA:
+            return
+        antigos = self._ler("SELECT rowid, preco, ipi, desconto, total FROM cotacoes") if versao < 1 else []
+        colunas = {linha[1] for linha in self.conexao.execute("PRAGMA table_info(orcamentos)")}
+        with self.conexao:
+            if "assinatura" not in colunas:
+                # Orçamentos importados antes da versão 2 ficam sem assinatura e são reimportados uma vez
+                self.conexao.execute("ALTER TABLE orcamentos ADD COLUMN assinatura TEXT")
+            if len(antigos):
+                self.conexao.executemany(
+                    "UPDATE cotacoes SET preco = ?, ipi = ?, desconto = ?, total = ? WHERE rowid = ?",
+                    zip(para_centavos(antigos["preco"].fillna(0).to_numpy()).tolist(),
+                        para_pontos_base(antigos["ipi"].fillna(0).to_numpy()).tolist(),
+                        para_pontos_base(antigos["desconto"].fillna(0).to_numpy()).tolist(),
+                        para_centavos(antigos["total"].fillna(0).to_numpy()).tolist(),
+                        antigos["rowid"].tolist()),
+                )
+            self.conexao.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+
+    def fechar(self):
+        self.conexao.close()
+
+    def salvar_orcamento(self, nome, dados, origem=None, assinatura=None):
+        """Grava (ou substitui) o orçamento `nome` com as linhas de `dados`.
+
+        `assinatura`: a de `assinatura_arquivo` para `origem` quando os dados foram lidos dele.
+        """
+        dados = tipar(dados)
+        # No banco a data fica como texto ISO, comparável nas consultas por período
+        dados["Data"] = dados["Data"].dt.strftime(FORMATO_DATA)
+        linhas = zip(
+            dados.index.tolist(),
+            *(dados[coluna].tolist() for coluna in CAMPOS)
+        )
+        with self.conexao:
+            self.conexao.execute("DELETE FROM orcamentos WHERE nome = ?", (nome,))
+            cursor = self.conexao.execute(
+                "INSERT INTO orcamentos (nome, origem, salvo_em, assinatura) VALUES (?, ?, ?, ?)",
+                (nome, origem, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                 None if assinatura is None else json.dumps(assinatura)),
+            )
+            orcamento_id = cursor.lastrowid
+            self.conexao.executemany(
+                f"INSERT INTO cotacoes (orcamento_id, id, {', '.join(CAMPOS.values())}) "
+                f"VALUES ({orcamento_id}, ?, {', '.join('?' * len(CAMPOS))})",
+                linhas,
+            )
+
+    def _ler(self, sql, parametros=()):
+        return pd.read_sql_query(sql, self.conexao, params=parametros)
+
+    def carregar_orcamento(self, nome):
+        """DataFrame do orçamento, indexado pelos ids das linhas"""
+        dados = self._ler(
+            f"SELECT c.id AS ID, {', '.join(f'c.{campo}' for campo in CAMPOS.values())} "
+            "FROM cotacoes c JOIN orcamentos o ON o.id = c.orcamento_id "
+            "WHERE o.nome = ? ORDER BY c.id",
+            (nome,),
+        )
+        dados = dados.rename(columns={campo: coluna for coluna, campo in CAMPOS.items()})
+        return tipar(dados.set_index("ID")[COLUNAS])
+
+    def listar_orcamentos(self):
+        """Nome, data de gravação e quantidade de linhas de cada orçamento"""
+        return self._ler(
+            "SELECT o.nome AS Orçamento, o.salvo_em AS \"Salvo em\", COUNT(c.id) AS Linhas "
+            "FROM orcamentos o LEFT JOIN cotacoes c ON c.orcamento_id = o.id "
+            "GROUP BY o.id ORDER BY o.salvo_em DESC"
+        )
+
+    def consultar(self, fornecedor=None, produto=None, desde=None, ate=None):
+        """Cotações de todos os orçamentos; filtros vazios são ignorados.
+
+        Fornecedor e produto comparam sem diferenciar maiúsculas (e usam os
+        índices); `desde`/`ate` são datas ISO (AAAA-MM-DD), inclusive.
+        """
+        condicoes, parametros = [], []
+        for campo, valor in (("c.fornecedor = ?", fornecedor), ("c.produto = ?", produto),
+                             ("c.data >= ?", desde), ("c.data <= ?", ate)):
+            if valor:
+                condicoes.append(campo)
+                parametros.append(valor)
+        onde = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        dados = self._ler(
+            f"SELECT o.nome AS orcamento, {', '.join(f'c.{campo}' for campo in CAMPOS.values())} "
+            f"FROM cotacoes c JOIN orcamentos o ON o.id = c.orcamento_id {onde} "
+            "ORDER BY c.data DESC, o.nome, c.id",
+            parametros,
+        )
+        dados = dados.rename(columns={"orcamento": "Orçamento", **{c: col for col, c in CAMPOS.items()}})
+        return tipar(dados).reset_index(drop=True)
+
+    def assinaturas(self):
+        """{nome: assinatura gravada (lista) ou None}"""
+        return {nome: None if assinatura is None else json.loads(assinatura)
+                for nome, assinatura in self.conexao.execute("SELECT nome, assinatura FROM orcamentos")}
+
+    def migrar_backups(self, pasta, progresso=None):
+        """Importa os backups da pasta novos ou alterados desde a última importação; retorna quantos"""
+        gravadas = self.assinaturas()
+        arquivos = []
+        for extensao in FORMATOS:
+            for arquivo in glob.glob(os.path.join(pasta, f"*{extensao}")):
+                nome = os.path.splitext(os.path.basename(arquivo))[0]
+                assinatura = assinatura_arquivo(arquivo, os.stat(arquivo))
+                if gravadas.get(nome) != assinatura:
+                    arquivos.append((arquivo, nome, assinatura))
+        arquivos.sort()
+        for i, (arquivo, nome, assinatura) in enumerate(arquivos):
+            if progresso:
+                progresso(i / len(arquivos), os.path.basename(arquivo))
+            # Snapshot + diário pendente do backup
+            self.salvar_orcamento(nome, obter_diario(arquivo).carregar(), origem=arquivo, assinatura=assinatura)
+        return len(arquivos)
@@ -0,0 +1,37 @@
+"""Mede leitura e gravação do orçamento completo em CSV, Parquet e Feather.
+
+Uso: python benchmarks/bench_armazenamento.py [linhas ...]   (padrão: 100000 1000000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistencia import FORMATOS, gravar_orcamento, ler_orcamento  # noqa: E402
+from gerador import gerar_dados  # noqa: E402
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    tamanhos = [int(n) for n in sys.argv[1:]] or [100_000, 1_000_000]
+    with tempfile.TemporaryDirectory() as pasta:
+        for linhas in tamanhos:
+            dados = gerar_dados(linhas)
+            print(f"{linhas} linhas")
+            for extensao in FORMATOS:
+                caminho = os.path.join(pasta, f"orcamentos{extensao}")
+                gravacao = medir(lambda: gravar_orcamento(dados, caminho))
+                leitura = medir(lambda: ler_orcamento(caminho))
+                tamanho = os.path.getsize(caminho) / 2**20
+                print(f"  {extensao:9} gravar {gravacao:8.1f} ms   ler {leitura:8.1f} ms   {tamanho:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
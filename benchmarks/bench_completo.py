@@ -0,0 +1,232 @@
+"""Suíte de benchmarks das operações do aplicativo, com resultado em JSON.
+
+Mede, sobre orçamentos sintéticos (gerador.py) de 10 mil, 100 mil e 1 milhão de
+linhas, as funções que a tela usa: incluir e remover cotações, filtrar, ordenar,
+atualizar a tabela, agregar e desenhar os gráficos, calcular a melhor oferta,
+gerar o PDF, salvar e carregar. A atualização da tabela precisa de um display (ou Xvfb:
+`xvfb-run python benchmarks/bench_completo.py`); sem display ela é pulada.
+
+Uso:
+    python benchmarks/bench_completo.py [linhas ...] [--saida resultado.json] [--comparar anterior.json]
+
+Sem --saida, o resultado vai para benchmarks/resultados/resultado_<commit>.json
+(pasta fora do git), então execuções em commits diferentes não se sobrescrevem.
+
+Com --comparar, cada medida é comparada à do arquivo anterior (de outro commit)
+e o código de saída é 1 se alguma ficou mais lenta que a tolerância.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from comparativo import Comparativo  # noqa: E402
+from gerador import gerar_dados  # noqa: E402
+from graficos import agregar_por_fornecedor, salvar_graficos_png  # noqa: E402
+from nucleo import Orcamento, exportar_pdf  # noqa: E402
+from ordenacao import ORDENS  # noqa: E402
+from persistencia import FORMATOS, gravar_orcamento, ler_orcamento  # noqa: E402
+
+TAMANHOS = [10_000, 100_000, 1_000_000]
+# O PDF tem uma página a cada poucas dezenas de linhas: acima disso, mede só as primeiras
+LINHAS_PDF = 100_000
+# Onde os resultados ficam quando --saida não é informado
+PASTA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+COTACAO = {"fornecedor": "Huawei Telecom", "produto": "Roteador Gigabit", "descricao": "Roteador Gigabit modelo 100",
+           "preco_unitario": 350.0, "quantidade": 4, "ipi": 10.0, "desconto": 5.0}
+
+
+def medir(funcao, repeticoes, preparar=None):
+    """Tempos (ms) de `repeticoes` chamadas; `preparar` roda antes de cada uma, fora da medida"""
+    tempos = []
+    for _ in range(repeticoes):
+        argumentos = preparar() if preparar else ()
+        inicio = time.perf_counter()
+        funcao(*argumentos)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def resumo(tempos, **extras):
+    return {"mediana_ms": statistics.median(tempos), "min_ms": min(tempos), "repeticoes": len(tempos), **extras}
+
+
+def medir_tabela(dados, repeticoes):
+    """Tabela virtual: exibição completa e diff depois de uma inclusão (None sem display)"""
+    import tkinter as tk
+    from tkinter import ttk
+
+    from visao_tabela import TabelaVirtual
+
+    try:
+        raiz = tk.Tk()
+    except tk.TclError:
+        return None
+    raiz.withdraw()
+    colunas = ["Fornecedor", "Produto", "Descrição", "Preço Unitário", "Quantidade", "IPI", "Desconto", "Total Final"]
+    tabela = ttk.Treeview(raiz, columns=colunas, show="headings", height=25)
+    tabela_virtual = TabelaVirtual(tabela, ttk.Scrollbar(raiz))
+    orcamento = Orcamento(dados)
+    try:
+        resultados = {
+            "tabela_exibir_completo": resumo(medir(lambda: tabela_virtual.exibir(orcamento.dados, completo=True),
+                                                   repeticoes)),
+        }
+
+        def incluir():
+            orcamento.adicionar(**COTACAO)
+            return ()
+
+        tempos = medir(lambda: tabela_virtual.exibir(orcamento.dados), repeticoes, preparar=incluir)
+        resultados["tabela_atualizar_apos_inclusao"] = resumo(tempos)
+        ordem = orcamento.ordenacao.ordenar(orcamento.dados, orcamento.dados, "Menor Preço")
+        tempos = medir(lambda: tabela_virtual.exibir(orcamento.dados, ordem=ordem), repeticoes)
+        resultados["tabela_exibir_ordenada"] = resumo(tempos)
+        return resultados
+    finally:
+        raiz.destroy()
+
+
+def medir_tamanho(linhas, repeticoes, pasta, linhas_pdf):
+    dados = gerar_dados(linhas)
+    resultados = {}
+
+    def registrar(nome, tempos, **extras):
+        resultados[nome] = resumo(tempos, **extras)
+        print(f"  {nome:<34} {resultados[nome]['mediana_ms']:10.2f} ms")
+
+    # Índices de busca e ordenação montados do zero (primeira consulta depois de abrir)
+    def construir():
+        orcamento = Orcamento(dados)
+        orcamento.filtrar(fornecedor="telecom")
+        for ordem in ORDENS:
+            orcamento.filtrar(ordem=ordem)
+    registrar("construir_indices", medir(construir, repeticoes))
+
+    orcamento = Orcamento(dados)
+    orcamento.filtrar(fornecedor="telecom")
+    for ordem in ORDENS:
+        orcamento.filtrar(ordem=ordem)
+
+    registrar("adicionar_item", medir(lambda: orcamento.adicionar(**COTACAO), max(repeticoes, 20)))
+    registrar("remover_item", medir(orcamento.remover, max(repeticoes, 20),
+                                    preparar=lambda: ([orcamento.dados.index[len(orcamento.dados) // 2]],)))
+    registrar("remover_100_itens", medir(orcamento.remover, repeticoes,
+                                         preparar=lambda: (orcamento.dados.index[:100].tolist(),)))
+
+    registrar("filtrar_fornecedor", medir(lambda: orcamento.filtrar(fornecedor="telecom"), repeticoes))
+    registrar("filtrar_descricao", medir(lambda: orcamento.filtrar(descricao="modelo 12"), repeticoes))
+    registrar("filtrar_combinado", medir(
+        lambda: orcamento.filtrar(fornecedor="huawei", produto="roteador", descricao="gigabit"), repeticoes))
+    for ordem in ORDENS:
+        chave = ordem.lower().replace(" ", "_").replace("-", "_")
+        registrar(f"ordenar_{chave}", medir(lambda: orcamento.filtrar(ordem=ordem), repeticoes))
+    registrar("filtrar_e_ordenar", medir(
+        lambda: orcamento.filtrar(fornecedor="telecom", ordem="Menor Preço"), repeticoes))
+
+    tabela = medir_tabela(orcamento.dados, repeticoes)
+    if tabela is None:
+        print("  (tabela pulada: sem display)")
+        resultados["tabela"] = {"pulado": "sem display"}
+    else:
+        for nome, medida in tabela.items():
+            resultados[nome] = medida
+            print(f"  {nome:<34} {medida['mediana_ms']:10.2f} ms")
+
+    registrar("agregar_graficos", medir(lambda: agregar_por_fornecedor(orcamento.dados), repeticoes))
+    agregado = agregar_por_fornecedor(orcamento.dados)
+    registrar("graficos_png", medir(lambda: salvar_graficos_png(agregado, pasta, "bench"), 1))
+
+    registrar("melhor_oferta", medir(lambda: Comparativo(orcamento.dados), repeticoes))
+
+    amostra = orcamento.dados.iloc[:linhas_pdf]
+    registrar("gerar_pdf", medir(lambda: exportar_pdf(amostra, os.path.join(pasta, "bench.pdf")), 1),
+              linhas=len(amostra))
+
+    for extensao in FORMATOS:
+        caminho = os.path.join(pasta, f"orcamentos{extensao}")
+        nome = extensao.lstrip(".")
+        registrar(f"salvar_{nome}", medir(lambda: gravar_orcamento(orcamento.dados, caminho), repeticoes))
+        registrar(f"carregar_{nome}", medir(lambda: ler_orcamento(caminho), repeticoes))
+        os.remove(caminho)
+    return resultados
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual, anterior, tolerancia):
+    """Imprime a variação de cada medida; devolve as que pioraram além da tolerância"""
+    print(f"\nComparação com {anterior.get('commit') or 'o resultado anterior'}:")
+    regressoes = []
+    for linhas, medidas in atual["resultados"].items():
+        anteriores = anterior["resultados"].get(linhas, {})
+        for nome, medida in medidas.items():
+            antes = anteriores.get(nome, {}).get("mediana_ms")
+            depois = medida.get("mediana_ms")
+            if not antes or depois is None:
+                continue
+            razao = depois / antes
+            marca = ""
+            if razao > 1 + tolerancia:
+                marca = "  <-- mais lento"
+                regressoes.append((linhas, nome, razao))
+            print(f"  {linhas:>8} {nome:<34} {antes:10.2f} -> {depois:10.2f} ms ({razao:5.2f}x){marca}")
+    return regressoes
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks das operações do orçamento.")
+    parser.add_argument("linhas", nargs="*", type=int, default=TAMANHOS, help="tamanhos dos orçamentos")
+    parser.add_argument("--repeticoes", type=int, default=5, help="repetições de cada medida (mediana)")
+    parser.add_argument("--saida", help="arquivo JSON do resultado (padrão: benchmarks/resultados/resultado_<commit>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="piora relativa aceita na comparação (0.2 = 20%%)")
+    parser.add_argument("--linhas-pdf", type=int, default=LINHAS_PDF, help="máximo de linhas no PDF medido")
+    args = parser.parse_args(argumentos)
+
+    resultado = {
+        "commit": commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": {},
+    }
+    with tempfile.TemporaryDirectory() as pasta:
+        for linhas in args.linhas:
+            print(f"{linhas} linhas")
+            resultado["resultados"][str(linhas)] = medir_tamanho(linhas, args.repeticoes, pasta, args.linhas_pdf)
+
+    if args.saida is None:
+        args.saida = os.path.join(PASTA_RESULTADOS, f"resultado_{resultado['commit'] or 'sem_commit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(args.saida)), exist_ok=True)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultado gravado em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        if comparar(resultado, anterior, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Mede o tempo até a primeira tela interativa e confere a meta de inicialização.
+
+Abre o aplicativo algumas vezes (fechando assim que a tela responde), lê o
+relatório de tempos gravado por instrumentacao.py e falha (código 1) se a
+mediana passar de META_INICIO_S ou se matplotlib/fpdf forem carregados na partida.
+Precisa de um display (ou Xvfb). Uso: python benchmarks/bench_inicializacao.py [repeticoes]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from instrumentacao import META_INICIO_S  # noqa: E402
+
+
+def partida(arquivo_tempos):
+    ambiente = dict(os.environ, ORCAMENTO_SAIR_APOS_INICIO="1", ORCAMENTO_TEMPOS_ARQUIVO=arquivo_tempos)
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(RAIZ, "gestao_orcamento.py")],
+                   cwd=RAIZ, env=ambiente, check=True)
+    parede = time.perf_counter() - inicio
+    with open(arquivo_tempos, encoding="utf-8") as f:
+        return parede, json.load(f)
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo_tempos = os.path.join(pasta, "tempos.json")
+        partida(arquivo_tempos)  # aquece o cache de disco e o da logo
+        resultados = [partida(arquivo_tempos) for _ in range(repeticoes)]
+
+    fases = {}
+    for _, relatorio in resultados:
+        for fase in relatorio["fases"]:
+            fases.setdefault(fase["nome"], []).append(fase["duracao_ms"])
+    for nome, duracoes in fases.items():
+        print(f"{nome:<32} {statistics.median(duracoes):8.1f} ms")
+
+    total = statistics.median(relatorio["total_ms"] for _, relatorio in resultados) / 1000
+    parede = statistics.median(p for p, _ in resultados)
+    print(f"{'até a tela interativa':<32} {total * 1000:8.1f} ms (meta {META_INICIO_S * 1000:.0f} ms)")
+    print(f"{'processo inteiro (com o Python)':<32} {parede * 1000:8.1f} ms")
+
+    carregados = set().union(*(r["sob_demanda_carregados"] for _, r in resultados))
+    if carregados:
+        print(f"FALHA: carregados na partida: {', '.join(sorted(carregados))}")
+    if total > META_INICIO_S:
+        print("FALHA: acima da meta")
+    return 1 if carregados or total > META_INICIO_S else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Compara a memória e o tempo das operações no esquema antigo (tudo object) e no compacto.
+
+O esquema antigo é o que o DataFrame tinha quando era criado com
+pd.DataFrame(columns=[...]) e crescia com pd.concat: todas as colunas object,
+cada texto guardado uma vez por linha. O compacto é o de persistencia.tipar.
+
+Uso: python benchmarks/bench_memoria.py [linhas ...]   (padrão: 1000000)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerador import gerar_dados  # noqa: E402
+from graficos import agregar_por_fornecedor  # noqa: E402
+from indice_busca import IndiceBusca  # noqa: E402
+from instrumentacao import formatar_relatorio_memoria, memoria_dataframe, relatorio_memoria  # noqa: E402
+from persistencia import tipar  # noqa: E402
+
+
+def medir(funcao, repeticoes=3):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def filtrar(dados):
+    indice = IndiceBusca()
+    return indice.filtrar(dados, {"Fornecedor": "telecom", "Produto": "roteador"})
+
+
+def main():
+    tamanhos = [int(a) for a in sys.argv[1:]] or [1_000_000]
+    for linhas in tamanhos:
+        compacto = tipar(gerar_dados(linhas))
+        antigo = compacto.astype({coluna: object for coluna in compacto.columns})
+        antigo["Data"] = compacto["Data"].dt.strftime("%Y-%m-%d").astype(object)
+
+        print(f"\n{linhas} linhas\n\nantigo (object):")
+        print(formatar_relatorio_memoria(relatorio_memoria(antigo), linhas))
+        print("\ncompacto:")
+        print(formatar_relatorio_memoria(relatorio_memoria(compacto), linhas))
+        reducao = memoria_dataframe(antigo) / memoria_dataframe(compacto)
+        print(f"\nredução: {reducao:.1f}x")
+
+        for nome, funcao in (("agregar gráficos", agregar_por_fornecedor), ("índice + filtro", filtrar)):
+            antes = medir(lambda: funcao(antigo))
+            depois = medir(lambda: funcao(compacto))
+            print(f"{nome:<18} antigo {antes:8.1f} ms | compacto {depois:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Compara sort_values a cada filtro com as ordens pré-calculadas (IndiceOrdenacao).
+
+O "gather" inclui montar as linhas de uma tela (50) na ordem, como faz a tabela virtual.
+
+Uso: python benchmarks/bench_ordenacao.py [linhas ...]   (padrão: 100000 1000000)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerador import gerar_dados  # noqa: E402
+from ordenacao import ORDENS, IndiceOrdenacao  # noqa: E402
+
+
+def medir(funcao, repeticoes=3):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def gather(indice, dados, filtrado, ordem):
+    posicoes = indice.ordenar(dados, filtrado, ordem)
+    return filtrado.iloc[posicoes[:50]]
+
+
+def main():
+    tamanhos = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    for linhas in tamanhos:
+        dados = gerar_dados(linhas)
+        filtrado = dados[dados["Fornecedor"].str.contains("distribuidora", case=False, regex=False)]
+        indice = IndiceOrdenacao()
+        inicio = time.perf_counter()
+        for ordem in ORDENS:
+            indice.ordenar(dados, dados, ordem)
+        construcao = (time.perf_counter() - inicio) * 1000
+
+        print(f"\n{linhas} linhas (construção das ordens: {construcao:.0f} ms)")
+        for ordem, (coluna, crescente) in ORDENS.items():
+            antes = medir(lambda: dados.sort_values(by=coluna, ascending=crescente))
+            depois = medir(lambda: gather(indice, dados, dados, ordem))
+            antes_f = medir(lambda: filtrado.sort_values(by=coluna, ascending=crescente))
+            depois_f = medir(lambda: gather(indice, dados, filtrado, ordem))
+            print(f"  {ordem:15} sort {antes:8.1f} ms | gather {depois:8.1f} ms"
+                  f" || com filtro: sort {antes_f:7.1f} ms | gather {depois_f:7.1f} ms")
+
+        nova = gerar_dados(1, semente=7).set_axis(dados.index[-1:] + 1)
+        print(f"  incluir 1 linha nas 4 colunas: {medir(lambda: IndiceOrdenacao.adicionar(indice, nova), 1):.1f} ms")
+        print(f"  remover 100 linhas das 4 colunas: {medir(lambda: indice.remover(dados.index[:100]), 1):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
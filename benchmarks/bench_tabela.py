@@ -0,0 +1,52 @@
+"""Mede a atualização da Treeview: recarregamento completo x diff por ids.
+
+Precisa de um display (ou Xvfb). Uso: python benchmarks/bench_tabela.py [linhas]
+"""
+import os
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visao_tabela import SincronizadorTabela  # noqa: E402
+from gerador import gerar_dados  # noqa: E402
+
+COLUNAS_TABELA = ["Fornecedor", "Produto", "Descrição", "Preço Unitário", "Quantidade", "IPI", "Desconto", "Total Final"]
+
+
+def medir(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    raiz = tk.Tk()
+    raiz.withdraw()
+    tabela = ttk.Treeview(raiz, columns=COLUNAS_TABELA, show="headings", selectmode="extended")
+    sincronizador = SincronizadorTabela(tabela)
+
+    dados = gerar_dados(linhas)
+    sincronizador.recarregar(dados)
+
+    # Antes: apaga e reinsere tudo a cada inclusão
+    mais_um = pd.concat([dados, gerar_dados(1).set_axis(pd.Index([linhas], name="ID"))])
+    print(f"incluir 1 linha, recarregamento completo: {medir(lambda: sincronizador.recarregar(mais_um)):8.1f} ms")
+
+    # Depois: só o diff
+    sincronizador.recarregar(dados)
+    print(f"incluir 1 linha, diff por ids:            {medir(lambda: sincronizador.atualizar(mais_um)):8.1f} ms")
+
+    menos_tres = mais_um.drop(mais_um.index[[10, 500 % linhas, linhas - 1]])
+    print(f"remover 3 linhas, diff por ids:           {medir(lambda: sincronizador.atualizar(menos_tres)):8.1f} ms")
+
+    raiz.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Gerador de orçamentos sintéticos para os benchmarks (com semente fixa).
+
+Os dados imitam um orçamento real: poucos fornecedores concentram a maior
+parte das cotações (distribuição de Zipf), cada produto é cotado por vários
+fornecedores, as descrições se repetem entre cotações do mesmo modelo e as
+datas se espalham por dois anos. A mesma semente gera sempre os mesmos dados.
+Valores em centavos e pontos-base, como o aplicativo guarda.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from precos import calcular_total  # noqa: E402
+
+FORNECEDORES = 300
+PRODUTOS = 3000
+
+_EMPRESAS = ["Huawei", "Samsung", "Intelbras", "Furukawa", "Cisco", "TP-Link", "Ubiquiti", "Mikrotik",
+             "Nexans", "Datacom", "Multilaser", "Elgin", "Siemens", "Schneider", "WEG", "Tramontina"]
+_SUFIXOS = ["Distribuidora", "Comércio", "Atacado", "Soluções", "Telecom", "Materiais", "Importadora",
+            "Sul", "Nordeste", "Brasil", "Center", "Express", "Tec", "Redes", "Elétrica", "Norte", "Digital",
+            "Sistemas", "Equipamentos"]
+_TIPOS = ["Roteador", "Switch", "Cabo UTP", "Cabo Óptico", "Conector RJ45", "Antena", "Fonte", "Rack",
+          "Patch Panel", "Nobreak", "Câmera IP", "Access Point", "Transceiver SFP", "Organizador", "Disjuntor"]
+_VARIANTES = ["Cat6", "Cat5e", "24 portas", "48 portas", "Gigabit", "PoE", "Outdoor", "12U", "44U",
+              "Dual Band", "Monomodo", "Multimodo", "Bivolt", "1200VA", "Industrial", "Slim", "Pro", "Lite",
+              "Mini", "Plus"]
+
+
+def _nomes_fornecedores():
+    nomes = [f"{empresa} {sufixo}" for sufixo in _SUFIXOS for empresa in _EMPRESAS]
+    return nomes[:FORNECEDORES]
+
+
+def _nomes_produtos():
+    nomes = [f"{tipo} {variante}" for variante in _VARIANTES for tipo in _TIPOS]
+    return [f"{nome} {serie}" for serie in ("", "II", "III", "X", "S", "Max", "Neo", "Ultra", "Flex", "One")
+            for nome in nomes][:PRODUTOS]
+
+
+def _zipf(rng, quantidade, linhas):
+    """Índices em [0, quantidade) com peso 1/(posição + 1): os primeiros aparecem muito mais"""
+    pesos = 1 / np.arange(1, quantidade + 1)
+    return rng.choice(quantidade, size=linhas, p=pesos / pesos.sum())
+
+
+def gerar_dados(linhas, semente=42):
+    rng = np.random.default_rng(semente)
+    fornecedores = np.array(_nomes_fornecedores(), dtype=object)
+    produtos = np.array([nome.strip() for nome in _nomes_produtos()], dtype=object)
+
+    produto = _zipf(rng, len(produtos), linhas)
+    # O preço de referência é do produto; cada fornecedor cota em torno dele
+    referencia = np.exp(rng.uniform(np.log(500), np.log(500_000), len(produtos)))
+    preco = np.round(referencia[produto] * rng.uniform(0.8, 1.25, linhas)).astype(np.int64)
+    quantidade = rng.integers(1, 200, linhas)
+    ipi = rng.choice([0, 500, 1000, 1200, 1500, 2000], linhas)
+    desconto = rng.integers(0, 250, linhas) * 10
+    # Modelos: um número por produto, repetidos entre cotações (~5 cotações por descrição)
+    modelo = rng.integers(100, 100 + max(linhas // 5 // len(produtos), 1), linhas)
+    inicio = np.datetime64("2024-01-01")
+    datas = inicio + rng.integers(0, 730, linhas).astype("timedelta64[D]")
+
+    produtos_linha = pd.Series(produtos[produto])
+    dados = pd.DataFrame({
+        "Data": pd.Series(datas).dt.strftime("%Y-%m-%d"),
+        "Fornecedor": fornecedores[_zipf(rng, len(fornecedores), linhas)],
+        "Produto": produtos_linha,
+        "Descrição": produtos_linha + " modelo " + pd.Series(modelo).astype(str),
+        "Preço Unitário": preco,
+        "Quantidade": quantidade,
+        "IPI": ipi,
+        "Desconto": desconto,
+        "Total Final": calcular_total(preco, quantidade, ipi, desconto),
+    })
+    dados.index.name = "ID"
+    return dados
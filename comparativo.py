@@ -0,0 +1,203 @@
+"""Melhor oferta de cada produto entre os fornecedores, numa passada vetorizada.
+
+O preço comparado é o efetivo por unidade (com IPI e desconto, em centavos).
+Uma ordenação pelos códigos de produto e fornecedor deixa, no início de cada
+par (produto, fornecedor), a cotação mais barata desse fornecedor: são as
+células da matriz produto × fornecedor. Uma segunda ordenação das células por
+preço dá, para cada produto, a melhor e a segunda melhor oferta. Total e
+economia são calculados na quantidade da melhor cotação, com a mesma conta
+(exata, em inteiros) do Total Final. A matriz densa só é montada para exportar.
+"""
+import numpy as np
+import pandas as pd
+
+from dinheiro import em_reais, formatar_reais
+from precos import calcular_total
+
+COLUNAS_OFERTAS = ["Melhor Fornecedor", "Preço Efetivo", "Quantidade", "Total", "2º Fornecedor",
+                   "2º Preço Efetivo", "Economia", "Fornecedores"]
+# Colunas de ofertas em centavos (convertidas para reais ao exportar)
+COLUNAS_CENTAVOS_OFERTAS = ["Preço Efetivo", "Total", "2º Preço Efetivo", "Economia"]
+
+# Chave -> título da coluna na janela "Melhor Oferta"
+CAMPOS = {
+    "produto": "Produto",
+    "fornecedor": "Melhor Fornecedor",
+    "preco": "Preço Efetivo",
+    "quantidade": "Qtd",
+    "total": "Total",
+    "segundo": "2º Fornecedor",
+    "preco_segundo": "2º Preço",
+    "economia": "Economia",
+    "fornecedores": "Fornecedores",
+}
+
+
+def _codificar(coluna):
+    """(códigos, nomes): códigos em ordem alfabética dos nomes, -1 para vazios"""
+    codigos, nomes = pd.factorize(coluna)
+    nomes = np.asarray(nomes, dtype=object).astype(str)
+    ordem = np.argsort(nomes, kind="stable")
+    posicao = np.empty(len(ordem) + 1, dtype=np.int64)
+    posicao[ordem] = np.arange(len(ordem))
+    posicao[-1] = -1  # o código -1 (vazio) continua -1
+    return posicao[codigos], nomes[ordem]
+
+
+def _ordenar(*chaves):
+    """Como np.lexsort (última chave é a principal), para chaves inteiras.
+
+    Se as chaves cabem juntas num int64, ordena uma chave só (argsort é bem
+    mais rápido que lexsort); senão, cai no lexsort.
+    """
+    if not len(chaves[0]):
+        return np.arange(0)
+    combinada = np.zeros(len(chaves[0]), dtype=np.int64)
+    faixa_total = 1
+    for chave in reversed(chaves):
+        minimo = int(chave.min())
+        faixa = int(chave.max()) - minimo + 1
+        faixa_total *= faixa
+        if faixa_total >= 2 ** 62:
+            return np.lexsort(chaves)
+        combinada = combinada * faixa + (chave - minimo)
+    return np.argsort(combinada)
+
+
+def _inicios(*chaves):
+    """Máscara das posições onde alguma das chaves (já ordenadas) muda"""
+    inicio = np.ones(len(chaves[0]), dtype=bool)
+    if len(inicio):
+        inicio[1:] = np.logical_or.reduce([chave[1:] != chave[:-1] for chave in chaves])
+    return inicio
+
+
+class Comparativo:
+    """Matriz produto × fornecedor de preços efetivos e a melhor oferta de cada produto.
+
+    `ofertas` é um DataFrame indexado pelo produto (ordem alfabética), com as
+    colunas de COLUNAS_OFERTAS; quando só um fornecedor cotou o produto, o
+    2º fornecedor fica vazio e o 2º preço e a economia ficam em zero.
+    """
+
+    def __init__(self, dados):
+        produto, self.produtos = _codificar(dados["Produto"])
+        fornecedor, self.fornecedores = _codificar(dados["Fornecedor"])
+        preco = dados["Preço Unitário"].to_numpy(dtype=np.int64)
+        quantidade = dados["Quantidade"].to_numpy(dtype=np.int64)
+        ipi = dados["IPI"].to_numpy(dtype=np.int64)
+        desconto = dados["Desconto"].to_numpy(dtype=np.int64)
+        efetivo = calcular_total(preco, 1, ipi, desconto)
+
+        validas = np.flatnonzero((produto >= 0) & (fornecedor >= 0))
+        # Células: a cotação mais barata de cada fornecedor em cada produto
+        chave = produto[validas] * max(len(self.fornecedores), 1) + fornecedor[validas]
+        ordem = _ordenar(efetivo[validas], chave)
+        linhas = validas[ordem][_inicios(chave[ordem])]
+        # Por produto, as células do preço mais baixo ao mais alto (empate: fornecedor em ordem alfabética)
+        linhas = linhas[_ordenar(fornecedor[linhas], efetivo[linhas], produto[linhas])]
+        self.celula_produto = produto[linhas]
+        self.celula_fornecedor = fornecedor[linhas]
+        self.celula_preco = efetivo[linhas]
+
+        inicio = np.flatnonzero(_inicios(self.celula_produto))
+        contagem = np.diff(np.r_[inicio, len(linhas)])
+        tem_segundo = contagem > 1
+        melhor = linhas[inicio]
+        # Sem segunda oferta, a "segunda" aponta para a própria melhor (economia zero)
+        segundo = linhas[np.where(tem_segundo, inicio + 1, inicio)]
+
+        qtd = quantidade[melhor]
+        total = calcular_total(preco[melhor], qtd, ipi[melhor], desconto[melhor])
+        total_segundo = calcular_total(preco[segundo], qtd, ipi[segundo], desconto[segundo])
+        nomes_segundo = self.fornecedores[fornecedor[segundo]]
+        self.ofertas = pd.DataFrame({
+            "Melhor Fornecedor": self.fornecedores[fornecedor[melhor]],
+            "Preço Efetivo": efetivo[melhor],
+            "Quantidade": qtd,
+            "Total": total,
+            "2º Fornecedor": np.where(tem_segundo, nomes_segundo, ""),
+            "2º Preço Efetivo": np.where(tem_segundo, efetivo[segundo], 0),
+            "Economia": total_segundo - total,
+            "Fornecedores": contagem,
+        }, index=pd.Index(self.produtos[produto[melhor]], name="Produto"), columns=COLUNAS_OFERTAS)
+
+    def matriz(self):
+        """DataFrame produto × fornecedor com o preço efetivo em reais (NaN onde não há cotação)"""
+        valores = np.full((len(self.produtos), len(self.fornecedores)), np.nan)
+        valores[self.celula_produto, self.celula_fornecedor] = em_reais(self.celula_preco)
+        matriz = pd.DataFrame(valores, index=pd.Index(self.produtos, name="Produto"), columns=self.fornecedores)
+        return matriz.loc[self.ofertas.index]
+
+    def economia_total(self):
+        return int(self.ofertas["Economia"].sum())
+
+
+def ofertas_em_reais(ofertas):
+    """Cópia das ofertas com os valores em reais (float) e sem 2º preço onde não há 2ª oferta"""
+    ofertas = ofertas.copy()
+    for coluna in COLUNAS_CENTAVOS_OFERTAS:
+        ofertas[coluna] = em_reais(ofertas[coluna])
+    ofertas.loc[ofertas["Fornecedores"] < 2, "2º Preço Efetivo"] = np.nan
+    return ofertas
+
+
+def entradas_ofertas(ofertas):
+    """Uma entrada (dicionário com as chaves de CAMPOS) por produto, a maior economia primeiro"""
+    ofertas = ofertas.sort_values("Economia", ascending=False, kind="stable")
+    tem_segundo = (ofertas["Fornecedores"] > 1).tolist()
+    return [
+        {"produto": produto, "fornecedor": fornecedor, "preco": preco, "quantidade": quantidade, "total": total,
+         "segundo": segundo, "preco_segundo": preco_segundo if ha_segundo else None,
+         "economia": economia, "fornecedores": fornecedores}
+        for produto, fornecedor, preco, quantidade, total, segundo, preco_segundo, economia, fornecedores, ha_segundo
+        in zip(ofertas.index.tolist(), *(ofertas[coluna].tolist() for coluna in COLUNAS_OFERTAS), tem_segundo)
+    ]
+
+
+def formatar_oferta(entrada):
+    """Valores exibidos de uma entrada, na ordem de CAMPOS"""
+    return (
+        entrada["produto"],
+        entrada["fornecedor"],
+        formatar_reais(entrada["preco"]),
+        entrada["quantidade"],
+        formatar_reais(entrada["total"]),
+        entrada["segundo"],
+        "" if entrada["preco_segundo"] is None else formatar_reais(entrada["preco_segundo"]),
+        formatar_reais(entrada["economia"]),
+        entrada["fornecedores"],
+    )
+
+
+def gravar_csv_comparativo(comparativo, caminho):
+    """CSV com a melhor oferta de cada produto seguida da matriz de preços efetivos por fornecedor"""
+    tabela = pd.concat([ofertas_em_reais(comparativo.ofertas), comparativo.matriz()], axis=1)
+    tabela.to_csv(caminho, float_format="%.2f")
+    return caminho
+
+
+class CacheComparativo:
+    """Guarda o comparativo do último DataFrame; é refeito quando o DataFrame muda.
+
+    O DataFrame do aplicativo é substituído (nunca alterado) a cada edição, então
+    basta comparar a identidade; `invalidar` libera o resultado antes disso.
+    """
+
+    def __init__(self):
+        self.dados = None
+        self.comparativo = None
+
+    def invalidar(self):
+        self.dados = None
+        self.comparativo = None
+
+    def em_cache(self, dados):
+        """O comparativo de `dados` se já foi calculado, senão None (sem calcular)"""
+        return self.comparativo if self.dados is dados else None
+
+    def obter(self, dados):
+        if self.dados is not dados:
+            self.comparativo = Comparativo(dados)
+            self.dados = dados
+        return self.comparativo
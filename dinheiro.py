@@ -0,0 +1,74 @@
+"""Valores monetários em centavos e percentuais em pontos-base, como inteiros.
+
+Preço Unitário e Total Final ficam em centavos (int64) e IPI e Desconto em
+pontos-base (1% = 100), então somas e comparações são exatas e não aparecem
+valores como 1343.2320000000002. A regra de arredondamento é uma só, em todo
+o aplicativo: para o inteiro mais próximo, com a metade para cima (0,5 centavo
+vira 1 centavo). As funções aceitam escalares ou arrays NumPy.
+"""
+import numpy as np
+
+CENTAVOS_POR_REAL = 100
+PONTOS_BASE_POR_PORCENTO = 100
+# 100% em pontos-base
+CEM_PORCENTO = 100 * PONTOS_BASE_POR_PORCENTO
+
+
+def _inteiro(valores):
+    return int(valores) if np.ndim(valores) == 0 else valores.astype(np.int64)
+
+
+def _arredondar(valores, escala):
+    """Número decimal (texto, float ou array) vezes `escala`, arredondado pela regra"""
+    # O round(…, 6) desfaz erros de representação (1.005 * 100 = 100.49999999999999)
+    return _inteiro(np.floor(np.round(np.asarray(valores, dtype=float) * escala, 6) + 0.5))
+
+
+def para_centavos(reais):
+    return _arredondar(reais, CENTAVOS_POR_REAL)
+
+
+def para_pontos_base(percentual):
+    return _arredondar(percentual, PONTOS_BASE_POR_PORCENTO)
+
+
+def em_reais(centavos):
+    """Float em reais, para gráficos e análises (não para contas que precisam ser exatas)"""
+    return np.asarray(centavos, dtype=float) / CENTAVOS_POR_REAL
+
+
+def em_percentual(pontos_base):
+    return np.asarray(pontos_base, dtype=float) / PONTOS_BASE_POR_PORCENTO
+
+
+def dividir(numerador, divisor):
+    """numerador / divisor em inteiros, arredondado pela regra (divisor positivo)"""
+    return (2 * numerador + divisor) // (2 * divisor)
+
+
+def _decimal(valor, casas_minimas):
+    sinal = "-" if valor < 0 else ""
+    inteiro, fracao = divmod(abs(valor), 100)
+    fracao = f"{fracao:02d}"
+    if casas_minimas == 1 and fracao.endswith("0"):
+        fracao = fracao[0]
+    return f"{sinal}{inteiro}.{fracao}"
+
+
+def formatar_reais(centavos):
+    """"R$ 1343.23" (sem passar por float)"""
+    return f"R$ {_decimal(int(centavos), 2)}"
+
+
+def formatar_percentual(pontos_base):
+    """"20.0%", "12.5%", "12.25%" """
+    return f"{_decimal(int(pontos_base), 1)}%"
+
+
+def formatar_coluna_reais(centavos):
+    """Lista de textos "R$ …" de uma coluna inteira, numa passada"""
+    return [f"R$ {_decimal(valor, 2)}" for valor in np.asarray(centavos, dtype=np.int64).tolist()]
+
+
+def formatar_coluna_percentual(pontos_base):
+    return [f"{_decimal(valor, 1)}%" for valor in np.asarray(pontos_base, dtype=np.int64).tolist()]
@@ -1,15 +1,29 @@
-import pandas as pd
+from instrumentacao import inicio as cronometro_inicio, medidor, memoria_dataframe, relatorio_memoria
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, EXTENDED, simpledialog
-import matplotlib.pyplot as plt
+cronometro_inicio.marcar("import tkinter")
 from datetime import datetime
 import os
-from fpdf import FPDF
+import math
 import glob
-from PIL import Image, ImageTk, ImageSequence
 import sys
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import shutil  # Importa o módulo shutil
+import multiprocessing
+# matplotlib (gráficos), fpdf (PDF) e PIL (logo sem cache) só são importados quando usados
+from persistencia import (dataframe_vazio, gravar_csv, ler_csv, gravar_orcamento, obter_diario,
+                          caminho_padrao, EXTENSAO_PADRAO, FORMATOS, FORMATO_DATA)
+from visao_tabela import TabelaVirtual, ListaArquivos
+from comparativo import CAMPOS as CAMPOS_OFERTAS, entradas_ofertas, formatar_oferta, gravar_csv_comparativo
+from dinheiro import formatar_reais, formatar_percentual
+from nucleo import Orcamento, ItemInvalido
+from graficos import (GRAFICOS, TAMANHO_FIGURA, GraficoBarras, agregar_por_fornecedor, desenhar_historico,
+                      salvar_graficos_png)
+from historico_precos import analisar as analisar_historico, serie_produto
+from tarefas import GerenciadorTarefas
+from banco import BancoOrcamentos
+from indice_arquivos import (CAMPOS as CAMPOS_INDICE, assinatura_arquivo, obter_indice, resumir_dados,
+                             resumir_orcamento, formatar_entrada)
+cronometro_inicio.marcar("import módulos do app")
 
 # Função para obter o caminho correto dos recursos
 def resource_path(relative_path):
@@ -20,76 +34,170 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+def carregar_logo(largura=200):
+    """Logo redimensionada; a versão reduzida fica em cache e é lida sem o PIL"""
+    origem = resource_path("logo.png")
+    stat = os.stat(origem)
+    pasta_cache = os.path.join(os.path.expanduser("~"), ".cache", "orcamento_app")
+    cache = os.path.join(pasta_cache, f"logo_{largura}_{stat.st_mtime_ns}_{stat.st_size}.png")
+    if not os.path.exists(cache):
+        from PIL import Image
+        imagem = Image.open(origem)
+        wpercent = (largura/float(imagem.size[0]))
+        hsize = int((float(imagem.size[1])*float(wpercent)))
+        imagem = imagem.resize((largura, hsize), Image.Resampling.LANCZOS)
+        os.makedirs(pasta_cache, exist_ok=True)
+        temporario = cache + ".tmp"
+        imagem.save(temporario, format="PNG")
+        os.replace(temporario, cache)
+    return tk.PhotoImage(file=cache)
+
 
 
 # Configurações iniciais
-df = pd.DataFrame(columns=["Data", "Fornecedor", "Produto", "Descrição", "Preço Unitário", "Quantidade", "IPI", "Desconto", "Total Final"])
+# O orçamento aberto: DataFrame (orcamento.dados) + índices de busca, ordenação,
+# autocompletar e melhores ofertas, mantidos pelo núcleo a cada alteração
+orcamento = Orcamento()
 cores_barras = ['#4CAF50', '#FF9800', '#2196F3', '#9C27B0', '#F44336', '#00BCD4']
-
+ATRASO_FILTRO_MS = 250  # pausa na digitação antes de filtrar
+filtro_agendado = None
+ATRASO_AUTOSALVAR_MS = 2000  # pausa nas edições antes de gravar o orçamento
+autosalvamento_agendado = None
+INTERVALO_DESEMPENHO_MS = 500  # atualização da barra de desempenho
+memoria_df = (None, 0)  # (id do DataFrame medido, bytes)
+# Gráficos de barras (índice em GRAFICOS -> GraficoBarras), reaproveitados entre aberturas da janela.
+# A janela é única (as figuras só podem estar num canvas por vez): abrir de novo a atualiza
+graficos_barras = {}
+janela_graficos = None
+
+# Alterações desde a última gravação completa (0 = nada a salvar)
+alteracoes_pendentes = 0
+TITULO = "App de Orçamento com Fornecedores"
+
+# orcamentos.parquet (ou orcamentos.csv, sem o pyarrow)
+ARQUIVO_PRINCIPAL = caminho_padrao("orcamentos.csv")
+
+def diarios_ativos():
+    """Diários que recebem as alterações: o arquivo principal e o backup aberto, se houver"""
+    diarios = [obter_diario(ARQUIVO_PRINCIPAL)]
+    # Se existe um arquivo de backup aberto, registra nele também
+    if hasattr(tela, 'arquivo_backup_atual'):
+        diarios.append(obter_diario(tela.arquivo_backup_atual))
+    return diarios
+
+def marcar_alterado():
+    """Conta uma alteração não salva e mostra o indicador na barra de título"""
+    global alteracoes_pendentes
+    alteracoes_pendentes += 1
+    if alteracoes_pendentes == 1:
+        tela.title(f"{TITULO} (não salvo)")
+
+def marcar_salvo():
+    """Tudo gravado: zera o contador e tira o indicador do título"""
+    global alteracoes_pendentes
+    alteracoes_pendentes = 0
+    tela.title(TITULO)
+
+def registrar_alteracao(registrar):
+    """Anexa a alteração ao diário de cada arquivo ativo, sem regravar o CSV inteiro"""
+    marcar_alterado()
+    try:
+        for diario in diarios_ativos():
+            registrar(diario)
+            diario.compactar_se_necessario(orcamento.dados)
+    except Exception as e:
+        messagebox.showerror("Erro", f"Erro ao salvar dados:\n{e}")
+    agendar_autosalvamento()
+
+def agendar_autosalvamento():
+    """Uma rajada de edições vira uma única gravação, depois de uma pausa"""
+    global autosalvamento_agendado
+    if autosalvamento_agendado is not None:
+        tela.after_cancel(autosalvamento_agendado)
+    autosalvamento_agendado = tela.after(ATRASO_AUTOSALVAR_MS, autosalvar)
+
+def cancelar_autosalvamento():
+    global autosalvamento_agendado
+    if autosalvamento_agendado is not None:
+        tela.after_cancel(autosalvamento_agendado)
+        autosalvamento_agendado = None
+
+@medidor.medido
+def autosalvar():
+    """Grava o orçamento (arquivo principal e backup aberto) numa thread, com troca atômica"""
+    global autosalvamento_agendado
+    autosalvamento_agendado = None
+    if not alteracoes_pendentes:
+        return
+    diarios = diarios_ativos()
+    # Uma gravação ainda em andamento: tenta de novo depois, sem travar a tela
+    if any(diario.compactando() for diario in diarios):
+        agendar_autosalvamento()
+        return
+    medidor.contar(len(orcamento.dados))
+    for diario in diarios:
+        diario.compactar(orcamento.dados, em_segundo_plano=True)
+    marcar_salvo()
+    tela.after(ATRASO_AUTOSALVAR_MS, lambda: verificar_autosalvamento(diarios))
+
+def verificar_autosalvamento(diarios):
+    """Confere o resultado da gravação em segundo plano (na thread do Tk)"""
+    if any(diario.compactando() for diario in diarios):
+        tela.after(ATRASO_AUTOSALVAR_MS, lambda: verificar_autosalvamento(diarios))
+        return
+    erros = [diario.ultimo_erro for diario in diarios if diario.ultimo_erro is not None]
+    if erros:
+        for diario in diarios:
+            diario.ultimo_erro = None
+        # O diário congelado continua em disco; a próxima gravação tenta de novo
+        marcar_alterado()
+        messagebox.showerror("Erro", f"Erro no salvamento automático:\n{erros[0]}")
+
+@medidor.medido
 def salvar_df():
+    # Gravação imediata (Ctrl+S): o salvamento automático pendente fica sem objeto
+    cancelar_autosalvamento()
     try:
-        # Salva o arquivo principal
-        df.to_csv("orcamentos.csv", index=False)
-        
-        # Se existe um arquivo de backup aberto, salva nele também
-        if hasattr(tela, 'arquivo_backup_atual'):
-            df.to_csv(tela.arquivo_backup_atual, index=False)
+        # Grava o orçamento completo (compacta o diário) no arquivo principal e no backup aberto
+        medidor.contar(len(orcamento.dados))
+        for diario in diarios_ativos():
+            diario.compactar(orcamento.dados)
+        marcar_salvo()
             
     except Exception as e:
         messagebox.showerror("Erro", f"Erro ao salvar dados:\n{e}")
 
 # Funções
 
+@medidor.medido
 def adicionar_item():
     try:
-        # Validação de campos vazios
-        if not all([entry_fornecedor.get(), entry_produto.get()]):
-            messagebox.showerror("Erro", "Fornecedor e Produto são campos obrigatórios!")
-            return
-            
-        # Validação de números negativos
-        if float(entry_preco.get()) < 0 or int(entry_quantidade.get()) < 0:
-            messagebox.showerror("Erro", "Preço e Quantidade não podem ser negativos!")
-            return
-
-        fornecedor = entry_fornecedor.get()
-        produto = entry_produto.get()
-        descricao = entry_descricao.get()
-        preco_unitario = float(entry_preco.get())
-        quantidade = int(entry_quantidade.get())
-        ipi = float(entry_ipi.get())
-        desconto = float(entry_desconto.get())
-        data = datetime.now().strftime("%Y-%m-%d")
-
-        preco_com_ipi = preco_unitario * (1 + ipi / 100)
-        preco_com_desconto = preco_com_ipi * (1 - desconto / 100)
-        total = preco_com_desconto * quantidade
-
-        novo_dado = {
-            "Data": data,
-            "Fornecedor": fornecedor,
-            "Produto": produto,
-            "Descrição": descricao,
-            "Preço Unitário": preco_unitario,
-            "Quantidade": quantidade,
-            "IPI": ipi,
-            "Desconto": desconto,
-            "Total Final": total
-        }
-
-        global df
-        df = pd.concat([df, pd.DataFrame([novo_dado])], ignore_index=True)
-        salvar_df()
+        # Validação (campos obrigatórios, números negativos), id estável, Total Final
+        # e índices ficam no núcleo
+        novo_dado = orcamento.adicionar(
+            fornecedor=entry_fornecedor.get(),
+            produto=entry_produto.get(),
+            descricao=entry_descricao.get(),
+            preco_unitario=entry_preco.get(),
+            quantidade=entry_quantidade.get(),
+            ipi=entry_ipi.get(),
+            desconto=entry_desconto.get()
+        )
+        registrar_alteracao(lambda diario: diario.registrar_adicao([novo_dado]))
         atualizar_tabela()
 
         for entry in [entry_fornecedor, entry_produto, entry_descricao, entry_preco, entry_quantidade, entry_ipi, entry_desconto]:
             entry.delete(0, tk.END)
 
-    except ValueError:
+    except ItemInvalido as e:
+        messagebox.showerror("Erro", str(e))
+    except (ValueError, OverflowError):
         messagebox.showerror("Erro", "Insira valores válidos")
 
+@medidor.medido
 def remover_selecionado():
-    itens_selecionados = tabela.selection()
+    # Seleção lógica: inclui linhas que não estão materializadas na tabela virtual
+    itens_selecionados = tabela_virtual.ids_selecionados()
     if not itens_selecionados:
         messagebox.showinfo("Info", "Selecione um ou mais itens para remover.")
         return
@@ -98,9 +206,9 @@ def remover_selecionado():
     mensagem = f"Você selecionou {qtd_selecionados} item(ns) para remover.\n\nPrimeiros itens selecionados:"
     
     # Mostra até 3 itens como exemplo
-    for i, item in enumerate(itens_selecionados[:3]):
-        valores = tabela.item(item)['values']
-        mensagem += f"\n- {valores[0]} | {valores[1]} | R$ {valores[7]}"
+    exibidos = tabela_virtual.dados.loc[itens_selecionados]
+    for _, row in exibidos.head(3).iterrows():
+        mensagem += f"\n- {row['Fornecedor']} | {row['Produto']} | {formatar_reais(row['Total Final'])}"
     
     if qtd_selecionados > 3:
         mensagem += f"\n\nE mais {qtd_selecionados - 3} outro(s) item(ns)..."
@@ -108,36 +216,23 @@ def remover_selecionado():
     mensagem += "\n\nDeseja realmente remover estes itens?"
 
     if messagebox.askyesno("Confirmação de Remoção", mensagem):
-        global df
-        for item in itens_selecionados:
-            valores = tabela.item(item)['values']
-            idx = df[(df['Fornecedor'] == valores[0]) & 
-                    (df['Produto'] == valores[1]) & 
-                    (df['Descrição'] == valores[2])].index
-            if not idx.empty:
-                df = df.drop(idx[0])
-        
-        salvar_df()
+        # Remove exatamente as linhas selecionadas, pelos ids, num único drop
+        orcamento.remover(itens_selecionados)
+        registrar_alteracao(lambda diario: diario.registrar_remocao(itens_selecionados))
         atualizar_tabela()
         messagebox.showinfo("Sucesso", f"{qtd_selecionados} item(ns) removido(s) com sucesso!")
 
 
 
 
-def atualizar_tabela(dataframe=None):
-    tabela.delete(*tabela.get_children())  # Forma mais eficiente
-    dados = dataframe if dataframe is not None else df
-    for _, row in dados.iterrows():
-        tabela.insert("", "end", values=[
-            row["Fornecedor"],
-            row["Produto"],
-            row["Descrição"],
-            f"R$ {float(row['Preço Unitário']):.2f}",
-            int(row["Quantidade"]),
-            f"{float(row['IPI']):.1f}%",
-            f"{float(row['Desconto']):.1f}%",
-            f"R$ {float(row['Total Final']):.2f}"
-        ])
+@medidor.medido
+def atualizar_tabela(dataframe=None, completo=False, alterados=None, ordem=None):
+    dados = dataframe if dataframe is not None else orcamento.dados
+    # Só as linhas visíveis são materializadas, atualizadas pelo diff dos ids;
+    # completo=True recarrega a janela inteira, alterados lista ids com valores novos
+    # e ordem são as posições de dados na ordem de exibição
+    medidor.contar(len(dados))
+    tabela_virtual.exibir(dados, completo=completo, alterados=alterados, ordem=ordem)
 
 def validar_numero(P):
     # Permite apenas números positivos e ponto ou vírgula para decimais
@@ -145,19 +240,45 @@ def validar_numero(P):
         return True
     try:
         # Troca vírgula por ponto para aceitar ambos
-        float(P.replace(",", "."))
-        return float(P.replace(",", ".")) >= 0
+        valor = float(P.replace(",", "."))
+        # "inf", "nan" e "1e400" (infinito) não são valores
+        return math.isfinite(valor) and valor >= 0
     except ValueError:
         return False
 
+@medidor.medido
 def gerar_grafico():
-    plt.close('all')  # Fecha gráficos anteriores
-    if df.empty:
+    if orcamento.dados.empty:
         messagebox.showinfo("Info", "Nenhum dado para exibir no gráfico")
         return
+    medidor.contar(len(orcamento.dados))
+
+    # Uma única agregação por fornecedor alimenta as quatro abas; ela roda em
+    # segundo plano e a janela abre quando termina
+    gerenciador.submeter(
+        "Gráficos: agregação",
+        lambda dados, progresso: agregar_por_fornecedor(dados),
+        orcamento.dados,
+        ao_concluir=abrir_janela_graficos,
+        ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao gerar gráficos:\n{e}")
+    )
+
+def abrir_janela_graficos(agregado):
+    global janela_graficos
+    if janela_graficos is not None and janela_graficos.winfo_exists():
+        # Já aberta: redesenha as barras com a agregação nova e traz a janela para a frente
+        janela_graficos.atualizar(agregado)
+        janela_graficos.deiconify()
+        janela_graficos.lift()
+        janela_graficos.focus_force()
+        return
+
+    # matplotlib só é carregado na primeira vez que os gráficos são abertos
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
     # Criar janela para os gráficos
-    janela_grafico = tk.Toplevel(tela)
+    janela_grafico = janela_graficos = tk.Toplevel(tela)
     janela_grafico.title("Análise Gráfica dos Orçamentos")
     janela_grafico.geometry("800x600")
     janela_grafico.transient(tela)
@@ -167,92 +288,134 @@ def gerar_grafico():
     notebook = ttk.Notebook(janela_grafico)
     notebook.pack(fill='both', expand=True, padx=10, pady=5)
 
-    # Função auxiliar para criar gráficos
-    def criar_aba_grafico(titulo):
+    # As abas começam vazias; cada figura só é criada (ou atualizada) quando for necessária
+    frames = []
+    figuras = {}  # só a do histórico; as de barras ficam em graficos_barras
+    canvas_abas = {}
+    for grafico in GRAFICOS:
         frame = ttk.Frame(notebook)
-        notebook.add(frame, text=titulo)
-        return frame
+        notebook.add(frame, text=grafico["aba"])
+        frames.append(frame)
+
+    # Última aba: histórico de preços entre os orçamentos arquivados
+    frame_historico = ttk.Frame(notebook)
+    notebook.add(frame_historico, text="Histórico de Preços")
+
+    def obter_figura(i):
+        # A Figure da abertura anterior é reaproveitada: só as barras e os rótulos mudam
+        if i not in graficos_barras:
+            graficos_barras[i] = GraficoBarras(Figure(figsize=TAMANHO_FIGURA), GRAFICOS[i])
+        graficos_barras[i].atualizar(agregado)
+        return graficos_barras[i].fig
+
+    def mostrar_aba(event=None):
+        i = notebook.index(notebook.select())
+        if i in canvas_abas:
+            return
+        if i == len(GRAFICOS):
+            carregar_historico()
+            return
+        canvas = FigureCanvasTkAgg(obter_figura(i), frames[i])
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill='both', expand=True)
+        canvas_abas[i] = canvas
+
+    def carregar_historico():
+        # Lê os backups em segundo plano (num pool de processos) só na primeira vez
+        canvas_abas[len(GRAFICOS)] = None
+        label_historico = ttk.Label(frame_historico, text="Lendo os orçamentos arquivados...")
+        label_historico.pack(pady=20)
+
+        def pronto(resultado):
+            if janela_grafico.winfo_exists():
+                label_historico.destroy()
+                montar_historico(*resultado)
+
+        def falhou(erro):
+            if janela_grafico.winfo_exists():
+                label_historico.config(text=f"Erro ao analisar o histórico:\n{erro}")
+
+        desktop = os.path.join(os.path.expanduser("~"), "Desktop")
+        pasta_backup = os.path.join(desktop, "Orçamentos_NM_Napoleão", "Orçamentos_Antigos")
+        if not os.path.exists(pasta_backup):
+            label_historico.config(text="Nenhum orçamento antigo encontrado.")
+            return
+        gerenciador.submeter("Histórico de preços", analisar_historico, pasta_backup,
+                             ao_concluir=pronto, ao_falhar=falhou)
 
-    # Aba 1: Valor Total por Fornecedor
-    frame_valor = criar_aba_grafico("Valor Total")
-    fig_valor = plt.Figure(figsize=(8, 5))
-    ax_valor = fig_valor.add_subplot(111)
-    
-    valor_total = df.groupby("Fornecedor")["Total Final"].sum().sort_values(ascending=True)
-    bars_valor = ax_valor.barh(valor_total.index, valor_total.values, color='#2196F3')
-    
-    ax_valor.set_title("Valor Total por Fornecedor")
-    ax_valor.set_xlabel("Valor Total (R$)")
-    
-    # Adicionar valores nas barras
-    for bar in bars_valor:
-        width = bar.get_width()
-        ax_valor.text(width, bar.get_y() + bar.get_height()/2, 
-                     f'R$ {width:,.2f}', ha='left', va='center', fontsize=8)
-    
-    canvas_valor = FigureCanvasTkAgg(fig_valor, frame_valor)
-    canvas_valor.draw()
-    canvas_valor.get_tk_widget().pack(fill='both', expand=True)
-
-    # Aba 2: IPI Médio por Fornecedor
-    frame_ipi = criar_aba_grafico("IPI Médio")
-    fig_ipi = plt.Figure(figsize=(8, 5))
-    ax_ipi = fig_ipi.add_subplot(111)
-    
-    ipi_medio = df.groupby("Fornecedor")["IPI"].mean().sort_values(ascending=True)
-    bars_ipi = ax_ipi.barh(ipi_medio.index, ipi_medio.values, color='#FF9800')
-    
-    ax_ipi.set_title("IPI Médio por Fornecedor")
-    ax_ipi.set_xlabel("IPI (%)")
-    
-    for bar in bars_ipi:
-        width = bar.get_width()
-        ax_ipi.text(width, bar.get_y() + bar.get_height()/2, 
-                   f'{width:.1f}%', ha='left', va='center', fontsize=8)
-    
-    canvas_ipi = FigureCanvasTkAgg(fig_ipi, frame_ipi)
-    canvas_ipi.draw()
-    canvas_ipi.get_tk_widget().pack(fill='both', expand=True)
-
-    # Aba 3: Desconto Médio por Fornecedor
-    frame_desconto = criar_aba_grafico("Desconto Médio")
-    fig_desconto = plt.Figure(figsize=(8, 5))
-    ax_desconto = fig_desconto.add_subplot(111)
-    
-    desconto_medio = df.groupby("Fornecedor")["Desconto"].mean().sort_values(ascending=True)
-    bars_desconto = ax_desconto.barh(desconto_medio.index, desconto_medio.values, color='#4CAF50')
-    
-    ax_desconto.set_title("Desconto Médio por Fornecedor")
-    ax_desconto.set_xlabel("Desconto (%)")
-    
-    for bar in bars_desconto:
-        width = bar.get_width()
-        ax_desconto.text(width, bar.get_y() + bar.get_height()/2, 
-                        f'{width:.1f}%', ha='left', va='center', fontsize=8)
-    
-    canvas_desconto = FigureCanvasTkAgg(fig_desconto, frame_desconto)
-    canvas_desconto.draw()
-    canvas_desconto.get_tk_widget().pack(fill='both', expand=True)
-
-    # Aba 4: Quantidade Total por Fornecedor
-    frame_qtd = criar_aba_grafico("Quantidade Total")
-    fig_qtd = plt.Figure(figsize=(8, 5))
-    ax_qtd = fig_qtd.add_subplot(111)
-    
-    qtd_total = df.groupby("Fornecedor")["Quantidade"].sum().sort_values(ascending=True)
-    bars_qtd = ax_qtd.barh(qtd_total.index, qtd_total.values, color='#9C27B0')
-    
-    ax_qtd.set_title("Quantidade Total por Fornecedor")
-    ax_qtd.set_xlabel("Quantidade")
-    
-    for bar in bars_qtd:
-        width = bar.get_width()
-        ax_qtd.text(width, bar.get_y() + bar.get_height()/2, 
-                   f'{int(width)}', ha='left', va='center', fontsize=8)
-    
-    canvas_qtd = FigureCanvasTkAgg(fig_qtd, frame_qtd)
-    canvas_qtd.draw()
-    canvas_qtd.get_tk_widget().pack(fill='both', expand=True)
+    def montar_historico(cotacoes, resumo):
+        if resumo.empty:
+            ttk.Label(frame_historico, text="Nenhum orçamento antigo encontrado.").pack(pady=20)
+            return
+
+        frame_topo = ttk.Frame(frame_historico)
+        frame_topo.pack(fill="x", pady=5)
+        ttk.Label(frame_topo, text="Produto:").pack(side="left", padx=5)
+        produtos = sorted(resumo["Produto"].astype(str).unique())
+        combo_produto = ttk.Combobox(frame_topo, values=produtos, state="readonly", width=40)
+        combo_produto.pack(side="left", padx=5)
+
+        fig = Figure(figsize=TAMANHO_FIGURA)
+        figuras[len(GRAFICOS)] = fig
+        canvas = FigureCanvasTkAgg(fig, frame_historico)
+        canvas.get_tk_widget().pack(fill='both', expand=True)
+        canvas_abas[len(GRAFICOS)] = canvas
+
+        def desenhar(event=None):
+            produto = combo_produto.get()
+            fig.clear()
+            desenhar_historico(fig, serie_produto(cotacoes, produto), produto)
+            canvas.draw()
+
+        def exportar_historico():
+            arquivo = filedialog.asksaveasfilename(
+                defaultextension=".csv",
+                filetypes=[("CSV files", "*.csv")],
+                initialfile=f"historico_precos_{datetime.now().strftime('%Y%m%d')}.csv",
+                title="Exportar histórico de preços"
+            )
+            if arquivo:
+                try:
+                    resumo.to_csv(arquivo, index=False)
+                    messagebox.showinfo("Sucesso", f"Histórico exportado para:\n{arquivo}")
+                except Exception as e:
+                    messagebox.showerror("Erro", f"Erro ao exportar o histórico:\n{e}")
+
+        tk.Button(frame_topo, text="Exportar CSV", command=exportar_historico,
+                  bg="#2196F3", fg="white", font=("Arial", 10, "bold")).pack(side="right", padx=5)
+
+        combo_produto.bind("<<ComboboxSelected>>", desenhar)
+        combo_produto.set(produtos[0])
+        desenhar()
+
+    notebook.bind("<<NotebookTabChanged>>", mostrar_aba)
+    janela_grafico.after_idle(mostrar_aba)  # Primeira aba, já selecionada
+
+    def atualizar(novo):
+        nonlocal agregado
+        agregado = novo
+        # Só as abas já desenhadas; as outras usam o agregado novo quando forem abertas
+        for i, canvas in canvas_abas.items():
+            if i < len(GRAFICOS):
+                graficos_barras[i].atualizar(agregado)
+                canvas.draw_idle()
+
+    janela_grafico.atualizar = atualizar
+
+    def fechar():
+        global janela_graficos
+        # Libera os canvas e a figura do histórico junto com a janela (as de barras ficam para a próxima)
+        for canvas in canvas_abas.values():
+            if canvas is not None:
+                canvas.get_tk_widget().destroy()
+        for fig in figuras.values():
+            fig.clear()
+        canvas_abas.clear()
+        figuras.clear()
+        janela_grafico.destroy()
+        janela_graficos = None
+
+    janela_grafico.protocol("WM_DELETE_WINDOW", fechar)
 
     # Botão para exportar todos os gráficos
     def exportar_graficos():
@@ -264,13 +427,15 @@ def gerar_grafico():
 
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
-            # Salvar cada gráfico
-            fig_valor.savefig(os.path.join(pasta_graficos, f'valor_total_{timestamp}.png'))
-            fig_ipi.savefig(os.path.join(pasta_graficos, f'ipi_medio_{timestamp}.png'))
-            fig_desconto.savefig(os.path.join(pasta_graficos, f'desconto_medio_{timestamp}.png'))
-            fig_qtd.savefig(os.path.join(pasta_graficos, f'quantidade_total_{timestamp}.png'))
-            
-            messagebox.showinfo("Sucesso", f"Gráficos exportados com sucesso para:\n{pasta_graficos}")
+            # Os PNGs são desenhados e gravados em segundo plano, com figuras próprias
+            gerenciador.submeter(
+                "Exportar gráficos",
+                salvar_graficos_png,
+                agregado, pasta_graficos, timestamp,
+                ao_concluir=lambda arquivos: messagebox.showinfo(
+                    "Sucesso", f"Gráficos exportados com sucesso para:\n{pasta_graficos}"),
+                ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao exportar gráficos:\n{e}")
+            )
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao exportar gráficos:\n{e}")
 
@@ -284,37 +449,15 @@ def gerar_grafico():
     )
     btn_exportar.pack(pady=5)
 
+@medidor.medido
 def gerar_pdf():
-    dados = tabela.get_children()
-    if not dados:
+    # Usa todas as linhas exibidas (filtradas, na ordem da tabela), direto do DataFrame
+    dados = tabela_virtual.dados_exibidos()
+    medidor.contar(len(dados))
+    if dados.empty:
         messagebox.showinfo("Info", "Nenhum dado disponível para exportar")
         return
 
-    # Organiza os dados por produto e fornecedor
-    produtos_dados = {}
-    fornecedores_set = set()
-    
-    for item in dados:
-        valores = tabela.item(item)['values']
-        fornecedor = valores[0]
-        produto = valores[1]
-        
-        if produto not in produtos_dados:
-            produtos_dados[produto] = {}
-        
-        if fornecedor not in produtos_dados[produto]:
-            produtos_dados[produto][fornecedor] = []
-        
-        produtos_dados[produto][fornecedor].append({
-            'Preço': valores[3],
-            'Qtd': valores[4],
-            'IPI': valores[5],
-            'Desc': valores[6],
-            'Total': valores[7]
-        })
-        
-        fornecedores_set.add(fornecedor)
-
     # Configuração do PDF
     desktop = os.path.join(os.path.expanduser("~"), "Desktop")
     pasta_pdf = os.path.join(desktop, "Orçamentos_NM_Napoleão")
@@ -333,118 +476,97 @@ def gerar_pdf():
     if not arquivo:
         return
 
-    # Criar PDF
-    pdf = FPDF(orientation='L', unit='mm', format='A4')
-    pdf.add_page()
-    
-    # Título
-    pdf.set_font("Arial", "B", size=12)
-    pdf.cell(0, 10, txt=f"Comparativo de Orçamentos - {data_hoje}", ln=True, align='C')
-    pdf.ln(5)
+    from relatorio_pdf import gerar_pdf_comparativo  # fpdf só é carregado aqui
 
-    # Lista de fornecedores ordenada
-    fornecedores = sorted(list(fornecedores_set))
-    
-    # Definir larguras
-    margem = 10
-    largura_disponivel = pdf.w - (2 * margem)
-    num_fornecedores = len(fornecedores)
-    largura_coluna = largura_disponivel / num_fornecedores
-
-    # Para cada produto
-    for produto in produtos_dados:
-        # Adiciona nova página se necessário
-        if pdf.get_y() > pdf.h - 60:
-            pdf.add_page()
-            pdf.set_font("Arial", "B", size=12)
-            pdf.cell(0, 10, txt=f"Comparativo de Orçamentos - {data_hoje}", ln=True, align='C')
-            pdf.ln(5)
-
-        # Nome do produto
-        pdf.set_font("Arial", "B", size=10)
-        pdf.cell(0, 7, f"Produto: {produto}", ln=True, align='L')
-        pdf.ln(2)
-        
-        # Cabeçalho dos fornecedores
-        y_start = pdf.get_y()
-        x_start = margem
-        
-        # Desenha células do cabeçalho
-        for fornecedor in fornecedores:
-            pdf.set_xy(x_start, y_start)
-            pdf.cell(largura_coluna, 7, fornecedor, border=1, align='C')
-            x_start += largura_coluna
-        
-        pdf.ln(7)  # Espaço após cabeçalho
-        
-        # Reset posições para conteúdo
-        y_content = pdf.get_y()
-        altura_maxima_secao = 0
-        
-        # Primeira passagem para calcular altura máxima
-        for fornecedor in fornecedores:
-            if fornecedor in produtos_dados[produto]:
-                itens = produtos_dados[produto][fornecedor]
-                altura_total = 0
-                for item in itens:
-                    altura_total += 20  # Altura estimada por item
-                altura_maxima_secao = max(altura_maxima_secao, altura_total)
-        
-        # Segunda passagem para desenhar conteúdo
-        x_start = margem
-        for fornecedor in fornecedores:
-            pdf.set_xy(x_start, y_content)
-            pdf.set_font("Arial", size=8)
-            
-            if fornecedor in produtos_dados[produto]:
-                y_item = y_content
-                for item in produtos_dados[produto][fornecedor]:
-                    pdf.set_xy(x_start, y_item)
-                    texto = (f"Preço: {item['Preço']}\n"
-                            f"Qtd: {item['Qtd']}\n"
-                            f"IPI: {item['IPI']}\n"
-                            f"Desc: {item['Desc']}\n"
-                            f"Total: {item['Total']}")
-                    pdf.multi_cell(largura_coluna, 4, texto, border=1)
-                    y_item = pdf.get_y() + 2
-            else:
-                pdf.cell(largura_coluna, altura_maxima_secao, "N/A", border=1, align='C')
-            
-            x_start += largura_coluna
-        
-        # Move para o próximo produto
-        pdf.set_y(y_content + altura_maxima_secao + 10)
+    # Sem filtro e com o cache quente, as melhores ofertas vêm do cache; senão são
+    # calculadas na tarefa, fora da thread da tela
+    comparativo = orcamento.comparativo_em_cache() if len(dados) == len(orcamento.dados) else None
+
+    # Monta o PDF em segundo plano; o progresso aparece em Opções > Tarefas em Segundo Plano
+    gerenciador.submeter(
+        f"PDF: {os.path.basename(arquivo)}",
+        gerar_pdf_comparativo,
+        dados, arquivo, data_hoje,
+        comparativo=comparativo,
+        ao_concluir=lambda arquivo: pdf_gerado(arquivo, pasta_pdf, dados),
+        ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao gerar PDF:\n{e}")
+    )
 
-    pdf.output(arquivo)
+def pdf_gerado(arquivo, pasta_pdf, dados):
+    # O resumo do PDF vem dos dados usados (o índice não lê o conteúdo de PDFs)
+    if os.path.samefile(os.path.dirname(arquivo), pasta_pdf):
+        obter_indice(pasta_pdf, [".pdf"]).registrar(arquivo, resumir_dados(dados))
     messagebox.showinfo("Sucesso", f"PDF comparativo gerado com sucesso como '{os.path.basename(arquivo)}'")
 
+def mostrar_tarefas():
+    """Lista as tarefas em segundo plano, com progresso e cancelamento"""
+    janela = tk.Toplevel(tela)
+    janela.title("Tarefas em Segundo Plano")
+    janela.geometry("650x300")
+    janela.transient(tela)
+    janela.focus_force()
+
+    colunas_tarefas = ["Tarefa", "Estado", "Progresso", "Detalhe"]
+    lista = ttk.Treeview(janela, columns=colunas_tarefas, show="headings", selectmode="extended")
+    for col, largura in zip(colunas_tarefas, [250, 90, 80, 200]):
+        lista.heading(col, text=col)
+        lista.column(col, width=largura, anchor="center")
+    lista.pack(padx=10, pady=10, fill="both", expand=True)
+
+    def atualizar(gerenciador):
+        existentes = set(lista.get_children())
+        for tarefa in gerenciador.tarefas:
+            valores = [tarefa.nome, tarefa.estado, f"{tarefa.progresso:.0%}", tarefa.mensagem]
+            iid = str(tarefa.id)
+            if iid in existentes:
+                lista.item(iid, values=valores)
+                existentes.discard(iid)
+            else:
+                lista.insert("", "end", iid=iid, values=valores)
+        if existentes:
+            lista.delete(*existentes)
+
+    def cancelar():
+        for iid in lista.selection():
+            for tarefa in gerenciador.tarefas:
+                if str(tarefa.id) == iid:
+                    tarefa.cancelar()
+
+    def fechar():
+        gerenciador.ouvintes.remove(atualizar)
+        janela.destroy()
+
+    gerenciador.ouvintes.append(atualizar)
+    janela.protocol("WM_DELETE_WINDOW", fechar)
+    atualizar(gerenciador)
+
+    btns_frame = tk.Frame(janela)
+    btns_frame.pack(pady=5)
+
+    tk.Button(btns_frame, text="Cancelar Selecionada", command=cancelar,
+              bg="#F44336", fg="white", font=("Arial", 10, "bold"), width=20).pack(side="left", padx=5)
+    tk.Button(btns_frame, text="Limpar Finalizadas", command=gerenciador.limpar_finalizadas,
+              bg="#607D8B", fg="white", font=("Arial", 10, "bold"), width=20).pack(side="left", padx=5)
+
+@medidor.medido
 def aplicar_filtros():
-    filtrado = df.copy()
-    fornecedor = filtro_fornecedor.get()
-    produto = filtro_produto.get()
-    descricao = filtro_descricao.get()
-
-    if fornecedor:
-        filtrado = filtrado[filtrado['Fornecedor'].str.contains(fornecedor, case=False, na=False)]
-    if produto:
-        filtrado = filtrado[filtrado['Produto'].str.contains(produto, case=False, na=False)]
-    if descricao:
-        filtrado = filtrado[filtrado['Descrição'].str.contains(descricao, case=False, na=False)]
-
-    if var_ordem.get() == 'A-Z':
-        filtrado = filtrado.sort_values(by='Fornecedor')
-    elif var_ordem.get() == 'Maior Desconto':
-        filtrado = filtrado.sort_values(by='Desconto', ascending=False)
-    elif var_ordem.get() == 'Menor IPI':
-        filtrado = filtrado.sort_values(by='IPI')
-    elif var_ordem.get() == 'Maior IPI':
-        filtrado = filtrado.sort_values(by='IPI', ascending=False)
-    elif var_ordem.get() == 'Menor Preço':
-        filtrado = filtrado.sort_values(by='Total Final')
-    elif var_ordem.get() == 'Maior Valor':
-        filtrado = filtrado.sort_values(by='Total Final', ascending=False)
-
-    atualizar_tabela(filtrado)
+    global filtro_agendado
+    filtro_agendado = None
+
+    # Busca por substring (sem diferenciar maiúsculas) pelo índice de trigramas e
+    # ordem pré-calculada (A-Z, Maior Desconto, ...): só as posições, sem ordenar
+    filtrado, ordem = orcamento.consultar(filtro_fornecedor.get(), filtro_produto.get(), filtro_descricao.get(),
+                                          var_ordem.get())
+    medidor.contar(len(filtrado))
+
+    atualizar_tabela(filtrado, ordem=ordem)
+
+def agendar_filtros(event=None):
+    """Filtra enquanto o usuário digita, só depois de uma pausa na digitação"""
+    global filtro_agendado
+    if filtro_agendado is not None:
+        tela.after_cancel(filtro_agendado)
+    filtro_agendado = tela.after(ATRASO_FILTRO_MS, aplicar_filtros)
 
 def limpar_filtros():
     filtro_fornecedor.delete(0, tk.END)
@@ -454,94 +576,242 @@ def limpar_filtros():
     atualizar_tabela()
 
 def confirmar_saida():
-    global df
+    cancelar_autosalvamento()
     try:
-        # Se o DataFrame estiver vazio, fecha direto
-        if df.empty:
-            tela.destroy()
-            return
-            
-        # Verifica se existem alterações para salvar
-        if os.path.exists("orcamentos.csv"):
-            df_original = pd.read_csv("orcamentos.csv")
-            
-            # Se houver diferenças, salva automaticamente no arquivo atual
-            if not df.equals(df_original):
-                # Salva no arquivo principal
-                df.to_csv("orcamentos.csv", index=False)
-                
-                # Se existe um arquivo de backup aberto, salva nele também
-                if hasattr(tela, 'arquivo_backup_atual'):
-                    df.to_csv(tela.arquivo_backup_atual, index=False)
-            
-            tela.destroy()
-        else:
-            # Se não existe arquivo original mas há dados
-            if not df.empty:
-                # Salva apenas no arquivo principal
-                df.to_csv("orcamentos.csv", index=False)
-            
-            tela.destroy()
+        # Sem alterações nesta sessão, sair não grava nada: só espera uma compactação
+        # em segundo plano já iniciada (e refaz uma que tenha falhado). Um diário que
+        # sobrou de outra sessão fica em disco, para ser lido na próxima abertura; o
+        # DataFrame em memória não é dele e não pode substituí-lo
+        for diario in diarios_ativos():
+            diario.aguardar()
+            if alteracoes_pendentes or diario.ultimo_erro is not None:
+                diario.compactar(orcamento.dados)
+        
+        gerenciador.encerrar()
+        # Rastro da sessão para análise posterior (ex.: ORCAMENTO_RASTRO=rastro.json)
+        if os.environ.get("ORCAMENTO_RASTRO"):
+            medidor.exportar_rastro(os.environ["ORCAMENTO_RASTRO"], cronometro_inicio)
+        tela.destroy()
                 
     except Exception as e:
         messagebox.showerror("Erro", f"Erro ao salvar alterações:\n{e}")
         tela.destroy()
 
-def mostrar_orcamentos():
-    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
-    pasta_pdf = os.path.join(desktop, "Orçamentos_NM_Napoleão")
-    
-    if not os.path.exists(pasta_pdf):
-        os.makedirs(pasta_pdf)
-        messagebox.showinfo("Orçamentos Salvos", "Nenhum orçamento PDF encontrado na pasta.")
+def alternar_desempenho(event=None):
+    """Mostra/esconde a barra de desempenho (última operação e memória do orçamento)"""
+    if event is not None:
+        var_desempenho.set(not var_desempenho.get())
+    if var_desempenho.get():
+        # Empacotada antes dos outros widgets, fica no rodapé da janela
+        barra_desempenho.pack(side="bottom", fill="x", before=tela.pack_slaves()[0])
+        atualizar_desempenho()
+    else:
+        barra_desempenho.pack_forget()
+
+def atualizar_desempenho():
+    global memoria_df
+    if not var_desempenho.get():
+        return
+    # O DataFrame é sempre substituído, nunca alterado: só mede de novo quando ele muda
+    if memoria_df[0] != id(orcamento.dados):
+        memoria_df = (id(orcamento.dados), memoria_dataframe(orcamento.dados))
+    partes = []
+    ultima = medidor.ultima
+    if ultima is not None:
+        texto = f"{ultima['nome']}: {ultima['duracao'] * 1000:.1f} ms"
+        if ultima["linhas"] is not None:
+            texto += f" ({ultima['linhas']} linhas)"
+        partes.append(texto)
+    partes.append(f"orçamento: {len(orcamento.dados)} linhas, {memoria_df[1] / 2**20:.1f} MB")
+    partes.append(f"{len(medidor.medicoes)} medições")
+    barra_desempenho.config(text="  |  ".join(partes))
+    tela.after(INTERVALO_DESEMPENHO_MS, atualizar_desempenho)
+
+def exportar_rastro():
+    """Grava as medições da sessão no formato de rastro do Chrome (chrome://tracing, Perfetto)"""
+    arquivo = filedialog.asksaveasfilename(
+        defaultextension=".json",
+        filetypes=[("Rastro JSON", "*.json")],
+        title="Exportar rastro de desempenho",
+        initialfile=f"rastro_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    if not arquivo:
         return
+    try:
+        medidor.exportar_rastro(arquivo, cronometro_inicio)
+        messagebox.showinfo("Sucesso", f"Rastro exportado para:\n{arquivo}")
+    except Exception as e:
+        messagebox.showerror("Erro", f"Erro ao exportar rastro:\n{e}")
 
-    arquivos_pdf = glob.glob(os.path.join(pasta_pdf, "*.pdf"))
-    if not arquivos_pdf:
-        messagebox.showinfo("Orçamentos Salvos", "Nenhum orçamento PDF encontrado na pasta.")
+def mostrar_memoria():
+    """Memória ocupada pelo orçamento, coluna a coluna, com o tipo de cada uma"""
+    janela = tk.Toplevel(tela)
+    janela.title("Relatório de Memória")
+    janela.geometry("520x330")
+    janela.transient(tela)
+    janela.focus_force()
+
+    colunas_memoria = ["Coluna", "Tipo", "MB", "Bytes/linha"]
+    lista = ttk.Treeview(janela, columns=colunas_memoria, show="headings")
+    for col, largura in zip(colunas_memoria, [150, 130, 90, 100]):
+        lista.heading(col, text=col)
+        lista.column(col, width=largura, anchor="center")
+    lista.pack(fill="both", expand=True, padx=10, pady=10)
+
+    for nome, tipo, tamanho in relatorio_memoria(orcamento.dados):
+        por_linha = tamanho / len(orcamento.dados) if len(orcamento.dados) else 0
+        lista.insert("", "end", values=(nome, tipo, f"{tamanho / 2**20:.2f}", f"{por_linha:.1f}"))
+    tk.Label(janela, text=f"{len(orcamento.dados)} linhas").pack(pady=(0, 10))
+
+@medidor.medido
+def obter_comparativo():
+    """Melhores ofertas do orçamento inteiro (em cache até a próxima alteração)"""
+    medidor.contar(len(orcamento.dados))
+    return orcamento.comparativo()
+
+def mostrar_melhor_oferta():
+    """Melhor fornecedor de cada produto, com a economia sobre a segunda melhor cotação"""
+    if orcamento.dados.empty:
+        messagebox.showinfo("Info", "Nenhum dado disponível para comparar")
         return
+    comparativo = obter_comparativo()
+    ofertas = comparativo.ofertas
 
-    # Cria uma nova janela para mostrar a lista
     janela = tk.Toplevel(tela)
-    janela.title("Orçamentos Salvos")
-    janela.geometry("550x350")
+    janela.title("Melhor Oferta")
+    janela.geometry("1150x500")
+    janela.transient(tela)
+    janela.focus_force()
+
+    tk.Label(janela, text=(
+        f"{len(ofertas)} produto(s), {len(comparativo.fornecedores)} fornecedor(es)  |  "
+        f"Economia total escolhendo a melhor oferta: {formatar_reais(comparativo.economia_total())}"
+    ), font=("Arial", 11, "bold")).pack(pady=10)
+
+    frame_busca = tk.Frame(janela)
+    frame_busca.pack(padx=10, fill="x")
+    tk.Label(frame_busca, text="Buscar:").pack(side="left")
+    entry_busca = tk.Entry(frame_busca, width=40)
+    entry_busca.pack(side="left", padx=5)
+
+    frame_lista = tk.Frame(janela)
+    frame_lista.pack(padx=10, pady=10, fill="both", expand=True)
+    tabela_ofertas = ttk.Treeview(frame_lista, columns=list(CAMPOS_OFERTAS), show="headings", selectmode="browse")
+    for chave in CAMPOS_OFERTAS:
+        largura = 200 if chave in ("produto", "fornecedor", "segundo") else 90
+        tabela_ofertas.column(chave, width=largura, anchor="center")
+    tabela_ofertas.pack(side="left", fill="both", expand=True)
+    scrollbar = ttk.Scrollbar(frame_lista, orient="vertical", command=tabela_ofertas.yview)
+    scrollbar.pack(side="right", fill="y")
+
+    # Maior economia primeiro; clique no cabeçalho reordena
+    lista = ListaArquivos(tabela_ofertas, scrollbar, CAMPOS_OFERTAS, formatar_oferta)
+    lista.exibir(entradas_ofertas(ofertas))
+    entry_busca.bind("<KeyRelease>", lambda e: lista.buscar(entry_busca.get()))
+
+    def exportar_csv_ofertas():
+        arquivo = filedialog.asksaveasfilename(
+            parent=janela,
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")],
+            initialfile=f"melhor_oferta_{datetime.now().strftime('%Y%m%d')}.csv",
+            title="Exportar melhores ofertas como CSV"
+        )
+        if not arquivo:
+            return
+        try:
+            gravar_csv_comparativo(comparativo, arquivo)
+            messagebox.showinfo("Sucesso", f"Melhores ofertas exportadas para:\n{arquivo}", parent=janela)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao exportar o arquivo:\n{e}", parent=janela)
+
+    btns_frame = tk.Frame(janela)
+    btns_frame.pack(pady=5)
+    tk.Button(btns_frame, text="Exportar CSV", command=exportar_csv_ofertas,
+              bg="#4CAF50", fg="white", font=("Arial", 10, "bold"), width=15).pack(side="left", padx=5)
+    tk.Button(btns_frame, text="Gerar PDF", command=gerar_pdf,
+              bg="#2196F3", fg="white", font=("Arial", 10, "bold"), width=15).pack(side="left", padx=5)
+
+def janela_arquivos(titulo, rotulo, indice):
+    """Lista indexada de uma pasta: abre com o índice gravado e se atualiza em segundo plano"""
+    janela = tk.Toplevel(tela)
+    janela.title(titulo)
+    janela.geometry("900x450")
     janela.transient(tela)  # Faz a janela ser dependente da principal
     janela.focus_force()    # Força o foco para esta janela
 
-    tk.Label(janela, text="Orçamentos PDF Salvos", font=("Arial", 12, "bold")).pack(pady=10)
+    tk.Label(janela, text=rotulo, font=("Arial", 12, "bold")).pack(pady=10)
+
+    frame_busca = tk.Frame(janela)
+    frame_busca.pack(padx=10, fill="x")
+    tk.Label(frame_busca, text="Buscar:").pack(side="left")
+    entry_busca = tk.Entry(frame_busca, width=40)
+    entry_busca.pack(side="left", padx=5)
+    label_status = tk.Label(frame_busca, text="Atualizando...")
+    label_status.pack(side="right")
 
     frame_lista = tk.Frame(janela)
     frame_lista.pack(padx=10, pady=10, fill="both", expand=True)
 
-    lista = tk.Listbox(frame_lista, font=("Arial", 10), width=60)
-    lista.pack(side="left", fill="both", expand=True)
+    tabela_arquivos = ttk.Treeview(frame_lista, columns=list(CAMPOS_INDICE), show="headings", selectmode="browse")
+    for chave in CAMPOS_INDICE:
+        tabela_arquivos.column(chave, width=260 if chave == "nome" else 110, anchor="center")
+    tabela_arquivos.pack(side="left", fill="both", expand=True)
 
-    scrollbar = tk.Scrollbar(frame_lista, orient="vertical", command=lista.yview)
+    scrollbar = ttk.Scrollbar(frame_lista, orient="vertical", command=tabela_arquivos.yview)
     scrollbar.pack(side="right", fill="y")
-    lista.config(yscrollcommand=scrollbar.set)
 
-    for arquivo in arquivos_pdf:
-        data_criacao = datetime.fromtimestamp(os.path.getctime(arquivo)).strftime("%d/%m/%Y %H:%M")
-        lista.insert(tk.END, f"{os.path.basename(arquivo)}  |  Criado em: {data_criacao}")
+    # Clique no cabeçalho ordena; a busca filtra por qualquer campo exibido
+    lista = ListaArquivos(tabela_arquivos, scrollbar, CAMPOS_INDICE, formatar_entrada)
+    lista.exibir(indice.listar())
+    entry_busca.bind("<KeyRelease>", lambda e: lista.buscar(entry_busca.get()))
+
+    def atualizado(entradas):
+        if janela.winfo_exists():
+            lista.exibir(entradas)
+            label_status.config(text=f"{len(entradas)} arquivo(s)")
+
+    def falhou(erro):
+        if janela.winfo_exists():
+            label_status.config(text=f"Erro ao atualizar: {erro}")
+
+    # Só os arquivos novos ou alterados são relidos
+    gerenciador.submeter(f"Indexar {os.path.basename(indice.pasta)}", indice.atualizar,
+                         ao_concluir=atualizado, ao_falhar=falhou, interna=True)
+    return janela, lista
+
+def mostrar_orcamentos():
+    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
+    pasta_pdf = os.path.join(desktop, "Orçamentos_NM_Napoleão")
+    
+    if not os.path.exists(pasta_pdf):
+        os.makedirs(pasta_pdf)
+        messagebox.showinfo("Orçamentos Salvos", "Nenhum orçamento PDF encontrado na pasta.")
+        return
+
+    indice = obter_indice(pasta_pdf, [".pdf"])
+    if not indice.listar() and not glob.glob(os.path.join(pasta_pdf, "*.pdf")):
+        messagebox.showinfo("Orçamentos Salvos", "Nenhum orçamento PDF encontrado na pasta.")
+        return
+
+    janela, lista = janela_arquivos("Orçamentos Salvos", "Orçamentos PDF Salvos", indice)
 
     def abrir_pdf():
-        selecionado = lista.curselection()
-        if selecionado:
-            nome_arquivo = arquivos_pdf[selecionado[0]]
-            os.startfile(nome_arquivo)
+        entrada = lista.selecionada()
+        if entrada:
+            os.startfile(os.path.join(pasta_pdf, entrada["nome"]))
 
     def apagar_pdf():
-        selecionado = lista.curselection()
-        if not selecionado:
+        entrada = lista.selecionada()
+        if entrada is None:
             messagebox.showinfo("Info", "Selecione um orçamento para apagar.")
             return
-        nome_arquivo = arquivos_pdf[selecionado[0]]
-        nome_exibicao = os.path.basename(nome_arquivo)
+        nome_exibicao = entrada["nome"]
         if messagebox.askyesno("Confirmação", f"Deseja realmente apagar o orçamento '{nome_exibicao}'?"):
             try:
-                os.remove(nome_arquivo)
-                lista.delete(selecionado[0])
-                arquivos_pdf.pop(selecionado[0])
+                os.remove(os.path.join(pasta_pdf, nome_exibicao))
+                indice.remover(nome_exibicao)
+                lista.remover(entrada)
                 messagebox.showinfo("Sucesso", f"Orçamento '{nome_exibicao}' apagado com sucesso.")
             except Exception as e:
                 messagebox.showerror("Erro", f"Não foi possível apagar o arquivo.\n{e}")
@@ -566,44 +836,30 @@ def mostrar_csvs_antigos():
         messagebox.showinfo("Info", "Nenhum orçamento antigo encontrado.")
         return
 
-    arquivos_csv = glob.glob(os.path.join(pasta_backup, "*.csv"))
-    if not arquivos_csv:
+    # Backups novos no formato padrão e os CSV antigos
+    indice = obter_indice(pasta_backup, FORMATOS, resumir_orcamento)
+    if not indice.listar() and not any(
+            glob.glob(os.path.join(pasta_backup, f"*{extensao}")) for extensao in FORMATOS):
         messagebox.showinfo("Info", "Nenhum orçamento antigo encontrado.")
         return
 
-    janela = tk.Toplevel(tela)
-    janela.title("Orçamentos Antigos (CSV)")
-    janela.geometry("550x350")
-    janela.transient(tela)
-    janela.focus_force()
-
-    tk.Label(janela, text="Orçamentos CSV Salvos", font=("Arial", 12, "bold")).pack(pady=10)
-
-    frame_lista = tk.Frame(janela)
-    frame_lista.pack(padx=10, pady=10, fill="both", expand=True)
-
-    lista = tk.Listbox(frame_lista, font=("Arial", 10), width=60)
-    lista.pack(side="left", fill="both", expand=True)
-
-    scrollbar = tk.Scrollbar(frame_lista, orient="vertical", command=lista.yview)
-    scrollbar.pack(side="right", fill="y")
-    lista.config(yscrollcommand=scrollbar.set)
-
-    for arquivo in arquivos_csv:
-        data_criacao = datetime.fromtimestamp(os.path.getctime(arquivo)).strftime("%d/%m/%Y %H:%M")
-        lista.insert(tk.END, f"{os.path.basename(arquivo)}  |  Criado em: {data_criacao}")
+    janela, lista = janela_arquivos("Orçamentos Antigos", "Orçamentos Salvos", indice)
 
     def carregar_csv():
-        selecionado = lista.curselection()
-        if selecionado:
-            nome_arquivo = arquivos_csv[selecionado[0]]
+        entrada = lista.selecionada()
+        if entrada:
+            nome_arquivo = os.path.join(pasta_backup, entrada["nome"])
             if messagebox.askyesno("Carregar", "Deseja carregar este orçamento? (O atual será substituído)"):
                 try:
-                    global df
-                    df = pd.read_csv(nome_arquivo)
+                    # Snapshot + diário do backup
+                    orcamento.substituir(obter_diario(nome_arquivo).carregar())
+                    preparar_autocompletar()
                     # Armazena o caminho do arquivo aberto
                     tela.arquivo_backup_atual = nome_arquivo
-                    atualizar_tabela()
+                    # O arquivo principal passa a refletir o orçamento carregado
+                    obter_diario(ARQUIVO_PRINCIPAL).compactar(orcamento.dados, em_segundo_plano=True)
+                    marcar_salvo()
+                    atualizar_tabela(completo=True)
                     janela.destroy()
                     messagebox.showinfo("Sucesso", "Orçamento carregado com sucesso!")
                 except Exception as e:
@@ -616,11 +872,121 @@ def mostrar_csvs_antigos():
                            bg="#4CAF50", fg="white", font=("Arial", 10, "bold"), width=20)
     btn_carregar.pack(pady=5)
 
+def abrir_banco():
+    """Banco com todos os orçamentos salvos (uma conexão por uso/thread)"""
+    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
+    pasta = os.path.join(desktop, "Orçamentos_NM_Napoleão")
+    if not os.path.exists(pasta):
+        os.makedirs(pasta)
+    return BancoOrcamentos(os.path.join(pasta, "orcamentos.db"))
+
+def migrar_backups(progresso=None):
+    """Importa no banco os backups antigos que ainda não estão nele ou que mudaram desde a importação"""
+    desktop = os.path.join(os.path.expanduser("~"), "Desktop")
+    pasta_backup = os.path.join(desktop, "Orçamentos_NM_Napoleão", "Orçamentos_Antigos")
+    if not os.path.exists(pasta_backup):
+        return 0
+    banco = abrir_banco()
+    try:
+        return banco.migrar_backups(pasta_backup, progresso)
+    finally:
+        banco.fechar()
+
+def consultar_cotacoes():
+    """Busca cotações em todos os orçamentos salvos (fornecedor, produto, período)"""
+    janela = tk.Toplevel(tela)
+    janela.title("Consultar Cotações")
+    janela.geometry("1000x500")
+    janela.transient(tela)
+    janela.focus_force()
+
+    frame_campos = tk.Frame(janela)
+    frame_campos.pack(padx=10, pady=10, fill="x")
+
+    campos = {}
+    for i, (rotulo, chave) in enumerate([("Fornecedor:", "fornecedor"), ("Produto:", "produto"),
+                                         ("Desde (AAAA-MM-DD):", "desde"), ("Até (AAAA-MM-DD):", "ate")]):
+        tk.Label(frame_campos, text=rotulo).grid(row=0, column=2 * i, padx=5)
+        campos[chave] = tk.Entry(frame_campos, width=15)
+        campos[chave].grid(row=0, column=2 * i + 1, padx=5)
+
+    colunas_consulta = ["Orçamento", "Data", "Fornecedor", "Produto", "Preço Unitário", "Quantidade", "IPI", "Desconto", "Total Final"]
+    frame_resultado = tk.Frame(janela)
+    frame_resultado.pack(padx=10, fill="both", expand=True)
+    resultado = ttk.Treeview(frame_resultado, columns=colunas_consulta, show="headings")
+    for col in colunas_consulta:
+        resultado.heading(col, text=col)
+        resultado.column(col, width=100, anchor="center")
+    resultado.pack(side="left", fill="both", expand=True)
+    scrollbar = ttk.Scrollbar(frame_resultado, orient="vertical", command=resultado.yview)
+    scrollbar.pack(side="right", fill="y")
+    resultado.configure(yscrollcommand=scrollbar.set)
+
+    label_total = tk.Label(janela, text="")
+    label_total.pack(pady=2)
+
+    # Quantas linhas da consulta aparecem na lista
+    LIMITE_EXIBIDAS = 2000
+
+    def buscar():
+        try:
+            banco = abrir_banco()
+            try:
+                encontradas = banco.consultar(**{chave: campo.get().strip() for chave, campo in campos.items()})
+            finally:
+                banco.fechar()
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro na consulta:\n{e}")
+            return
+        resultado.delete(*resultado.get_children())
+        exibidas = encontradas.head(LIMITE_EXIBIDAS)
+        # Data vem como datetime64: na tabela, só o dia (sem " 00:00:00")
+        exibidas = exibidas.assign(Data=exibidas["Data"].dt.strftime(FORMATO_DATA).fillna(""))
+        for linha in exibidas.itertuples(index=False):
+            resultado.insert("", "end", values=(
+                linha[0], linha[1], linha[2], linha[3], formatar_reais(linha[5]), linha[6],
+                formatar_percentual(linha[7]), formatar_percentual(linha[8]), formatar_reais(linha[9])
+            ))
+        texto = f"{len(encontradas)} cotações encontradas"
+        if len(encontradas) > LIMITE_EXIBIDAS:
+            texto += f" (exibindo as {LIMITE_EXIBIDAS} mais recentes)"
+        label_total.config(text=texto)
+
+    def migrar():
+        gerenciador.submeter(
+            "Migrar backups para o banco",
+            migrar_backups,
+            ao_concluir=lambda quantidade: messagebox.showinfo(
+                "Sucesso", f"{quantidade} orçamento(s) antigo(s) importado(s) ou atualizado(s) no banco."),
+            ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao migrar os backups:\n{e}")
+        )
+
+    def sincronizado(quantidade):
+        if quantidade and janela.winfo_exists():
+            label_total.config(text=f"{quantidade} orçamento(s) antigo(s) atualizado(s) no banco")
+
+    def falhou(erro):
+        if janela.winfo_exists():
+            label_total.config(text=f"Erro ao sincronizar os backups com o banco: {erro}")
+
+    # Backups editados desde a última importação são reimportados ao abrir a consulta
+    gerenciador.submeter("Sincronizar backups com o banco", migrar_backups, ao_concluir=sincronizado,
+                         ao_falhar=falhou, interna=True)
+
+    btns_frame = tk.Frame(janela)
+    btns_frame.pack(pady=5)
+
+    tk.Button(btns_frame, text="Buscar", command=buscar,
+              bg="#2196F3", fg="white", font=("Arial", 10, "bold"), width=20).pack(side="left", padx=5)
+    tk.Button(btns_frame, text="Migrar Backups", command=migrar,
+              bg="#607D8B", fg="white", font=("Arial", 10, "bold"), width=20).pack(side="left", padx=5)
+
+    for campo in campos.values():
+        campo.bind("<Return>", lambda e: buscar())
+
 def novo_orcamento():
     """Cria um novo orçamento, salvando o atual como backup"""
-    global df
-    
-    if not df.empty:
+    if not orcamento.dados.empty:
         # Verifica se existem dados para salvar
         resposta = messagebox.askyesno(
             "Novo Orçamento",
@@ -635,16 +1001,26 @@ def novo_orcamento():
                 os.makedirs(pasta_backup)
             
             # Salva o arquivo atual com timestamp
-            nome_arquivo = f"orcamento_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            nome_arquivo = f"orcamento_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}{EXTENSAO_PADRAO}"
             caminho_backup = os.path.join(pasta_backup, nome_arquivo)
-            df.to_csv(caminho_backup, index=False)
+            gravar_orcamento(orcamento.dados, caminho_backup)
+            assinatura = assinatura_arquivo(caminho_backup, os.stat(caminho_backup))
+            obter_indice(pasta_backup, FORMATOS, resumir_orcamento).registrar(caminho_backup, resumir_dados(orcamento.dados))
+            # O backup também entra no banco, para as consultas entre orçamentos
+            try:
+                banco = abrir_banco()
+                try:
+                    banco.salvar_orcamento(os.path.splitext(nome_arquivo)[0], orcamento.dados, origem=caminho_backup,
+                                           assinatura=assinatura)
+                finally:
+                    banco.fechar()
+            except Exception as e:
+                messagebox.showerror("Erro", f"Erro ao gravar o backup no banco:\n{e}")
             messagebox.showinfo("Backup", f"Orçamento atual salvo em:\n{caminho_backup}")
     
     # Cria novo DataFrame vazio
-    df = pd.DataFrame(columns=[
-        "Data", "Fornecedor", "Produto", "Descrição", 
-        "Preço Unitário", "Quantidade", "IPI", "Desconto", "Total Final"
-    ])
+    orcamento.substituir(dataframe_vazio())
+    registrar_alteracao(lambda diario: diario.registrar_limpeza())
     
     # Limpa a tabela
     atualizar_tabela()
@@ -663,233 +1039,455 @@ def novo_orcamento():
     
     messagebox.showinfo("Sucesso", "Novo orçamento criado com sucesso!")
 
-def get_sugestoes():
-    """Retorna dicionário com sugestões para cada campo"""
-    return {
-        'fornecedor': sorted(list(df['Fornecedor'].unique())),
-        'produto': sorted(list(df['Produto'].unique())),
-        'descricao': sorted(list(df['Descrição'].unique()))
-    }
+def simular_precos():
+    """Simulação "e se" de IPI/desconto por fornecedor e produto, com opção de aplicar"""
+    if orcamento.dados.empty:
+        messagebox.showinfo("Info", "Nenhum dado para simular")
+        return
+
+    janela = tk.Toplevel(tela)
+    janela.title("Simulação de Preços")
+    janela.geometry("420x300")
+    janela.transient(tela)
+    janela.focus_force()
+
+    tk.Label(janela, text="Simulação de Preços", font=("Arial", 12, "bold")).pack(pady=10)
+
+    frame_campos = tk.Frame(janela)
+    frame_campos.pack(padx=10, pady=5)
+
+    tk.Label(frame_campos, text="Fornecedor:").grid(row=0, column=0, sticky="e", pady=2)
+    combo_fornecedor = ttk.Combobox(frame_campos, values=[""] + sorted(orcamento.dados['Fornecedor'].astype(str).unique()), width=27)
+    combo_fornecedor.grid(row=0, column=1, padx=5, pady=2)
+
+    tk.Label(frame_campos, text="Produto:").grid(row=1, column=0, sticky="e", pady=2)
+    combo_produto = ttk.Combobox(frame_campos, values=[""] + sorted(orcamento.dados['Produto'].astype(str).unique()), width=27)
+    combo_produto.grid(row=1, column=1, padx=5, pady=2)
+
+    tk.Label(frame_campos, text="Novo IPI (%):").grid(row=2, column=0, sticky="e", pady=2)
+    entry_novo_ipi = tk.Entry(frame_campos, width=30, validate="key", validatecommand=vcmd)
+    entry_novo_ipi.grid(row=2, column=1, padx=5, pady=2)
+
+    tk.Label(frame_campos, text="Desconto adicional (%):").grid(row=3, column=0, sticky="e", pady=2)
+    entry_desconto_adicional = tk.Entry(frame_campos, width=30, validate="key", validatecommand=vcmd)
+    entry_desconto_adicional.grid(row=3, column=1, padx=5, pady=2)
+
+    label_resultado = tk.Label(janela, text="", font=("Arial", 10))
+    label_resultado.pack(pady=5)
+
+    simulacao = {}
+
+    def calcular(aplicar=False):
+        try:
+            ipi = entry_novo_ipi.get().replace(",", ".")
+            desconto = entry_desconto_adicional.get().replace(",", ".")
+            atual = orcamento.dados["Total Final"].sum()
+            # Com aplicar, o núcleo troca o DataFrame e refaz as ordens e as melhores ofertas
+            novos, alterados = orcamento.simular(
+                ipi=float(ipi) if ipi else None,
+                desconto_adicional=float(desconto) if desconto else None,
+                fornecedor=combo_fornecedor.get() or None,
+                produto=combo_produto.get() or None,
+                aplicar=aplicar
+            )
+        except ItemInvalido as e:
+            messagebox.showerror("Erro", str(e), parent=janela)
+            return None
+        except (ValueError, OverflowError):
+            messagebox.showerror("Erro", "Insira valores válidos", parent=janela)
+            return None
+        simulacao["alterados"] = alterados
+        label_resultado.config(text=(
+            f"{len(alterados)} item(ns) afetado(s)\n"
+            f"Total atual: {formatar_reais(atual)}  |  "
+            f"Simulado: {formatar_reais(novos['Total Final'].sum())}"
+        ))
+        return simulacao
+
+    def aplicar():
+        if not calcular(aplicar=True) or not len(simulacao["alterados"]):
+            return
+        salvar_df()
+        atualizar_tabela(alterados=simulacao["alterados"])
+        janela.destroy()
+        messagebox.showinfo("Sucesso", f"Simulação aplicada a {len(simulacao['alterados'])} item(ns)!")
+
+    btns_frame = tk.Frame(janela)
+    btns_frame.pack(pady=5)
+
+    tk.Button(btns_frame, text="Simular", command=calcular,
+              bg="#2196F3", fg="white", font=("Arial", 10, "bold"), width=15).pack(side="left", padx=5)
+    tk.Button(btns_frame, text="Aplicar ao Orçamento", command=aplicar,
+              bg="#4CAF50", fg="white", font=("Arial", 10, "bold"), width=18).pack(side="left", padx=5)
+
+def preparar_autocompletar():
+    """Monta as sugestões em segundo plano, para a primeira tecla não esperar por elas"""
+    def montadas(resultado):
+        # O orçamento mudou durante a montagem: monta de novo a partir do atual
+        if not orcamento.instalar_sugestoes(*resultado):
+            preparar_autocompletar()
+
+    gerenciador.submeter("Autocompletar", orcamento.montar_sugestoes, ao_concluir=montadas, interna=True)
+
+def ligar_autocompletar(entry, coluna):
+    """Lista de sugestões (valores já usados na coluna, os mais frequentes primeiro) sob o campo"""
+    popup = tk.Toplevel(tela)
+    popup.overrideredirect(True)
+    popup.withdraw()
+    lista = tk.Listbox(popup, font=("Arial", 10), height=8, activestyle="dotbox")
+    lista.pack(fill="both", expand=True)
+
+    def esconder(event=None):
+        popup.withdraw()
+
+    def escolher(event=None):
+        if not lista.curselection():
+            return
+        entry.delete(0, tk.END)
+        entry.insert(0, lista.get(lista.curselection()[0]))
+        esconder()
+        entry.focus_set()
+        entry.icursor(tk.END)
+        return "break"
+
+    def atualizar(event):
+        if event.keysym in ("Down", "Up", "Return", "Escape", "Tab"):
+            return
+        sugestoes = orcamento.sugerir(coluna, entry.get())
+        if not sugestoes or sugestoes == [entry.get()]:
+            esconder()
+            return
+        lista.delete(0, tk.END)
+        for valor in sugestoes:
+            lista.insert(tk.END, valor)
+        lista.config(height=len(sugestoes))
+        popup.geometry(f"{entry.winfo_width()}x{lista.winfo_reqheight()}"
+                       f"+{entry.winfo_rootx()}+{entry.winfo_rooty() + entry.winfo_height()}")
+        popup.deiconify()
+        popup.lift()
+
+    def descer(event):
+        if popup.winfo_ismapped():
+            lista.focus_set()
+            lista.selection_clear(0, tk.END)
+            lista.selection_set(0)
+            lista.activate(0)
+            return "break"
+
+    def saiu(event):
+        # O clique na lista também tira o foco do campo: espera para ver onde o foco foi parar
+        tela.after(100, lambda: tela.focus_get() is not lista and esconder())
+
+    entry.bind("<KeyRelease>", atualizar, add="+")
+    entry.bind("<Down>", descer)
+    entry.bind("<Escape>", esconder)
+    entry.bind("<FocusOut>", saiu, add="+")
+    lista.bind("<Return>", escolher)
+    lista.bind("<Tab>", escolher)
+    lista.bind("<ButtonRelease-1>", escolher)
+    lista.bind("<Escape>", lambda e: (esconder(), entry.focus_set()))
+    lista.bind("<FocusOut>", saiu)
+
+def importar_csv():
+    """Substitui o orçamento atual pelo conteúdo de um CSV"""
+    arquivo = filedialog.askopenfilename(
+        filetypes=[("CSV files", "*.csv")],
+        title="Importar orçamento CSV"
+    )
+    if not arquivo:
+        return
+    if not orcamento.dados.empty and not messagebox.askyesno("Importar", "Deseja importar este CSV? (O atual será substituído)"):
+        return
+    try:
+        orcamento.substituir(ler_csv(arquivo))
+        preparar_autocompletar()
+        # O CSV importado não recebe as alterações seguintes
+        if hasattr(tela, 'arquivo_backup_atual'):
+            delattr(tela, 'arquivo_backup_atual')
+        obter_diario(ARQUIVO_PRINCIPAL).compactar(orcamento.dados, em_segundo_plano=True)
+        marcar_salvo()
+        atualizar_tabela(completo=True)
+        messagebox.showinfo("Sucesso", "Orçamento importado com sucesso!")
+    except Exception as e:
+        messagebox.showerror("Erro", f"Erro ao importar o arquivo:\n{e}")
+
+def exportar_csv():
+    """Grava o orçamento atual num CSV"""
+    arquivo = filedialog.asksaveasfilename(
+        defaultextension=".csv",
+        filetypes=[("CSV files", "*.csv")],
+        initialfile=f"orcamento_{datetime.now().strftime('%Y%m%d')}.csv",
+        title="Exportar orçamento como CSV"
+    )
+    if not arquivo:
+        return
+    try:
+        gravar_csv(orcamento.dados, arquivo)
+        messagebox.showinfo("Sucesso", f"Orçamento exportado para:\n{arquivo}")
+    except Exception as e:
+        messagebox.showerror("Erro", f"Erro ao exportar o arquivo:\n{e}")
 
 def salvar_alteracoes():
-    """Salva explicitamente as alterações no arquivo CSV"""
+    """Salva explicitamente as alterações no arquivo do orçamento"""
     try:
         salvar_df()
         messagebox.showinfo("Sucesso", "Alterações salvas com sucesso!")
     except Exception as e:
         messagebox.showerror("Erro", f"Erro ao salvar alterações:\n{e}")
 
-# Interface
-tela = tk.Tk()
-tela.title("App de Orçamento com Fornecedores")
-tela.geometry("1300x800")
-
-# Adiciona frame para 
-frame_logo = tk.Frame(tela)
-frame_logo.pack(pady=10)
-
-# Carrega e redimensiona a logo
-try:
-    # Usa resource_path para localizar a imagem
-    logo_path = resource_path("logo.png")
-    imagem = Image.open(logo_path)
-    basewidth = 200
-    wpercent = (basewidth/float(imagem.size[0]))
-    hsize = int((float(imagem.size[1])*float(wpercent)))
-    imagem = imagem.resize((basewidth, hsize), Image.Resampling.LANCZOS)
-    logo = ImageTk.PhotoImage(imagem)
-    label_logo = tk.Label(frame_logo, image=logo)
-    label_logo.image = logo
-    label_logo.pack()
-except Exception as e:
-    print(f"Erro ao carregar logo: {e}")
-
-# Create menu first
-menu_bar = tk.Menu(tela)
-menu_opcoes = tk.Menu(menu_bar, tearoff=0)
-menu_atalhos = tk.Menu(menu_bar, tearoff=0)  # Novo menu para atalhos
-tela.config(menu=menu_bar)
-
-# commands to menu
-menu_opcoes.add_command(label="Mostrar Orçamentos", command=mostrar_orcamentos)
-menu_opcoes.add_separator()
-menu_opcoes.add_command(label="Novo Orçamento", command=novo_orcamento)
-menu_opcoes.add_command(label="Orçamentos Antigos", command=mostrar_csvs_antigos)
-
-# Adiciona os atalhos no submenu
-menu_atalhos.add_command(label="Salvar (Ctrl+S)")
-menu_atalhos.add_command(label="Novo Orçamento (Ctrl+N)")
-menu_atalhos.add_command(label="Abrir Orçamentos Antigos (Ctrl+O)")
-menu_atalhos.add_command(label="Gerar PDF (Ctrl+P)")
-menu_atalhos.add_command(label="Gerar Gráfico (Ctrl+G)")
-menu_atalhos.add_command(label="Focar Filtro (Ctrl+F)")
-menu_atalhos.add_command(label="Atualizar Tabela (F5)")
-menu_atalhos.add_command(label="Remover Selecionado (Delete)")
-
-# Adiciona os menus na barra
-menu_bar.add_cascade(label="Opções", menu=menu_opcoes)
-menu_bar.add_cascade(label="Atalhos", menu=menu_atalhos)
-
-fonte_label = ("Arial", 11, "bold")
-padrao_entry = {"font": ("Arial", 10), "width": 30}
-
-frame_entrada = tk.Frame(tela)
-frame_entrada.pack(pady=10)
-
-# Labels e Entradas (padronizadas)
-labels_entrada = ["Fornecedor", "Produto", "Descrição", "Preço Unitário (R$)", "Quantidade", "IPI (%)", "Desconto (%)"]
-entries_entrada = []
-
-vcmd = (tela.register(validar_numero), "%P")
-
-for i, label in enumerate(labels_entrada):
-    tk.Label(frame_entrada, text=label, font=fonte_label).grid(row=i, column=0, sticky="e", padx=5, pady=2)
-    if label in ["Preço Unitário (R$)", "Quantidade", "IPI (%)", "Desconto (%)"]:
-        entry = tk.Entry(frame_entrada, **padrao_entry, validate="key", validatecommand=vcmd)
-    else:
-        entry = tk.Entry(frame_entrada, **padrao_entry)
-    entry.grid(row=i, column=1, padx=5, pady=2)
-    entries_entrada.append(entry)
-
-entry_fornecedor, entry_produto, entry_descricao, entry_preco, entry_quantidade, entry_ipi, entry_desconto = entries_entrada
-
-# Botões principais
-frame_botoes = tk.Frame(tela)
-frame_botoes.pack(pady=10)
-
-btn_add = tk.Button(frame_botoes, text="Adicionar Item", command=adicionar_item, 
-                   bg="#4CAF50", fg="white", font=fonte_label, width=15)
-btn_add.grid(row=0, column=0, padx=5)
-
-btn_grafico = tk.Button(frame_botoes, text="Gerar Gráfico", command=gerar_grafico, 
-                       bg="#9C27B0", fg="white", font=fonte_label, width=15)
-btn_grafico.grid(row=0, column=1, padx=5)
-
-btn_pdf = tk.Button(frame_botoes, text="Gerar PDF", command=gerar_pdf, 
-                   bg="#607D8B", fg="white", font=fonte_label, width=15)
-btn_pdf.grid(row=0, column=2, padx=5)
-
-btn_salvar = tk.Button(frame_botoes, text="Salvar Alterações", command=salvar_alteracoes, 
-                      bg="#FF9800", fg="white", font=fonte_label, width=15)
-btn_salvar.grid(row=0, column=3, padx=5)
-
-btn_remover = tk.Button(frame_botoes, text="Remover Orçamento", command=remover_selecionado, 
-                       bg="#F00707", fg="white", font=fonte_label, width=20)
-btn_remover.grid(row=0, column=4, padx=5)
-
-# Filtros
-filtros_frame = tk.LabelFrame(tela, text="🔍 Filtros Avançados", padx=10, pady=10, font=("Arial", 10, "bold"))
-filtros_frame.pack(pady=10, fill="x")
-
-tk.Label(filtros_frame, text="Fornecedor:").grid(row=0, column=0)
-filtro_fornecedor = tk.Entry(filtros_frame, font=("Arial", 10), width=25)
-filtro_fornecedor.grid(row=0, column=1, padx=5)
-
-tk.Label(filtros_frame, text="Produto:").grid(row=0, column=2)
-filtro_produto = tk.Entry(filtros_frame, font=("Arial", 10), width=25)
-filtro_produto.grid(row=0, column=3, padx=5)
-
-tk.Label(filtros_frame, text="Descrição:").grid(row=0, column=4)
-filtro_descricao = tk.Entry(filtros_frame, font=("Arial", 10), width=25)
-filtro_descricao.grid(row=0, column=5, padx=5)
-
-var_ordem = tk.StringVar()
-ordem_menu = ttk.Combobox(
-    filtros_frame,
-    textvariable=var_ordem,
-    values=["", "A-Z", "Maior Desconto", "Menor IPI", "Maior IPI", "Menor Preço", "Maior Valor"],
-    state="readonly",
-    width=18
-)
-ordem_menu.grid(row=0, column=6, padx=5)
-ordem_menu.set("Ordenar por...")
-
-btn_filtrar = tk.Button(filtros_frame, text="Aplicar Filtros", command=aplicar_filtros, bg="#2196F3", fg="white", font=fonte_label, width=15)
-btn_filtrar.grid(row=0, column=7, padx=5)
-
-btn_limpar = tk.Button(filtros_frame, text="Limpar Filtros", command=limpar_filtros, bg="#F44336", fg="white", font=fonte_label, width=15)
-btn_limpar.grid(row=0, column=8, padx=5)
-
-# Tabela
-frame_tabela = tk.Frame(tela)
-frame_tabela.pack(fill="both", expand=True, padx=10, pady=10)
-
-# Criar scrollbars
-scrollbar_y = ttk.Scrollbar(frame_tabela)
-scrollbar_y.pack(side="right", fill="y")
-
-scrollbar_x = ttk.Scrollbar(frame_tabela, orient="horizontal")
-scrollbar_x.pack(side="bottom", fill="x")
-
-# Criar tabela com suporte a seleção múltipla e scrollbars
-colunas = ["Fornecedor", "Produto", "Descrição", "Preço Unitário", "Quantidade", "IPI", "Desconto", "Total Final"]
-tabela = ttk.Treeview(
-    frame_tabela, 
-    columns=colunas, 
-    show="headings", 
-    selectmode="extended",  # Permite seleção múltipla
-    yscrollcommand=scrollbar_y.set,
-    xscrollcommand=scrollbar_x.set
-)
-
-# Configurar scrollbars
-scrollbar_y.config(command=tabela.yview)
-scrollbar_x.config(command=tabela.xview)
-
-# Configurar colunas
-for col in colunas:
-    tabela.heading(col, text=col)
-    tabela.column(col, width=150, anchor="center")
-
-tabela.pack(fill="both", expand=True)
-
-# Adicione este estilo para melhorar a visualização da seleção
-style = ttk.Style()
-style.map('Treeview',
-    foreground=[('selected', 'white')],
-    background=[('selected', '#0078D7')]  # Cor azul do Windows para seleção
-)
-
-# Adicione estas funções para manipular a seleção
-def on_select(event):
-    """Atualiza a contagem de itens selecionados"""
-    selecionados = len(tabela.selection())
-    if selecionados > 0:
-        btn_remover.config(text=f"Remover ({selecionados})")
-    else:
-        btn_remover.config(text="Remover Orçamento")
-
-# Vincule o evento de seleção à tabela
-tabela.bind('<<TreeviewSelect>>', on_select)
-
-# Inicializa tabela com dados
-# Configuração inicial do DataFrame vazio
-df = pd.DataFrame(columns=[
-    "Data", "Fornecedor", "Produto", "Descrição", 
-    "Preço Unitário", "Quantidade", "IPI", "Desconto", "Total Final"
-])
-
-# Atualiza a tabela vazia
-atualizar_tabela()
-
-tela.protocol("WM_DELETE_WINDOW", confirmar_saida)
-
-# Adicione esta função para lidar com os atalhos de teclado
-def setup_hotkeys():
-    # Adiciona verificação de plataforma
-    mod = "Command" if sys.platform == "darwin" else "Control"
-    tela.bind(f"<{mod}-s>", lambda e: salvar_alteracoes())
-    tela.bind(f"<{mod}-n>", lambda e: novo_orcamento())
-    tela.bind(f"<{mod}-o>", lambda e: mostrar_csvs_antigos())
-    tela.bind(f"<{mod}-p>", lambda e: gerar_pdf())
-    tela.bind(f"<{mod}-g>", lambda e: gerar_grafico())
-    tela.bind("<Delete>", lambda e: remover_selecionado())
-    tela.bind("<F5>", lambda e: atualizar_tabela())
-
-def focar_filtro(event=None):
-    """Função para focar no campo de filtro de fornecedor"""
-    filtro_fornecedor.focus_set()
-
-setup_hotkeys()
-
-tela.mainloop()
\ No newline at end of file
+# Os processos de trabalho (pool do histórico de preços) reimportam este script;
+# a tela só é montada no processo principal
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
+    # Interface
+    tela = tk.Tk()
+    tela.title(TITULO)
+    tela.geometry("1300x800")
+
+    # Exportações (PDF, gráficos) rodam em segundo plano, acompanhadas pelo mainloop
+    gerenciador = GerenciadorTarefas(tela)
+    cronometro_inicio.marcar("janela principal")
+
+    # Adiciona frame para 
+    frame_logo = tk.Frame(tela)
+    frame_logo.pack(pady=10)
+
+    # Carrega a logo (redimensionada uma vez e guardada em cache)
+    try:
+        logo = carregar_logo()
+        label_logo = tk.Label(frame_logo, image=logo)
+        label_logo.image = logo
+        label_logo.pack()
+    except Exception as e:
+        print(f"Erro ao carregar logo: {e}")
+    cronometro_inicio.marcar("logo")
+
+    # Create menu first
+    menu_bar = tk.Menu(tela)
+    menu_opcoes = tk.Menu(menu_bar, tearoff=0)
+    menu_atalhos = tk.Menu(menu_bar, tearoff=0)  # Novo menu para atalhos
+    tela.config(menu=menu_bar)
+
+    # commands to menu
+    menu_opcoes.add_command(label="Mostrar Orçamentos", command=mostrar_orcamentos)
+    menu_opcoes.add_separator()
+    menu_opcoes.add_command(label="Novo Orçamento", command=novo_orcamento)
+    menu_opcoes.add_command(label="Orçamentos Antigos", command=mostrar_csvs_antigos)
+    menu_opcoes.add_command(label="Consultar Cotações", command=consultar_cotacoes)
+    menu_opcoes.add_command(label="Importar CSV", command=importar_csv)
+    menu_opcoes.add_command(label="Exportar CSV", command=exportar_csv)
+    menu_opcoes.add_command(label="Simular Preços", command=simular_precos)
+    menu_opcoes.add_command(label="Melhor Oferta", command=mostrar_melhor_oferta)
+    menu_opcoes.add_command(label="Tarefas em Segundo Plano", command=mostrar_tarefas)
+    menu_opcoes.add_separator()
+    var_desempenho = tk.BooleanVar(value=bool(os.environ.get("ORCAMENTO_DESEMPENHO")))
+    menu_opcoes.add_checkbutton(label="Barra de Desempenho (F12)", variable=var_desempenho,
+                                command=alternar_desempenho)
+    menu_opcoes.add_command(label="Exportar Rastro de Desempenho", command=exportar_rastro)
+    menu_opcoes.add_command(label="Relatório de Memória", command=mostrar_memoria)
+
+    # Adiciona os atalhos no submenu
+    menu_atalhos.add_command(label="Salvar (Ctrl+S)")
+    menu_atalhos.add_command(label="Novo Orçamento (Ctrl+N)")
+    menu_atalhos.add_command(label="Abrir Orçamentos Antigos (Ctrl+O)")
+    menu_atalhos.add_command(label="Gerar PDF (Ctrl+P)")
+    menu_atalhos.add_command(label="Gerar Gráfico (Ctrl+G)")
+    menu_atalhos.add_command(label="Focar Filtro (Ctrl+F)")
+    menu_atalhos.add_command(label="Atualizar Tabela (F5)")
+    menu_atalhos.add_command(label="Remover Selecionado (Delete)")
+    menu_atalhos.add_command(label="Barra de Desempenho (F12)")
+
+    # Adiciona os menus na barra
+    menu_bar.add_cascade(label="Opções", menu=menu_opcoes)
+    menu_bar.add_cascade(label="Atalhos", menu=menu_atalhos)
+
+    fonte_label = ("Arial", 11, "bold")
+    padrao_entry = {"font": ("Arial", 10), "width": 30}
+
+    frame_entrada = tk.Frame(tela)
+    frame_entrada.pack(pady=10)
+
+    # Labels e Entradas (padronizadas)
+    labels_entrada = ["Fornecedor", "Produto", "Descrição", "Preço Unitário (R$)", "Quantidade", "IPI (%)", "Desconto (%)"]
+    entries_entrada = []
+
+    vcmd = (tela.register(validar_numero), "%P")
+
+    for i, label in enumerate(labels_entrada):
+        tk.Label(frame_entrada, text=label, font=fonte_label).grid(row=i, column=0, sticky="e", padx=5, pady=2)
+        if label in ["Preço Unitário (R$)", "Quantidade", "IPI (%)", "Desconto (%)"]:
+            entry = tk.Entry(frame_entrada, **padrao_entry, validate="key", validatecommand=vcmd)
+        else:
+            entry = tk.Entry(frame_entrada, **padrao_entry)
+        entry.grid(row=i, column=1, padx=5, pady=2)
+        entries_entrada.append(entry)
+
+    entry_fornecedor, entry_produto, entry_descricao, entry_preco, entry_quantidade, entry_ipi, entry_desconto = entries_entrada
+
+    # Sugestões enquanto digita, a partir dos valores já cadastrados
+    ligar_autocompletar(entry_fornecedor, "Fornecedor")
+    ligar_autocompletar(entry_produto, "Produto")
+    ligar_autocompletar(entry_descricao, "Descrição")
+
+    # Botões principais
+    frame_botoes = tk.Frame(tela)
+    frame_botoes.pack(pady=10)
+
+    btn_add = tk.Button(frame_botoes, text="Adicionar Item", command=adicionar_item, 
+                       bg="#4CAF50", fg="white", font=fonte_label, width=15)
+    btn_add.grid(row=0, column=0, padx=5)
+
+    btn_grafico = tk.Button(frame_botoes, text="Gerar Gráfico", command=gerar_grafico, 
+                           bg="#9C27B0", fg="white", font=fonte_label, width=15)
+    btn_grafico.grid(row=0, column=1, padx=5)
+
+    btn_pdf = tk.Button(frame_botoes, text="Gerar PDF", command=gerar_pdf, 
+                       bg="#607D8B", fg="white", font=fonte_label, width=15)
+    btn_pdf.grid(row=0, column=2, padx=5)
+
+    btn_salvar = tk.Button(frame_botoes, text="Salvar Alterações", command=salvar_alteracoes, 
+                          bg="#FF9800", fg="white", font=fonte_label, width=15)
+    btn_salvar.grid(row=0, column=3, padx=5)
+
+    btn_remover = tk.Button(frame_botoes, text="Remover Orçamento", command=remover_selecionado, 
+                           bg="#F00707", fg="white", font=fonte_label, width=20)
+    btn_remover.grid(row=0, column=4, padx=5)
+
+    # Filtros
+    filtros_frame = tk.LabelFrame(tela, text="🔍 Filtros Avançados", padx=10, pady=10, font=("Arial", 10, "bold"))
+    filtros_frame.pack(pady=10, fill="x")
+
+    tk.Label(filtros_frame, text="Fornecedor:").grid(row=0, column=0)
+    filtro_fornecedor = tk.Entry(filtros_frame, font=("Arial", 10), width=25)
+    filtro_fornecedor.grid(row=0, column=1, padx=5)
+
+    tk.Label(filtros_frame, text="Produto:").grid(row=0, column=2)
+    filtro_produto = tk.Entry(filtros_frame, font=("Arial", 10), width=25)
+    filtro_produto.grid(row=0, column=3, padx=5)
+
+    tk.Label(filtros_frame, text="Descrição:").grid(row=0, column=4)
+    filtro_descricao = tk.Entry(filtros_frame, font=("Arial", 10), width=25)
+    filtro_descricao.grid(row=0, column=5, padx=5)
+
+    var_ordem = tk.StringVar()
+    ordem_menu = ttk.Combobox(
+        filtros_frame,
+        textvariable=var_ordem,
+        values=["", "A-Z", "Maior Desconto", "Menor IPI", "Maior IPI", "Menor Preço", "Maior Valor"],
+        state="readonly",
+        width=18
+    )
+    ordem_menu.grid(row=0, column=6, padx=5)
+    ordem_menu.set("Ordenar por...")
+
+    # Filtro enquanto digita
+    for filtro in [filtro_fornecedor, filtro_produto, filtro_descricao]:
+        filtro.bind("<KeyRelease>", agendar_filtros)
+
+    btn_filtrar = tk.Button(filtros_frame, text="Aplicar Filtros", command=aplicar_filtros, bg="#2196F3", fg="white", font=fonte_label, width=15)
+    btn_filtrar.grid(row=0, column=7, padx=5)
+
+    btn_limpar = tk.Button(filtros_frame, text="Limpar Filtros", command=limpar_filtros, bg="#F44336", fg="white", font=fonte_label, width=15)
+    btn_limpar.grid(row=0, column=8, padx=5)
+
+    # Tabela
+    frame_tabela = tk.Frame(tela)
+    frame_tabela.pack(fill="both", expand=True, padx=10, pady=10)
+
+    # Criar scrollbars
+    scrollbar_y = ttk.Scrollbar(frame_tabela)
+    scrollbar_y.pack(side="right", fill="y")
+
+    scrollbar_x = ttk.Scrollbar(frame_tabela, orient="horizontal")
+    scrollbar_x.pack(side="bottom", fill="x")
+
+    # Criar tabela com suporte a seleção múltipla e scrollbars
+    colunas = ["Fornecedor", "Produto", "Descrição", "Preço Unitário", "Quantidade", "IPI", "Desconto", "Total Final"]
+    tabela = ttk.Treeview(
+        frame_tabela, 
+        columns=colunas, 
+        show="headings", 
+        selectmode="extended",  # Permite seleção múltipla
+        xscrollcommand=scrollbar_x.set
+    )
+
+    # Configurar scrollbars (a vertical é controlada pela tabela virtual)
+    scrollbar_x.config(command=tabela.xview)
+
+    # Configurar colunas
+    for col in colunas:
+        tabela.heading(col, text=col)
+        tabela.column(col, width=150, anchor="center")
+
+    tabela.pack(fill="both", expand=True)
+
+    tabela_virtual = TabelaVirtual(tabela, scrollbar_y)
+
+    # Adicione este estilo para melhorar a visualização da seleção
+    style = ttk.Style()
+    style.map('Treeview',
+        foreground=[('selected', 'white')],
+        background=[('selected', '#0078D7')]  # Cor azul do Windows para seleção
+    )
+
+    # Adicione estas funções para manipular a seleção
+    def on_select(event):
+        """Atualiza a contagem de itens selecionados"""
+        selecionados = len(tabela_virtual.selecionados)
+        if selecionados > 0:
+            btn_remover.config(text=f"Remover ({selecionados})")
+        else:
+            btn_remover.config(text="Remover Orçamento")
+
+    # Vincule o evento de seleção à tabela
+    tabela.bind('<<TreeviewSelect>>', on_select, add="+")
+
+    # Inicializa tabela com o orçamento do arquivo principal (snapshot + diário de uma
+    # sessão que caiu): os ids das linhas novas continuam depois dos que já estão nele
+    try:
+        orcamento.substituir(obter_diario(ARQUIVO_PRINCIPAL).carregar())
+    except Exception as e:
+        messagebox.showerror("Erro", f"Erro ao carregar o orçamento:\n{e}")
+    if not orcamento.dados.empty:
+        preparar_autocompletar()
+    cronometro_inicio.marcar("carregar orçamento")
+    atualizar_tabela(completo=True)
+
+    tela.protocol("WM_DELETE_WINDOW", confirmar_saida)
+
+    # Adicione esta função para lidar com os atalhos de teclado
+    def setup_hotkeys():
+        # Adiciona verificação de plataforma
+        mod = "Command" if sys.platform == "darwin" else "Control"
+        tela.bind(f"<{mod}-s>", lambda e: salvar_alteracoes())
+        tela.bind(f"<{mod}-n>", lambda e: novo_orcamento())
+        tela.bind(f"<{mod}-o>", lambda e: mostrar_csvs_antigos())
+        tela.bind(f"<{mod}-p>", lambda e: gerar_pdf())
+        tela.bind(f"<{mod}-g>", lambda e: gerar_grafico())
+        tela.bind("<Delete>", lambda e: remover_selecionado())
+        tela.bind("<F5>", lambda e: atualizar_tabela(completo=True))
+        tela.bind("<F12>", alternar_desempenho)
+
+    def focar_filtro(event=None):
+        """Função para focar no campo de filtro de fornecedor"""
+        filtro_fornecedor.focus_set()
+
+    # Barra de desempenho no rodapé (Opções > Barra de Desempenho, F12)
+    barra_desempenho = tk.Label(tela, anchor="w", font=("Consolas", 9), bg="#263238", fg="#ECEFF1", padx=8)
+    if var_desempenho.get():
+        alternar_desempenho()
+
+    setup_hotkeys()
+    cronometro_inicio.marcar("widgets e atalhos")
+
+    def inicio_concluido():
+        cronometro_inicio.marcar("primeira tela interativa")
+        cronometro_inicio.publicar()
+        # Usado pelo benchmark de inicialização: fecha assim que a tela responde
+        if os.environ.get("ORCAMENTO_SAIR_APOS_INICIO"):
+            confirmar_saida()
+
+    tela.after_idle(inicio_concluido)
+
+    tela.mainloop()
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""Dados e desenho dos gráficos por fornecedor.
+
+`agregar_por_fornecedor` calcula as quatro métricas numa única passada de
+groupby; `GRAFICOS` descreve cada aba (coluna agregada, títulos, cor, formato
+do rótulo, arquivo de exportação, como juntar os demais fornecedores).
+Cada gráfico mostra só os MAX_BARRAS maiores fornecedores e junta o restante
+numa barra "Outros", então o desenho não cresce com o número de fornecedores.
+`GraficoBarras` preenche uma Figure e, com dados novos, só atualiza as barras e
+os rótulos. `salvar_graficos_png` grava os PNGs sem depender do Tk, um por
+processo de trabalho, e `desenhar_historico` traça o histórico de preços de um
+produto entre orçamentos.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from dinheiro import em_percentual, em_reais
+
+# Fornecedores com barra própria em cada gráfico; os demais vão para "Outros"
+MAX_BARRAS = 15
+TAMANHO_FIGURA = (8, 5)
+
+# Uma entrada por aba do notebook, na ordem de exibição.
+# "outros": a barra "Outros" soma os demais ou faz a média deles (ponderada pelas cotações)
+GRAFICOS = [
+    {
+        "aba": "Valor Total",
+        "coluna": "total",
+        "titulo": "Valor Total por Fornecedor",
+        "eixo_x": "Valor Total (R$)",
+        "cor": "#2196F3",
+        "rotulo": "R$ {:,.2f}",
+        "arquivo": "valor_total",
+        "outros": "soma",
+    },
+    {
+        "aba": "IPI Médio",
+        "coluna": "ipi_medio",
+        "titulo": "IPI Médio por Fornecedor",
+        "eixo_x": "IPI (%)",
+        "cor": "#FF9800",
+        "rotulo": "{:.1f}%",
+        "arquivo": "ipi_medio",
+        "outros": "media",
+    },
+    {
+        "aba": "Desconto Médio",
+        "coluna": "desconto_medio",
+        "titulo": "Desconto Médio por Fornecedor",
+        "eixo_x": "Desconto (%)",
+        "cor": "#4CAF50",
+        "rotulo": "{:.1f}%",
+        "arquivo": "desconto_medio",
+        "outros": "media",
+    },
+    {
+        "aba": "Quantidade Total",
+        "coluna": "quantidade",
+        "titulo": "Quantidade Total por Fornecedor",
+        "eixo_x": "Quantidade",
+        "cor": "#9C27B0",
+        "rotulo": "{:.0f}",
+        "arquivo": "quantidade_total",
+        "outros": "soma",
+    },
+]
+
+
+def agregar_por_fornecedor(dados):
+    """Total (R$), IPI médio, desconto médio (%) e quantidade por fornecedor, num só groupby"""
+    # As somas são feitas nos inteiros (centavos, pontos-base): exatas; só o resultado vira float
+    agregado = dados[["Fornecedor", "Total Final", "IPI", "Desconto", "Quantidade"]].groupby("Fornecedor").agg(
+        total=("Total Final", "sum"),
+        ipi_medio=("IPI", "mean"),
+        desconto_medio=("Desconto", "mean"),
+        quantidade=("Quantidade", "sum"),
+        cotacoes=("Quantidade", "size"),
+    )
+    agregado["total"] = em_reais(agregado["total"])
+    agregado["ipi_medio"] = em_percentual(agregado["ipi_medio"])
+    agregado["desconto_medio"] = em_percentual(agregado["desconto_medio"])
+    return agregado
+
+
+def reduzir(agregado, grafico, limite=MAX_BARRAS):
+    """(rótulos, valores) das barras: os `limite` maiores fornecedores e "Outros", em ordem crescente"""
+    serie = agregado[grafico["coluna"]]
+    if len(serie) <= limite:
+        serie = serie.sort_values(kind="stable")
+        return [str(nome) for nome in serie.index], serie.to_numpy(dtype=float)
+    principais = serie.nlargest(limite).iloc[::-1]
+    resto = ~agregado.index.isin(principais.index)
+    valores = serie.to_numpy(dtype=float)[resto]
+    if grafico["outros"] == "soma":
+        outros = valores.sum()
+    else:
+        outros = np.average(valores, weights=agregado["cotacoes"].to_numpy()[resto])
+    # "Outros" fica na base do gráfico, abaixo dos fornecedores com barra própria
+    rotulos = [f"Outros ({int(resto.sum())} fornecedores)"] + [str(nome) for nome in principais.index]
+    return rotulos, np.r_[outros, principais.to_numpy(dtype=float)]
+
+
+class GraficoBarras:
+    """Barras horizontais de uma métrica numa Figure que é reaproveitada.
+
+    `atualizar` com dados novos só muda a largura das barras, os textos e os
+    rótulos do eixo; as barras só são recriadas se a quantidade delas mudar.
+    """
+
+    def __init__(self, fig, grafico):
+        self.fig = fig
+        self.grafico = grafico
+        self.ax = fig.add_subplot(111)
+        self.ax.set_title(grafico["titulo"])
+        self.ax.set_xlabel(grafico["eixo_x"])
+        # Espaço para os nomes dos fornecedores no eixo y
+        fig.subplots_adjust(left=0.3, right=0.95)
+        self.barras = None
+        self.textos = []
+
+    def atualizar(self, agregado):
+        self.exibir(*reduzir(agregado, self.grafico))
+
+    def exibir(self, rotulos, valores):
+        ax = self.ax
+        posicoes = np.arange(len(valores))
+        if self.barras is None or len(self.barras) != len(valores):
+            if self.barras is not None:
+                self.barras.remove()
+                for texto in self.textos:
+                    texto.remove()
+            self.barras = ax.barh(posicoes, valores, color=self.grafico["cor"])
+            self.textos = [ax.text(0, y, "", ha='left', va='center', fontsize=8) for y in posicoes]
+        else:
+            for barra, valor in zip(self.barras, valores):
+                barra.set_width(valor)
+
+        # Adicionar valores nas barras
+        for texto, valor in zip(self.textos, valores):
+            texto.set_x(valor)
+            texto.set_text(self.grafico["rotulo"].format(valor))
+        ax.set_yticks(posicoes)
+        ax.set_yticklabels(rotulos)
+        ax.set_ylim(-0.6, len(valores) - 0.4)
+        # Folga à direita para o texto da maior barra
+        maior = float(valores.max()) if len(valores) else 0.0
+        ax.set_xlim(0, maior * 1.3 if maior > 0 else 1)
+        return ax
+
+
+def _salvar_png(grafico, rotulos, valores, arquivo):
+    """Desenha e grava um gráfico já reduzido (roda num processo de trabalho)"""
+    from matplotlib.figure import Figure  # matplotlib só é carregado quando há o que desenhar
+
+    fig = Figure(figsize=TAMANHO_FIGURA)
+    GraficoBarras(fig, grafico).exibir(rotulos, valores)
+    fig.savefig(arquivo)
+    return arquivo
+
+
+def salvar_graficos_png(agregado, pasta, timestamp, progresso=None, max_workers=None):
+    """Grava os PNGs de todos os gráficos em paralelo (processos de trabalho); retorna a lista de arquivos"""
+    # Os processos recebem só as barras já reduzidas, não o agregado inteiro
+    trabalhos = [(grafico, *reduzir(agregado, grafico), os.path.join(pasta, f'{grafico["arquivo"]}_{timestamp}.png'))
+                 for grafico in GRAFICOS]
+    arquivos = [trabalho[-1] for trabalho in trabalhos]
+
+    def gravado(feitos):
+        if progresso:
+            progresso(feitos / len(trabalhos), f"{feitos} de {len(trabalhos)} gráfico(s) gravado(s)")
+
+    if progresso:
+        progresso(0.0, "Desenhando os gráficos")
+    max_workers = max_workers or min(len(trabalhos), os.cpu_count() or 1)
+    if max_workers <= 1:
+        # Com um processador só, subir processos não compensa
+        for feitos, trabalho in enumerate(trabalhos, start=1):
+            _salvar_png(*trabalho)
+            gravado(feitos)
+        return arquivos
+    # spawn: a tela tem threads vivas (Tk, tarefas, compactação), que não combinam com fork
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futuros = [executor.submit(_salvar_png, *trabalho) for trabalho in trabalhos]
+        for feitos, futuro in enumerate(as_completed(futuros), start=1):
+            futuro.result()
+            gravado(feitos)
+    finally:
+        # Em erro ou cancelamento, não espera os gráficos que ainda faltam
+        executor.shutdown(wait=True, cancel_futures=True)
+    return arquivos
+
+
+# Fornecedores com mais cotações que entram no gráfico de histórico
+MAX_FORNECEDORES_HISTORICO = 10
+
+
+def desenhar_historico(fig, serie, produto):
+    """Linhas do preço efetivo ao longo do tempo, uma por fornecedor (`serie`: datas x fornecedores)"""
+    ax = fig.add_subplot(111)
+    principais = serie.count().sort_values(ascending=False).index[:MAX_FORNECEDORES_HISTORICO]
+    for fornecedor in principais:
+        pontos = serie[fornecedor].dropna()
+        ax.plot(pontos.index, pontos.values, marker="o", label=str(fornecedor))
+
+    ax.set_title(f"Histórico de Preço Efetivo - {produto}")
+    ax.set_ylabel("Preço Efetivo (R$)")
+    if len(principais):
+        ax.legend(fontsize=8)
+    fig.autofmt_xdate()
+    return ax
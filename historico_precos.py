@@ -0,0 +1,150 @@
+"""Histórico de preços de cada produto entre os orçamentos arquivados.
+
+Os backups são lidos num pool de processos (`extrair_cotacoes` roda em cada
+um) e reduzidos às colunas do histórico: data, produto, fornecedor, preço
+unitário e preço efetivo (com IPI e desconto, por unidade). O resultado de
+cada arquivo fica num cache na própria pasta, chaveado pelo mtime/tamanho do
+arquivo e do diário, então uma nova análise só lê os backups novos ou alterados.
+O cache é uma tabela (Parquet, ou CSV sem o pyarrow) com o nome e a assinatura
+do arquivo em cada linha: só dados, nada que execute código ao ser lido.
+"""
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from dinheiro import em_reais
+from indice_arquivos import assinatura_arquivo
+from persistencia import FORMATO_DATA, FORMATOS, TEM_PYARROW, obter_diario
+from precos import calcular_total
+
+NOME_CACHE = ".historico_precos" + (".parquet" if TEM_PYARROW else ".csv")
+
+COLUNAS_COTACOES = ["Orçamento", "Data", "Produto", "Fornecedor", "Preço Unitário", "Preço Efetivo"]
+
+
+def extrair_cotacoes(caminho):
+    """Cotações de um arquivo, só com as colunas do histórico, em reais (roda num processo de trabalho)"""
+    dados = obter_diario(caminho).carregar()
+    preco = dados["Preço Unitário"].to_numpy()
+    efetivo = calcular_total(preco, 1, dados["IPI"].to_numpy(), dados["Desconto"].to_numpy())
+    return pd.DataFrame({
+        "Orçamento": os.path.splitext(os.path.basename(caminho))[0],
+        "Data": dados["Data"].dt.strftime(FORMATO_DATA).to_numpy(),
+        "Produto": dados["Produto"].to_numpy(),
+        "Fornecedor": dados["Fornecedor"].to_numpy(),
+        "Preço Unitário": em_reais(preco),
+        "Preço Efetivo": em_reais(efetivo),
+    }, columns=COLUNAS_COTACOES)
+
+
+def _ler_cache(caminho):
+    """{nome do arquivo: (assinatura, cotações)} a partir da tabela do cache"""
+    try:
+        tabela = pd.read_parquet(caminho) if TEM_PYARROW else pd.read_csv(caminho, dtype={"Data": str})
+        return {
+            nome: (json.loads(grupo["Assinatura"].iloc[0]), grupo[COLUNAS_COTACOES].reset_index(drop=True))
+            for nome, grupo in tabela.groupby("Arquivo", sort=False)
+        }
+    except Exception:
+        # Cache ausente ou de outra versão: tudo é relido
+        return {}
+
+
+def _gravar_cache(cache, caminho):
+    # Arquivos sem cotações não têm linhas na tabela: são relidos (rápido) na próxima análise
+    partes = [cotacoes.assign(Arquivo=nome, Assinatura=json.dumps(assinatura))
+              for nome, (assinatura, cotacoes) in cache.items() if len(cotacoes)]
+    if partes:
+        tabela = pd.concat(partes, ignore_index=True)
+    else:
+        tabela = pd.DataFrame(columns=COLUNAS_COTACOES + ["Arquivo", "Assinatura"])
+    base, extensao = os.path.splitext(caminho)
+    temporario = f"{base}.tmp{extensao}"
+    if TEM_PYARROW:
+        tabela.to_parquet(temporario, index=False)
+    else:
+        tabela.to_csv(temporario, index=False)
+    os.replace(temporario, caminho)
+
+
+def carregar_cotacoes(pasta, progresso=None, max_workers=None):
+    """Cotações de todos os backups da pasta, relendo só os arquivos que mudaram"""
+    caminho_cache = os.path.join(pasta, NOME_CACHE)
+    cache = _ler_cache(caminho_cache)
+
+    assinaturas = {}
+    with os.scandir(pasta) as itens:
+        for item in itens:
+            # Arquivos ocultos (o próprio cache, índices) não são orçamentos
+            if item.is_file() and not item.name.startswith(".") and item.name.lower().endswith(tuple(FORMATOS)):
+                assinaturas[item.path] = assinatura_arquivo(item.path, item.stat())
+
+    novo_cache = {}
+    pendentes = []
+    for caminho, assinatura in assinaturas.items():
+        nome = os.path.basename(caminho)
+        if nome in cache and cache[nome][0] == assinatura:
+            novo_cache[nome] = cache[nome]
+        else:
+            pendentes.append(caminho)
+
+    def guardar(caminho, cotacoes, feitos):
+        novo_cache[os.path.basename(caminho)] = (assinaturas[caminho], cotacoes)
+        if progresso:
+            progresso(feitos / len(pendentes), f"{feitos} de {len(pendentes)} orçamento(s) lido(s)")
+
+    if len(pendentes) == 1:
+        # Um arquivo só não compensa subir processos
+        guardar(pendentes[0], extrair_cotacoes(pendentes[0]), 1)
+    elif pendentes:
+        # spawn: a tela tem threads vivas (Tk, tarefas, compactação), que não combinam com fork
+        executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futuros = {executor.submit(extrair_cotacoes, caminho): caminho for caminho in pendentes}
+            for feitos, futuro in enumerate(as_completed(futuros), start=1):
+                guardar(futuros[futuro], futuro.result(), feitos)
+        finally:
+            # Em erro ou cancelamento, não espera os arquivos que ainda faltam
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    if pendentes or len(novo_cache) != len(cache):
+        _gravar_cache(novo_cache, caminho_cache)
+
+    partes = [cotacoes for _, cotacoes in novo_cache.values() if len(cotacoes)]
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_COTACOES)
+    return pd.concat(partes, ignore_index=True)
+
+
+def resumir_historico(cotacoes):
+    """Preço mínimo, mediano e o mais recente (unitário e efetivo) por produto e fornecedor"""
+    ordenadas = cotacoes.sort_values("Data", kind="stable")
+    resumo = ordenadas.groupby(["Produto", "Fornecedor"], sort=True).agg(**{
+        "Cotações": ("Preço Unitário", "size"),
+        "Primeira Data": ("Data", "first"),
+        "Última Data": ("Data", "last"),
+        "Preço Mínimo": ("Preço Unitário", "min"),
+        "Preço Mediano": ("Preço Unitário", "median"),
+        "Último Preço": ("Preço Unitário", "last"),
+        "Efetivo Mínimo": ("Preço Efetivo", "min"),
+        "Efetivo Mediano": ("Preço Efetivo", "median"),
+        "Último Efetivo": ("Preço Efetivo", "last"),
+    })
+    return resumo.reset_index()
+
+
+def serie_produto(cotacoes, produto):
+    """Preço efetivo mediano por data (linhas) e fornecedor (colunas) de um produto"""
+    do_produto = cotacoes[cotacoes["Produto"] == produto]
+    serie = do_produto.pivot_table(index="Data", columns="Fornecedor", values="Preço Efetivo", aggfunc="median")
+    serie.index = pd.to_datetime(serie.index, errors="coerce")
+    return serie[serie.index.notna()].sort_index()
+
+
+def analisar(pasta, progresso=None):
+    """(cotações, resumo por produto/fornecedor) de todos os backups da pasta"""
+    cotacoes = carregar_cotacoes(pasta, progresso)
+    return cotacoes, resumir_historico(cotacoes)
@@ -0,0 +1,180 @@
+"""Índice persistente das pastas de PDFs e de backups.
+
+Cada pasta ganha um ``.indice_orcamentos.json`` com nome, data de criação,
+tamanho e um resumo do conteúdo (linhas, fornecedores, total geral) de cada
+arquivo. As janelas de listagem abrem a partir do índice gravado; a
+atualização só relê os arquivos cujo mtime/tamanho mudou (os demais vêm do
+próprio índice) e pode rodar em segundo plano.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+from dinheiro import em_reais
+from persistencia import obter_diario
+
+NOME_INDICE = ".indice_orcamentos.json"
+
+# Chave -> título da coluna nas janelas de listagem
+CAMPOS = {
+    "nome": "Arquivo",
+    "criado": "Criado em",
+    "tamanho": "Tamanho",
+    "linhas": "Linhas",
+    "fornecedores": "Fornecedores",
+    "total": "Total Geral",
+}
+
+
+def resumir_dados(dados):
+    """Resumo do conteúdo de um orçamento"""
+    return {
+        "linhas": int(len(dados)),
+        "fornecedores": int(dados["Fornecedor"].nunique()),
+        "total": float(em_reais(dados["Total Final"].sum())),
+    }
+
+
+def resumir_orcamento(caminho):
+    """Resumo de um arquivo de orçamento (snapshot + diário)"""
+    return resumir_dados(obter_diario(caminho).carregar())
+
+
+def formatar_entrada(entrada):
+    """Valores exibidos de uma entrada, na ordem de CAMPOS"""
+    linhas = entrada.get("linhas")
+    fornecedores = entrada.get("fornecedores")
+    total = entrada.get("total")
+    return (
+        entrada["nome"],
+        datetime.fromtimestamp(entrada["criado"]).strftime("%d/%m/%Y %H:%M"),
+        f"{entrada['tamanho'] / 1024:.0f} KB",
+        "" if linhas is None else linhas,
+        "" if fornecedores is None else fornecedores,
+        "" if total is None else f"R$ {total:.2f}",
+    )
+
+
+def assinatura_arquivo(caminho, stat):
+    """mtime/tamanho do arquivo e do diário dele: muda quando o conteúdo muda"""
+    assinatura = [stat.st_mtime_ns, stat.st_size]
+    diario = caminho + ".diario"
+    if os.path.exists(diario):
+        stat_diario = os.stat(diario)
+        assinatura += [stat_diario.st_mtime_ns, stat_diario.st_size]
+    return assinatura
+
+
+class IndiceArquivos:
+    """Entradas (dicionários com as chaves de CAMPOS) dos arquivos de uma pasta"""
+
+    def __init__(self, pasta, extensoes, resumir=None):
+        self.pasta = pasta
+        self.extensoes = tuple(extensoes)
+        # Sem `resumir` (PDFs), o resumo só existe se foi registrado por quem gerou o arquivo
+        self.resumir = resumir
+        self.caminho = os.path.join(pasta, NOME_INDICE)
+        self._lock = threading.Lock()
+        self.entradas = self._ler()
+
+    def _ler(self):
+        try:
+            with open(self.caminho, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _gravar(self):
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.entradas, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+    def listar(self):
+        """Entradas do índice gravado, sem tocar nos arquivos"""
+        with self._lock:
+            return list(self.entradas.values())
+
+    def atualizar(self, progresso=None):
+        """Sincroniza o índice com a pasta, relendo só o que mudou; retorna as entradas"""
+        with self._lock:
+            antigas = dict(self.entradas)
+        novas = {}
+        mudou = False
+        with os.scandir(self.pasta) as itens:
+            arquivos = [item for item in itens
+                        if item.is_file() and not item.name.startswith(".")
+                        and item.name.lower().endswith(self.extensoes)]
+        for i, item in enumerate(arquivos):
+            stat = item.stat()
+            assinatura = assinatura_arquivo(item.path, stat)
+            entrada = antigas.get(item.name)
+            if entrada is None or entrada["assinatura"] != assinatura:
+                if progresso:
+                    progresso(i / len(arquivos), item.name)
+                entrada = {
+                    "nome": item.name,
+                    "criado": stat.st_ctime,
+                    "tamanho": stat.st_size,
+                    "assinatura": assinatura,
+                    "linhas": None,
+                    "fornecedores": None,
+                    "total": None,
+                }
+                if self.resumir is not None:
+                    try:
+                        entrada.update(self.resumir(item.path))
+                    except Exception:
+                        # Arquivo ilegível: fica listado, sem resumo
+                        pass
+                mudou = True
+            novas[item.name] = entrada
+        with self._lock:
+            # `registrar` e `remover` podem ter rodado (na thread da tela) durante a varredura:
+            # o que eles fizeram prevalece sobre o que a varredura viu
+            atuais = self.entradas
+            mescladas = {}
+            for nome, entrada in novas.items():
+                if nome in antigas and nome not in atuais:
+                    continue  # removida durante a varredura
+                atual = atuais.get(nome)
+                mescladas[nome] = atual if atual is not None and atual is not antigas.get(nome) else entrada
+            for nome, atual in atuais.items():
+                # Registrada durante a varredura, depois da listagem da pasta
+                if nome not in mescladas and atual is not antigas.get(nome):
+                    mescladas[nome] = atual
+            if mudou or mescladas.keys() != atuais.keys():
+                self.entradas = mescladas
+                self._gravar()
+        return self.listar()
+
+    def registrar(self, caminho, resumo):
+        """Guarda o resumo de um arquivo recém-gerado (ex.: o PDF, a partir dos dados)"""
+        stat = os.stat(caminho)
+        nome = os.path.basename(caminho)
+        with self._lock:
+            self.entradas[nome] = {
+                "nome": nome,
+                "criado": stat.st_ctime,
+                "tamanho": stat.st_size,
+                "assinatura": assinatura_arquivo(caminho, stat),
+                **resumo,
+            }
+            self._gravar()
+
+    def remover(self, nome):
+        with self._lock:
+            if self.entradas.pop(nome, None) is not None:
+                self._gravar()
+
+
+_indices = {}
+
+
+def obter_indice(pasta, extensoes, resumir=None):
+    """Retorna o IndiceArquivos da pasta (uma instância por pasta)"""
+    chave = os.path.abspath(pasta)
+    if chave not in _indices:
+        _indices[chave] = IndiceArquivos(pasta, extensoes, resumir)
+    return _indices[chave]
@@ -0,0 +1,148 @@
+"""Índice de trigramas para os filtros de texto (Fornecedor, Produto, Descrição).
+
+O índice é feito sobre os valores distintos de cada coluna, em minúsculas:
+cada valor aponta para os ids das linhas que o contêm e cada trigrama aponta
+para os valores em que aparece. Uma busca por substring intersecta as listas
+dos trigramas do termo, confere os poucos valores candidatos e devolve os ids,
+sem percorrer o DataFrame. Termos com menos de 3 letras percorrem só os
+valores distintos.
+"""
+import numpy as np
+import pandas as pd
+
+COLUNAS_BUSCA = ("Fornecedor", "Produto", "Descrição")
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class _IndiceColuna:
+    def __init__(self):
+        self.ids_por_valor = {}
+        self.valores_por_trigrama = {}
+
+    def adicionar(self, valor, ids):
+        existentes = self.ids_por_valor.get(valor)
+        if existentes is None:
+            self.ids_por_valor[valor] = set(ids)
+            postagens = self.valores_por_trigrama
+            for i in range(len(valor) - 2):
+                trigrama = valor[i:i + 3]
+                valores = postagens.get(trigrama)
+                if valores is None:
+                    postagens[trigrama] = {valor}
+                else:
+                    valores.add(valor)
+        else:
+            existentes.update(ids)
+
+    def remover(self, valor, ids):
+        existentes = self.ids_por_valor.get(valor)
+        if existentes is None:
+            return
+        existentes.difference_update(ids)
+        if not existentes:
+            del self.ids_por_valor[valor]
+            for trigrama in trigramas(valor):
+                valores = self.valores_por_trigrama.get(trigrama)
+                if valores is not None:
+                    valores.discard(valor)
+                    if not valores:
+                        del self.valores_por_trigrama[trigrama]
+
+    def buscar(self, termo):
+        termo = termo.lower()
+        if len(termo) < 3:
+            candidatos = self.ids_por_valor.keys()
+        else:
+            listas = []
+            for trigrama in trigramas(termo):
+                valores = self.valores_por_trigrama.get(trigrama)
+                if not valores:
+                    return set()
+                listas.append(valores)
+            listas.sort(key=len)
+            candidatos = set(listas[0]).intersection(*listas[1:])
+        resultado = set()
+        for valor in candidatos:
+            if termo in valor:
+                resultado.update(self.ids_por_valor[valor])
+        return resultado
+
+
+def _agrupar(dados, coluna):
+    """Pares (valor em minúsculas, ids) de uma coluna, ignorando valores vazios"""
+    valores = dados[coluna]
+    if isinstance(valores.dtype, pd.CategoricalDtype):
+        # Só as categorias (poucas) passam para minúsculas; as linhas usam os códigos
+        por_categoria, distintos = pd.factorize(valores.cat.categories.astype(str).str.lower())
+        codigos = valores.cat.codes.to_numpy()
+        validos = codigos >= 0
+        codigos = por_categoria[codigos[validos]]
+    else:
+        validos = valores.notna().to_numpy()
+        codigos, distintos = pd.factorize(valores[validos].astype(str).str.lower().to_numpy())
+    ids = dados.index.to_numpy()[validos]
+    if not len(ids):
+        return iter(())
+    ordem = np.argsort(codigos, kind="stable")
+    codigos = codigos[ordem]
+    cortes = np.flatnonzero(np.diff(codigos)) + 1
+    # Categorias sem linhas não geram grupo: cada grupo leva o valor do seu primeiro código
+    return zip(distintos[codigos[np.r_[0, cortes]]], (grupo.tolist() for grupo in np.split(ids[ordem], cortes)))
+
+
+class IndiceBusca:
+    """Índice de trigramas das colunas de texto, atualizado a cada inclusão e remoção.
+
+    O índice de cada coluna é construído na primeira busca por ela (e de novo
+    depois de `invalidar`), então carregar um orçamento grande não paga o custo
+    do índice de colunas que ninguém filtra.
+    """
+
+    def __init__(self, colunas=COLUNAS_BUSCA):
+        self.colunas = colunas
+        self.indices = dict.fromkeys(colunas)
+
+    def invalidar(self):
+        self.indices = dict.fromkeys(self.colunas)
+
+    def _indice(self, coluna, dados):
+        if self.indices[coluna] is None:
+            indice = _IndiceColuna()
+            for valor, ids in _agrupar(dados, coluna):
+                indice.adicionar(valor, ids)
+            self.indices[coluna] = indice
+        return self.indices[coluna]
+
+    def adicionar(self, linhas):
+        """Inclui no índice as linhas (DataFrame indexado pelos ids)"""
+        for coluna, indice in self.indices.items():
+            if indice is not None:
+                for valor, ids in _agrupar(linhas, coluna):
+                    indice.adicionar(valor, ids)
+
+    def remover(self, linhas):
+        """Retira do índice as linhas (DataFrame indexado pelos ids, antes da remoção)"""
+        for coluna, indice in self.indices.items():
+            if indice is not None:
+                for valor, ids in _agrupar(linhas, coluna):
+                    indice.remover(valor, ids)
+
+    def filtrar(self, dados, termos):
+        """Linhas de `dados` cujas colunas contêm os termos ({coluna: termo}), na ordem original"""
+        termos = {coluna: termo for coluna, termo in termos.items() if termo}
+        if not termos:
+            return dados
+
+        ids = None
+        for coluna, termo in termos.items():
+            encontrados = self._indice(coluna, dados).buscar(termo)
+            ids = encontrados if ids is None else ids & encontrados
+            if not ids:
+                return dados.iloc[:0]
+
+        posicoes = dados.index.get_indexer(list(ids))
+        posicoes.sort()
+        return dados.iloc[posicoes[posicoes >= 0]]
@@ -0,0 +1,201 @@
+"""Medição de tempos do aplicativo: a inicialização e as operações da tela.
+
+`inicio` registra as fases da partida (imports, janela, logo, widgets, primeira
+tela interativa) com `fase()`/`marcar()`. Com a variável de ambiente
+ORCAMENTO_TEMPOS=1 o relatório é impresso ao terminar a partida; com
+ORCAMENTO_TEMPOS_ARQUIVO=<caminho> ele também é gravado em JSON (usado por
+benchmarks/bench_inicializacao.py).
+
+`medidor` guarda a duração e o número de linhas de cada operação medida
+(`@medidor.medido` nas funções, `medidor.contar(n)` dentro delas), de qualquer
+thread. As medições alimentam a barra de desempenho e podem ser exportadas no
+formato de rastro do Chrome (chrome://tracing, Perfetto) para análise posterior.
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Meta de tempo até a primeira tela interativa (segundos), conferida pelo benchmark
+META_INICIO_S = 1.5
+
+# Módulos que só devem ser carregados sob demanda (gráficos e PDF)
+MODULOS_SOB_DEMANDA = ("matplotlib", "fpdf")
+
+
+class Cronometro:
+    """Fases nomeadas, medidas a partir da criação do cronômetro"""
+
+    def __init__(self):
+        self.origem = time.perf_counter()
+        self.fases = []  # (nome, início, duração) em segundos
+        self._ultima_marca = self.origem
+
+    @contextmanager
+    def fase(self, nome):
+        comeco = time.perf_counter()
+        try:
+            yield
+        finally:
+            fim = time.perf_counter()
+            self.fases.append((nome, comeco - self.origem, fim - comeco))
+            self._ultima_marca = fim
+
+    def marcar(self, nome):
+        """Fecha uma fase que começou na marca anterior"""
+        agora = time.perf_counter()
+        self.fases.append((nome, self._ultima_marca - self.origem, agora - self._ultima_marca))
+        self._ultima_marca = agora
+
+    def total(self):
+        return self._ultima_marca - self.origem
+
+    def resultado(self):
+        return {
+            "fases": [{"nome": nome, "inicio_ms": inicio * 1000, "duracao_ms": duracao * 1000}
+                      for nome, inicio, duracao in self.fases],
+            "total_ms": self.total() * 1000,
+            "meta_ms": META_INICIO_S * 1000,
+            "sob_demanda_carregados": [m for m in MODULOS_SOB_DEMANDA if m in sys.modules],
+        }
+
+    def relatorio(self):
+        linhas = [f"{nome:<32} {duracao * 1000:8.1f} ms" for nome, _, duracao in self.fases]
+        linhas.append(f"{'total':<32} {self.total() * 1000:8.1f} ms (meta {META_INICIO_S * 1000:.0f} ms)")
+        carregados = self.resultado()["sob_demanda_carregados"]
+        if carregados:
+            linhas.append(f"carregados antes do uso: {', '.join(carregados)}")
+        return "\n".join(linhas)
+
+    def publicar(self):
+        """Imprime e/ou grava o relatório, conforme as variáveis de ambiente"""
+        if os.environ.get("ORCAMENTO_TEMPOS"):
+            print(self.relatorio())
+        arquivo = os.environ.get("ORCAMENTO_TEMPOS_ARQUIVO")
+        if arquivo:
+            with open(arquivo, "w", encoding="utf-8") as f:
+                json.dump(self.resultado(), f, ensure_ascii=False, indent=2)
+
+
+# Medições guardadas (as mais antigas são descartadas)
+MAX_MEDICOES = 10_000
+
+
+class Medidor:
+    """Duração e linhas de cada operação, com o tempo contado a partir de `origem`"""
+
+    def __init__(self, origem=None):
+        self.origem = time.perf_counter() if origem is None else origem
+        self.medicoes = deque(maxlen=MAX_MEDICOES)
+        self.ultima = None
+        self._trava = threading.Lock()
+        # Operações em andamento em cada thread (a mais interna por último)
+        self._local = threading.local()
+
+    def _pilha(self):
+        if not hasattr(self._local, "pilha"):
+            self._local.pilha = []
+        return self._local.pilha
+
+    @contextmanager
+    def medir(self, nome, linhas=None):
+        thread = threading.current_thread()
+        medicao = {"nome": nome, "linhas": linhas, "thread": thread.ident, "nome_thread": thread.name}
+        pilha = self._pilha()
+        pilha.append(medicao)
+        comeco = time.perf_counter()
+        try:
+            yield medicao
+        finally:
+            medicao["inicio"] = comeco - self.origem
+            medicao["duracao"] = time.perf_counter() - comeco
+            pilha.pop()
+            with self._trava:
+                self.medicoes.append(medicao)
+                self.ultima = medicao
+
+    def medido(self, funcao):
+        """Decorador: mede cada chamada da função, com o nome dela"""
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            with self.medir(funcao.__name__):
+                return funcao(*args, **kwargs)
+        return medida
+
+    def contar(self, linhas):
+        """Número de linhas da operação em andamento (a mais interna desta thread)"""
+        pilha = self._pilha()
+        if pilha:
+            pilha[-1]["linhas"] = int(linhas)
+
+    def copiar(self):
+        with self._trava:
+            return list(self.medicoes)
+
+    def estatisticas(self):
+        """{nome: (chamadas, média em ms, máximo em ms)}"""
+        duracoes = {}
+        for medicao in self.copiar():
+            duracoes.setdefault(medicao["nome"], []).append(medicao["duracao"] * 1000)
+        return {nome: (len(d), sum(d) / len(d), max(d)) for nome, d in duracoes.items()}
+
+    def rastro(self, cronometro=None):
+        """Eventos no formato de rastro do Chrome; inclui as fases da partida de `cronometro`"""
+        pid = os.getpid()
+        eventos = []
+        threads = {}
+        if cronometro is not None:
+            principal = threading.main_thread()
+            threads[principal.ident] = principal.name
+            deslocamento = cronometro.origem - self.origem
+            for nome, comeco, duracao in cronometro.fases:
+                eventos.append({"name": nome, "cat": "inicio", "ph": "X", "pid": pid, "tid": principal.ident,
+                                "ts": (deslocamento + comeco) * 1e6, "dur": duracao * 1e6})
+        for medicao in self.copiar():
+            threads[medicao["thread"]] = medicao["nome_thread"]
+            evento = {"name": medicao["nome"], "cat": "operacao", "ph": "X", "pid": pid, "tid": medicao["thread"],
+                      "ts": medicao["inicio"] * 1e6, "dur": medicao["duracao"] * 1e6}
+            if medicao["linhas"] is not None:
+                evento["args"] = {"linhas": medicao["linhas"]}
+            eventos.append(evento)
+        for tid, nome in threads.items():
+            eventos.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": nome}})
+        return {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+    def exportar_rastro(self, caminho, cronometro=None):
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.rastro(cronometro), f, ensure_ascii=False)
+
+
+def memoria_dataframe(dados):
+    """Bytes ocupados pelo DataFrame, contando o conteúdo dos textos"""
+    return int(dados.memory_usage(deep=True).sum())
+
+
+def relatorio_memoria(dados):
+    """(coluna, tipo, bytes) de cada coluna e do índice, mais a linha do total"""
+    linhas = []
+    for nome, tamanho in dados.memory_usage(deep=True).items():
+        tipo = dados.index.dtype if nome == "Index" else dados[nome].dtype
+        linhas.append((nome, str(tipo), int(tamanho)))
+    linhas.append(("Total", "", sum(tamanho for _, _, tamanho in linhas)))
+    return linhas
+
+
+def formatar_relatorio_memoria(linhas, quantidade):
+    """Texto do relatório de memória, com MB e bytes por linha do orçamento"""
+    texto = [f"{'coluna':<16} {'tipo':<16} {'MB':>9} {'bytes/linha':>12}"]
+    for nome, tipo, tamanho in linhas:
+        por_linha = tamanho / quantidade if quantidade else 0
+        texto.append(f"{nome:<16} {tipo:<16} {tamanho / 2**20:9.2f} {por_linha:12.1f}")
+    return "\n".join(texto)
+
+
+# Cronômetro da partida: criado no primeiro import, logo no início do script
+inicio = Cronometro()
+# Operações da tela e das tarefas, no mesmo relógio da partida
+medidor = Medidor(inicio.origem)
@@ -0,0 +1,246 @@
+"""Núcleo do aplicativo de orçamentos, sem Tk.
+
+`Orcamento` reúne o DataFrame (indexado pelos ids estáveis das linhas) e os
+índices de busca, ordenação e autocompletar, com as operações da tela: incluir,
+remover, filtrar/ordenar, simular preços, melhor oferta por produto. A tela usa
+uma instância dele, então scripts e benchmarks exercitam o mesmo código. As
+exportações (PDF comparativo, CSV das melhores ofertas, PNGs dos gráficos) são
+funções sobre um DataFrame. Tudo aqui roda sem display,
+em scripts, benchmarks ou no processamento em lote (processar_lote.py).
+"""
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from autocompletar import Autocompletar
+from comparativo import CacheComparativo, Comparativo, gravar_csv_comparativo
+from dinheiro import CEM_PORCENTO, para_centavos, para_pontos_base
+from graficos import agregar_por_fornecedor, salvar_graficos_png
+from indice_busca import IndiceBusca
+from ordenacao import IndiceOrdenacao
+from persistencia import concatenar, dataframe_vazio, gravar_orcamento, ler_orcamento, obter_diario, tipar
+from precos import calcular_total, recalcular_totais, simular
+
+
+# Limites de uma cotação: acima deles, as contas em int64 de calcular_total estouram
+PRECO_MAXIMO = para_centavos(400_000_000)  # R$ 400 milhões
+QUANTIDADE_MAXIMA = int(np.iinfo(np.int32).max)
+TOTAL_MAXIMO = int(np.iinfo(np.int64).max)
+
+
+class ItemInvalido(ValueError):
+    """Dados de uma cotação que não podem entrar no orçamento"""
+
+
+def _numero(texto):
+    """float de um número digitado (com vírgula ou ponto); infinito e NaN não entram"""
+    valor = float(str(texto).replace(",", "."))
+    if not math.isfinite(valor):
+        raise ItemInvalido("Preço, IPI e Desconto devem ser números finitos!")
+    return valor
+
+
+def _percentual(texto):
+    """IPI ou desconto digitado (em %), conferido: número finito de 0% a 100%"""
+    valor = _numero(texto)
+    if not 0 <= para_pontos_base(valor) <= CEM_PORCENTO:
+        raise ItemInvalido("IPI e Desconto devem estar entre 0% e 100%!")
+    return valor
+
+
+def criar_linha(id_linha, fornecedor, produto, descricao, preco_unitario, quantidade, ipi, desconto, data=None):
+    """Dicionário de uma nova cotação (com "ID" e o Total Final calculado).
+
+    Preço em reais e IPI/desconto em %, como digitados; no dicionário ficam em
+    centavos e pontos-base. Valores fora dos limites (preço até R$ 400
+    milhões, quantidade em int32, IPI e desconto de 0% a 100%) levantam
+    ItemInvalido, antes de qualquer conta que possa estourar.
+    """
+    if not fornecedor or not produto:
+        raise ItemInvalido("Fornecedor e Produto são campos obrigatórios!")
+    preco_unitario = _numero(preco_unitario)
+    quantidade = int(quantidade)
+    if preco_unitario < 0 or quantidade < 0:
+        raise ItemInvalido("Preço e Quantidade não podem ser negativos!")
+    preco_unitario = para_centavos(preco_unitario)
+    if preco_unitario > PRECO_MAXIMO:
+        raise ItemInvalido("O Preço Unitário deve ser de no máximo R$ 400 milhões!")
+    if quantidade > QUANTIDADE_MAXIMA:
+        raise ItemInvalido(f"A Quantidade deve ser no máximo {QUANTIDADE_MAXIMA}!")
+    ipi = para_pontos_base(_numero(ipi))
+    desconto = para_pontos_base(_numero(desconto))
+    if not (0 <= ipi <= CEM_PORCENTO and 0 <= desconto <= CEM_PORCENTO):
+        raise ItemInvalido("IPI e Desconto devem estar entre 0% e 100%!")
+    # Em inteiros do Python (sem estouro), para saber se o total cabe na coluna int64
+    total = calcular_total(preco_unitario, quantidade, ipi, desconto)
+    if total > TOTAL_MAXIMO:
+        raise ItemInvalido("O Total Final ficou grande demais: reduza a Quantidade!")
+    return {
+        "ID": id_linha,
+        "Data": data or datetime.now().strftime("%Y-%m-%d"),
+        "Fornecedor": fornecedor,
+        "Produto": produto,
+        "Descrição": descricao,
+        "Preço Unitário": preco_unitario,
+        "Quantidade": quantidade,
+        "IPI": ipi,
+        "Desconto": desconto,
+        "Total Final": total,
+    }
+
+
+class Orcamento:
+    """DataFrame do orçamento + índices de busca, ordenação e autocompletar mantidos a cada alteração.
+
+    `dados` é sempre substituído, nunca alterado no lugar.
+    """
+
+    def __init__(self, dados=None):
+        self.dados = dataframe_vazio() if dados is None else tipar(dados)
+        self.busca = IndiceBusca()
+        self.ordenacao = IndiceOrdenacao()
+        self.autocompletar = Autocompletar()
+        self.comparacao = CacheComparativo()
+        self.ultimo_id = -1
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Lê um arquivo de orçamento (Parquet, Feather ou CSV), com o diário pendente"""
+        return cls(obter_diario(caminho).carregar())
+
+    @classmethod
+    def importar(cls, caminho):
+        """Lê só o arquivo, sem diário (ex.: um CSV recebido de fora)"""
+        return cls(ler_orcamento(caminho))
+
+    def salvar(self, caminho):
+        gravar_orcamento(self.dados, caminho)
+
+    def novo_id(self):
+        """Próximo id estável de linha; nunca reaproveita um id nesta instância"""
+        maior = int(self.dados.index.max()) if len(self.dados) else -1
+        self.ultimo_id = max(self.ultimo_id, maior) + 1
+        return self.ultimo_id
+
+    def adicionar(self, **campos):
+        """Inclui uma cotação (campos de `criar_linha`, sem o id) e devolve o dicionário gravado"""
+        linha = criar_linha(self.novo_id(), **campos)
+        novas = tipar(pd.DataFrame([linha]).set_index("ID"))
+        self.dados = concatenar(self.dados, novas)
+        self.busca.adicionar(novas)
+        self.ordenacao.adicionar(novas)
+        self.autocompletar.adicionar(novas)
+        self.comparacao.invalidar()
+        return linha
+
+    def remover(self, ids):
+        ids = list(ids)
+        removidas = self.dados.loc[ids]
+        self.busca.remover(removidas)
+        self.ordenacao.remover(removidas.index)
+        self.autocompletar.remover(removidas)
+        self.comparacao.invalidar()
+        self.dados = self.dados.drop(ids)
+
+    def substituir(self, dados):
+        """Troca o DataFrame inteiro; os índices são refeitos na próxima consulta"""
+        self.dados = tipar(dados)
+        self.busca.invalidar()
+        self.ordenacao.invalidar()
+        self.autocompletar.invalidar()
+        self.comparacao.invalidar()
+
+    def consultar(self, fornecedor="", produto="", descricao="", ordem=None):
+        """(linhas que contêm os termos, posições delas na ordem do menu ou None)
+
+        As posições são as que a tabela virtual exibe sem reordenar o DataFrame.
+        """
+        filtrado = self.busca.filtrar(self.dados, {
+            "Fornecedor": fornecedor,
+            "Produto": produto,
+            "Descrição": descricao,
+        })
+        return filtrado, self.ordenacao.ordenar(self.dados, filtrado, ordem)
+
+    def filtrar(self, fornecedor="", produto="", descricao="", ordem=None):
+        """Linhas que contêm os termos (sem diferenciar maiúsculas), na ordem do menu"""
+        filtrado, posicoes = self.consultar(fornecedor, produto, descricao, ordem)
+        return filtrado if posicoes is None else filtrado.iloc[posicoes]
+
+    def sugerir(self, coluna, prefixo, limite=8):
+        """Valores da coluna que começam com `prefixo`, os mais frequentes primeiro"""
+        return self.autocompletar.sugerir(coluna, prefixo, self.dados, limite)
+
+    def montar_sugestoes(self, progresso=None):
+        """(dados, colunas de sugestões montadas a partir deles); pode rodar numa thread de trabalho"""
+        dados = self.dados
+        return dados, self.autocompletar.montar(dados, progresso)
+
+    def instalar_sugestoes(self, dados, montadas):
+        """Usa as sugestões de `montar_sugestoes` se o orçamento não mudou desde então"""
+        if dados is not self.dados:
+            return False
+        self.autocompletar.instalar(montadas)
+        return True
+
+    def recalcular_totais(self):
+        """Recalcula o Total Final de todas as linhas a partir das demais colunas"""
+        self.dados = recalcular_totais(self.dados)
+        self.ordenacao.invalidar(["Total Final"])
+        self.comparacao.invalidar()
+
+    def simular(self, ipi=None, desconto_adicional=None, fornecedor=None, produto=None, aplicar=False):
+        """Cenário "e se"; com `aplicar`, o resultado passa a ser o orçamento. Devolve (dados, ids alterados)
+
+        IPI e desconto adicional seguem os limites de `criar_linha` (números
+        finitos, de 0% a 100%); um cenário cujo Total Final não cabe em int64
+        levanta ItemInvalido e não é aplicado.
+        """
+        ipi = None if ipi is None else _percentual(ipi)
+        desconto_adicional = None if desconto_adicional is None else _percentual(desconto_adicional)
+        novos, alterados = simular(self.dados, ipi=ipi, desconto_adicional=desconto_adicional,
+                                   fornecedor=fornecedor, produto=produto)
+        # Estimativa em float do total de cada linha alterada: as contas em int64 estouram sem aviso
+        linhas = novos.loc[alterados]
+        estimado = (linhas["Preço Unitário"].to_numpy(dtype=float) * linhas["Quantidade"].to_numpy(dtype=float)
+                    * (CEM_PORCENTO + linhas["IPI"].to_numpy(dtype=float))
+                    * (CEM_PORCENTO - linhas["Desconto"].to_numpy(dtype=float)) / CEM_PORCENTO ** 2)
+        if (estimado > TOTAL_MAXIMO).any():
+            raise ItemInvalido("O Total Final de algum item ficaria grande demais!")
+        if aplicar:
+            self.dados = novos
+            self.ordenacao.invalidar(["IPI", "Desconto", "Total Final"])
+            self.comparacao.invalidar()
+        return novos, alterados
+
+    def agregado(self):
+        return agregar_por_fornecedor(self.dados)
+
+    def comparativo(self):
+        """Melhor oferta de cada produto (Comparativo), em cache até a próxima alteração"""
+        return self.comparacao.obter(self.dados)
+
+    def comparativo_em_cache(self):
+        """O comparativo, se já calculado para os dados atuais; senão None"""
+        return self.comparacao.em_cache(self.dados)
+
+
+def exportar_pdf(dados, arquivo, data_hoje=None, progresso=None):
+    """PDF comparativo das linhas de `dados` (na ordem em que estão)"""
+    from relatorio_pdf import gerar_pdf_comparativo  # fpdf só é carregado quando há PDF a gerar
+
+    data_hoje = data_hoje or datetime.now().strftime('%d/%m/%Y')
+    return gerar_pdf_comparativo(dados, arquivo, data_hoje, progresso=progresso)
+
+
+def exportar_melhor_oferta(dados, arquivo, comparativo=None):
+    """CSV com a melhor oferta de cada produto e a matriz produto × fornecedor"""
+    return gravar_csv_comparativo(comparativo or Comparativo(dados), arquivo)
+
+
+def exportar_graficos(dados, pasta, timestamp=None, progresso=None):
+    """PNGs dos gráficos por fornecedor; devolve a lista de arquivos"""
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    return salvar_graficos_png(agregar_por_fornecedor(dados), pasta, timestamp, progresso=progresso)
@@ -0,0 +1,89 @@
+"""Ordens pré-calculadas para o "Ordenar por" da tela principal.
+
+Para cada coluna usada nas ordens (Fornecedor, Desconto, IPI, Total Final)
+guardamos os valores em ordem crescente e, em paralelo, os ids das linhas.
+Inclusões entram com busca binária (np.searchsorted) e remoções são um
+filtro pelos ids, então trocar de ordem ou combinar uma ordem com um filtro
+vira só uma seleção (gather) de linhas, sem ordenar nada. O resultado é um
+array de posições: a tabela virtual só materializa as linhas visíveis.
+"""
+import numpy as np
+import pandas as pd
+
+# Ordem do menu -> (coluna, crescente)
+ORDENS = {
+    'A-Z': ('Fornecedor', True),
+    'Maior Desconto': ('Desconto', False),
+    'Menor IPI': ('IPI', True),
+    'Maior IPI': ('IPI', False),
+    'Menor Preço': ('Total Final', True),
+    'Maior Valor': ('Total Final', False),
+}
+
+COLUNAS_TEXTO = ('Fornecedor',)
+
+
+def _chaves(linhas, coluna):
+    if coluna in COLUNAS_TEXTO:
+        return linhas[coluna].fillna("").astype(str).to_numpy(dtype=object)
+    return pd.to_numeric(linhas[coluna], errors="coerce").to_numpy(dtype=float)
+
+
+class IndiceOrdenacao:
+    """Valores ordenados + ids por coluna, mantidos a cada inclusão e remoção.
+
+    Cada coluna é ordenada uma única vez, na primeira vez que uma ordem a usa
+    (e de novo depois de `invalidar`).
+    """
+
+    def __init__(self):
+        self.colunas = {}
+
+    def invalidar(self, colunas=None):
+        if colunas is None:
+            self.colunas = {}
+        else:
+            for coluna in colunas:
+                self.colunas.pop(coluna, None)
+
+    def _coluna(self, dados, coluna):
+        if coluna not in self.colunas:
+            chaves = _chaves(dados, coluna)
+            ordem = np.argsort(chaves, kind="stable")
+            self.colunas[coluna] = (chaves[ordem], dados.index.to_numpy()[ordem])
+        return self.colunas[coluna]
+
+    def adicionar(self, linhas):
+        """Inclui as linhas (DataFrame indexado pelos ids) nas colunas já ordenadas"""
+        for coluna, (chaves, ids) in self.colunas.items():
+            novas = _chaves(linhas, coluna)
+            ordem = np.argsort(novas, kind="stable")
+            novas = novas[ordem]
+            # side="right": empates ficam na ordem de inclusão
+            posicoes = np.searchsorted(chaves, novas, side="right")
+            self.colunas[coluna] = (
+                np.insert(chaves, posicoes, novas),
+                np.insert(ids, posicoes, linhas.index.to_numpy()[ordem]),
+            )
+
+    def remover(self, ids_removidos):
+        """Retira os ids de todas as colunas já ordenadas"""
+        ids_removidos = np.asarray(list(ids_removidos))
+        for coluna, (chaves, ids) in self.colunas.items():
+            manter = ~np.isin(ids, ids_removidos)
+            self.colunas[coluna] = (chaves[manter], ids[manter])
+
+    def ordenar(self, dados, filtrado, ordem):
+        """Posições de `filtrado` (subconjunto de `dados`) na ordem do menu; None = sem ordem"""
+        if ordem not in ORDENS:
+            return None
+        coluna, crescente = ORDENS[ordem]
+        chaves, ids = self._coluna(dados, coluna)
+        if filtrado is not dados:
+            manter = pd.Index(ids).isin(filtrado.index)
+            chaves, ids = chaves[manter], ids[manter]
+        if not crescente:
+            # Decrescente sem mover os valores vazios (NaN ficam sempre no fim)
+            validos = len(ids) if coluna in COLUNAS_TEXTO else np.searchsorted(chaves, np.nan)
+            ids = np.concatenate([ids[:validos][::-1], ids[validos:]])
+        return filtrado.index.get_indexer(ids)
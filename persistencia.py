@@ -0,0 +1,383 @@
+"""Persistência dos orçamentos em modo diário (journal).
+
+O arquivo do orçamento é o "snapshot" completo. Cada inclusão ou remoção é
+apenas anexada como um pequeno registro JSON em ``<arquivo>.diario``; o diário
+é compactado no snapshot em segundo plano (quando cresce demais) ou ao sair.
+Carregar = ler o snapshot e reaplicar o diário na mesma ordem.
+
+O formato do snapshot vem da extensão: Parquet (padrão, colunar e tipado,
+via pyarrow), Feather ou CSV (mantido para importar/exportar e para os
+arquivos antigos). Sem o pyarrow instalado, tudo continua em CSV.
+
+Em memória e nos snapshots Parquet/Feather, preços e totais são centavos e
+IPI/desconto são pontos-base (inteiros, ver dinheiro.py). O CSV continua em
+reais e porcentagem, legível fora do aplicativo. Arquivos e registros do
+diário de versões anteriores (valores float em reais) são convertidos na
+leitura, pela mesma regra de arredondamento.
+
+O esquema em memória é compacto: Fornecedor e Produto são categóricos (cada
+nome guardado uma vez), Data é datetime64, Quantidade, IPI e Desconto são
+int32. `tipar` aplica o esquema ao carregar e `concatenar` o mantém ao incluir
+linhas (categorias unidas, sem cair para texto).
+"""
+import json
+import os
+import threading
+
+import pandas as pd
+from pandas.api.types import CategoricalDtype, is_datetime64_any_dtype, is_float_dtype
+
+from dinheiro import em_percentual, em_reais, para_centavos, para_pontos_base
+
+try:
+    import pyarrow  # noqa: F401
+    TEM_PYARROW = True
+except ImportError:
+    TEM_PYARROW = False
+
+COLUNAS = ["Data", "Fornecedor", "Produto", "Descrição", "Preço Unitário", "Quantidade", "IPI", "Desconto", "Total Final"]
+
+# Quantidade de registros no diário que dispara uma compactação em segundo plano
+LIMITE_REGISTROS = 500
+
+
+COLUNAS_CATEGORICAS = ["Fornecedor", "Produto"]
+COLUNAS_TEXTO = ["Descrição"]
+COLUNAS_CENTAVOS = ["Preço Unitário", "Total Final"]
+COLUNAS_PONTOS_BASE = ["IPI", "Desconto"]
+# Coluna inteira -> tipo (centavos em int64: int32 só chegaria a R$ 21 milhões)
+COLUNAS_INTEIRAS = {
+    "Preço Unitário": "int64",
+    "Total Final": "int64",
+    "Quantidade": "int32",
+    "IPI": "int32",
+    "Desconto": "int32",
+}
+FORMATO_DATA = "%Y-%m-%d"
+
+# Marca dos registros do diário gravados já em centavos/pontos-base
+VERSAO_DIARIO = 2
+
+# Extensão usada para o arquivo principal e os backups novos
+EXTENSAO_PADRAO = ".parquet" if TEM_PYARROW else ".csv"
+
+
+def dataframe_vazio():
+    return tipar(pd.DataFrame(columns=COLUNAS, index=pd.Index([], name="ID")))
+
+
+def tipar(dados):
+    """Aplica o esquema compacto às colunas e ao índice; valores já em centavos/pontos-base.
+
+    Colunas que já estão no tipo certo não são convertidas de novo.
+    """
+    dados = dados.copy()
+    if "Data" in dados.columns and not is_datetime64_any_dtype(dados["Data"]):
+        dados["Data"] = pd.to_datetime(dados["Data"], errors="coerce", format="ISO8601")
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in dados.columns and not isinstance(dados[coluna].dtype, CategoricalDtype):
+            dados[coluna] = dados[coluna].fillna("").astype(str).astype("category")
+    for coluna in COLUNAS_TEXTO:
+        if coluna in dados.columns:
+            dados[coluna] = dados[coluna].fillna("").astype(str)
+    for coluna, tipo in COLUNAS_INTEIRAS.items():
+        if coluna in dados.columns and dados[coluna].dtype != tipo:
+            valores = pd.to_numeric(dados[coluna], errors="coerce").fillna(0)
+            if is_float_dtype(valores):
+                valores = valores.round()
+            dados[coluna] = valores.astype(tipo)
+    dados.index = dados.index.astype("int64")
+    dados.index.name = "ID"
+    return dados
+
+
+def concatenar(dados, novas):
+    """pd.concat que mantém o esquema: as categorias das colunas categóricas são unidas antes"""
+    novas = tipar(novas)
+    if dados.empty:
+        return novas
+    dados = dados.copy(deep=False)
+    for coluna in COLUNAS_CATEGORICAS:
+        # Com categorias diferentes o concat devolveria texto; unidas, só os códigos são concatenados
+        faltando = novas[coluna].cat.categories.difference(dados[coluna].cat.categories)
+        if len(faltando):
+            dados[coluna] = dados[coluna].cat.add_categories(faltando)
+        novas[coluna] = novas[coluna].cat.set_categories(dados[coluna].cat.categories)
+    return pd.concat([dados, novas])
+
+
+def _definir_ids(dados):
+    """A coluna ID (id estável de cada linha) vira o índice"""
+    if "ID" in dados.columns and dados["ID"].is_unique and dados["ID"].notna().all():
+        return dados.set_index("ID")
+    # Arquivo antigo, sem ids (ou com ids corrompidos): numera as linhas
+    dados = dados.drop(columns="ID", errors="ignore")
+    dados.index = pd.RangeIndex(len(dados), name="ID")
+    return dados
+
+
+def de_reais(dados):
+    """Converte valores em reais e porcentagem (CSV, arquivos antigos) para centavos e pontos-base"""
+    dados = dados.copy()
+    for coluna in COLUNAS_CENTAVOS:
+        if coluna in dados.columns:
+            dados[coluna] = para_centavos(pd.to_numeric(dados[coluna], errors="coerce").fillna(0).to_numpy())
+    for coluna in COLUNAS_PONTOS_BASE:
+        if coluna in dados.columns:
+            dados[coluna] = para_pontos_base(pd.to_numeric(dados[coluna], errors="coerce").fillna(0).to_numpy())
+    return dados
+
+
+def em_reais_e_porcentagem(dados):
+    """Cópia com preços/totais em reais e IPI/desconto em %, como float (para exportar)"""
+    dados = dados.copy()
+    for coluna in COLUNAS_CENTAVOS:
+        dados[coluna] = em_reais(dados[coluna])
+    for coluna in COLUNAS_PONTOS_BASE:
+        dados[coluna] = em_percentual(dados[coluna])
+    return dados
+
+
+def _migrar_snapshot(dados):
+    """Snapshots de versões anteriores guardavam reais em float64; os atuais, inteiros"""
+    if any(coluna in dados.columns and is_float_dtype(dados[coluna]) for coluna in COLUNAS_CENTAVOS):
+        return de_reais(dados)
+    return dados
+
+
+def ler_csv(caminho):
+    """Lê um orçamento em CSV (texto em reais e %: os tipos são reaplicados)"""
+    return tipar(de_reais(_definir_ids(pd.read_csv(caminho))))
+
+
+def gravar_csv(dados, caminho):
+    em_reais_e_porcentagem(tipar(dados)).to_csv(caminho, index=True, index_label="ID", float_format="%.2f",
+                                                 date_format=FORMATO_DATA)
+
+
+def ler_parquet(caminho):
+    return tipar(_migrar_snapshot(_definir_ids(pd.read_parquet(caminho))))
+
+
+def gravar_parquet(dados, caminho):
+    tipar(dados).reset_index().to_parquet(caminho, index=False)
+
+
+def ler_feather(caminho):
+    return tipar(_migrar_snapshot(_definir_ids(pd.read_feather(caminho))))
+
+
+def gravar_feather(dados, caminho):
+    tipar(dados).reset_index().to_feather(caminho)
+
+
+# Extensão -> (leitor, gravador)
+FORMATOS = {".csv": (ler_csv, gravar_csv)}
+if TEM_PYARROW:
+    FORMATOS[".parquet"] = (ler_parquet, gravar_parquet)
+    FORMATOS[".feather"] = (ler_feather, gravar_feather)
+
+
+def _formato(caminho):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao not in FORMATOS:
+        raise ValueError(f"Formato de orçamento não suportado: {extensao or caminho}")
+    return FORMATOS[extensao]
+
+
+def ler_orcamento(caminho):
+    """Lê um orçamento no formato indicado pela extensão do arquivo"""
+    return _formato(caminho)[0](caminho)
+
+
+def gravar_orcamento(dados, caminho):
+    """Grava o orçamento no formato indicado pela extensão do arquivo"""
+    _formato(caminho)[1](dados, caminho)
+
+
+def sincronizar_disco(caminho):
+    """Garante que o conteúdo do arquivo chegou ao disco (fsync)"""
+    with open(caminho, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def caminho_padrao(caminho):
+    """Troca a extensão pela do formato padrão (ex.: orcamentos.csv -> orcamentos.parquet)"""
+    return os.path.splitext(caminho)[0] + EXTENSAO_PADRAO
+
+
+class Diario:
+    """Snapshot (Parquet/Feather/CSV) + diário append-only de um arquivo de orçamento"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.caminho_diario = caminho + ".diario"
+        # Diário "congelado" enquanto uma compactação está em andamento
+        self.caminho_compactando = caminho + ".diario.compactando"
+        self.registros = self._contar_registros()
+        self.ultimo_erro = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _contar_registros(self):
+        total = 0
+        for caminho in (self.caminho_compactando, self.caminho_diario):
+            if os.path.exists(caminho):
+                with open(caminho, encoding="utf-8") as f:
+                    total += sum(1 for linha in f if linha.strip())
+        return total
+
+    def pendente(self):
+        """Indica se há registros ainda não compactados no snapshot"""
+        if self.registros > 0:
+            return True
+        # Diário congelado que sobrou de uma compactação que falhou ou foi interrompida
+        return not self.compactando() and os.path.exists(self.caminho_compactando)
+
+    # Registro das operações
+
+    def _anexar(self, registro):
+        with self._lock:
+            with open(self.caminho_diario, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.registros += 1
+
+    def registrar_adicao(self, linhas):
+        """Anexa uma ou mais linhas (lista de dicionários, com a chave "ID", valores em centavos) ao diário"""
+        self._anexar({"op": "adicionar", "linhas": linhas, "versao": VERSAO_DIARIO})
+
+    def registrar_remocao(self, ids):
+        """Anexa a remoção das linhas com os ids informados"""
+        self._anexar({"op": "remover", "ids": [int(i) for i in ids]})
+
+    def registrar_limpeza(self):
+        """Anexa o descarte de todas as linhas (novo orçamento)"""
+        self._anexar({"op": "limpar"})
+
+    # Leitura
+
+    def carregar(self):
+        """Lê o snapshot e reaplica o diário, reconstruindo o DataFrame"""
+        self.aguardar()
+        if os.path.exists(self.caminho):
+            dados = ler_orcamento(self.caminho)
+        else:
+            dados = dataframe_vazio()
+
+        # Inclusões consecutivas são acumuladas e concatenadas de uma vez só
+        pendentes = []
+
+        def aplicar_pendentes(dados):
+            if pendentes:
+                novas = pd.DataFrame(pendentes).set_index("ID")
+                # Ids nunca se repetem: uma linha que já está no snapshot vem de um diário congelado
+                # que não chegou a ser apagado (queda logo depois de trocar o snapshot)
+                novas = novas[~novas.index.isin(dados.index)]
+                dados = concatenar(dados, novas)
+                pendentes.clear()
+            return dados
+
+        for caminho in (self.caminho_compactando, self.caminho_diario):
+            if not os.path.exists(caminho):
+                continue
+            with open(caminho, encoding="utf-8") as f:
+                for linha in f:
+                    linha = linha.strip()
+                    if not linha:
+                        continue
+                    try:
+                        registro = json.loads(linha)
+                    except json.JSONDecodeError:
+                        # Última linha truncada por queda durante a escrita
+                        break
+                    if registro["op"] == "adicionar":
+                        if registro.get("versao", 1) < VERSAO_DIARIO:
+                            # Registro de versões anteriores, em reais e %
+                            pendentes.extend(de_reais(pd.DataFrame(registro["linhas"])).to_dict("records"))
+                        else:
+                            pendentes.extend(registro["linhas"])
+                    elif registro["op"] == "remover":
+                        dados = aplicar_pendentes(dados)
+                        dados = dados.drop(registro["ids"], errors="ignore")
+                    elif registro["op"] == "limpar":
+                        pendentes.clear()
+                        dados = dataframe_vazio()
+
+        return tipar(aplicar_pendentes(dados))
+
+    # Compactação
+
+    def compactar(self, dataframe, em_segundo_plano=False):
+        """Grava o DataFrame completo no snapshot e descarta o diário já incorporado"""
+        # Tudo sob o lock: outra thread (ex.: o índice de backups lendo este arquivo) não vê
+        # a compactação pela metade nem começa outra enquanto esta grava
+        with self._lock:
+            self._aguardar()
+            # Congela o diário atual; novos registros vão para um diário novo
+            if os.path.exists(self.caminho_diario):
+                if os.path.exists(self.caminho_compactando):
+                    with open(self.caminho_diario, encoding="utf-8") as origem, \
+                            open(self.caminho_compactando, "a", encoding="utf-8") as destino:
+                        destino.write(origem.read())
+                    os.remove(self.caminho_diario)
+                else:
+                    os.replace(self.caminho_diario, self.caminho_compactando)
+            self.registros = 0
+
+            if em_segundo_plano:
+                self._thread = threading.Thread(target=self._gravar_snapshot, args=(dataframe,), daemon=True)
+                self._thread.start()
+                return
+            # Só o erro desta gravação interessa (uma falha anterior foi superada por ela)
+            self._gravar_snapshot(dataframe)
+            erro, self.ultimo_erro = self.ultimo_erro, None
+        if erro is not None:
+            raise erro
+
+    def compactar_se_necessario(self, dataframe):
+        """Dispara a compactação em segundo plano quando o diário passa do limite"""
+        if self.registros >= LIMITE_REGISTROS and not self.compactando():
+            self.compactar(dataframe, em_segundo_plano=True)
+
+    def compactando(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def aguardar(self):
+        """Espera a compactação em segundo plano terminar, se houver"""
+        with self._lock:
+            self._aguardar()
+
+    def _aguardar(self):
+        # Chamado com o lock: a gravação do snapshot não usa o lock, então o join não trava
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _gravar_snapshot(self, dataframe):
+        self.ultimo_erro = None
+        try:
+            # Temporário com a mesma extensão, para manter o formato
+            base, extensao = os.path.splitext(self.caminho)
+            temporario = f"{base}.tmp{extensao}"
+            gravar_orcamento(dataframe, temporario)
+            # Só troca o arquivo depois que o temporário está inteiro no disco
+            sincronizar_disco(temporario)
+            os.replace(temporario, self.caminho)
+            # Só depois do snapshot gravado o diário congelado pode ser descartado
+            if os.path.exists(self.caminho_compactando):
+                os.remove(self.caminho_compactando)
+        except Exception as e:
+            self.ultimo_erro = e
+
+
+_diarios = {}
+
+
+def obter_diario(caminho):
+    """Retorna o Diario associado ao arquivo (uma instância por caminho)"""
+    chave = os.path.abspath(caminho)
+    if chave not in _diarios:
+        _diarios[chave] = Diario(caminho)
+    return _diarios[chave]
@@ -0,0 +1,82 @@
+"""Cálculo de preços dos orçamentos, vetorizado sobre colunas inteiras.
+
+Os valores são inteiros (centavos e pontos-base, ver dinheiro.py) e a conta é
+exata: o total é calculado como fração inteira e arredondado uma única vez, no
+fim, pela regra do aplicativo. `calcular_total` é a mesma conta usada ao
+incluir um item (preço com IPI, menos o desconto, vezes a quantidade) e aceita
+tanto escalares quanto arrays NumPy, então serve para uma linha ou para o
+orçamento inteiro de uma vez. `simular` aplica cenários "e se" (IPI novo,
+desconto adicional) filtrados por fornecedor e/ou produto e recalcula os
+totais numa única passada.
+"""
+import numpy as np
+import pandas as pd
+
+from dinheiro import CEM_PORCENTO, dividir, para_pontos_base
+
+# Denominador de preço * (100% + IPI) * (100% - desconto)
+_ESCALA = CEM_PORCENTO * CEM_PORCENTO
+
+
+def calcular_total(preco_unitario, quantidade, ipi, desconto):
+    """Total final em centavos (preço em centavos; IPI e desconto em pontos-base)
+
+    Sem estouro de int64 para preços unitários até R$ 400 milhões.
+    """
+    # Preço unitário com IPI e desconto = inteiro + resto / _ESCALA centavos
+    inteiro, resto = divmod(preco_unitario * (CEM_PORCENTO + ipi) * (CEM_PORCENTO - desconto), _ESCALA)
+    return inteiro * quantidade + dividir(resto * quantidade, _ESCALA)
+
+
+def _coluna(dados, coluna):
+    return pd.to_numeric(dados[coluna], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+
+
+def totais(dados):
+    """Array com o Total Final de todas as linhas, calculado das demais colunas"""
+    return calcular_total(
+        _coluna(dados, "Preço Unitário"),
+        _coluna(dados, "Quantidade"),
+        _coluna(dados, "IPI"),
+        _coluna(dados, "Desconto"),
+    )
+
+
+def recalcular_totais(dados):
+    """Cópia do DataFrame com o Total Final recalculado para todas as linhas"""
+    dados = dados.copy()
+    dados["Total Final"] = totais(dados)
+    return dados
+
+
+def selecionar(dados, fornecedor=None, produto=None):
+    """Máscara booleana das linhas do fornecedor e/ou produto (None = todos)"""
+    mascara = np.ones(len(dados), dtype=bool)
+    if fornecedor:
+        mascara &= (dados["Fornecedor"] == fornecedor).to_numpy()
+    if produto:
+        mascara &= (dados["Produto"] == produto).to_numpy()
+    return mascara
+
+
+def simular(dados, ipi=None, desconto_adicional=None, fornecedor=None, produto=None):
+    """Cenário "e se": retorna (novo DataFrame, ids das linhas alteradas).
+
+    ipi: novo IPI (%) para as linhas selecionadas.
+    desconto_adicional: desconto (%) aplicado sobre o preço já descontado,
+    ou seja, o desconto final é 1 - (1 - d) * (1 - adicional).
+    """
+    mascara = selecionar(dados, fornecedor, produto)
+    novos = dados.copy()
+    if ipi is not None:
+        novos["IPI"] = np.where(mascara, para_pontos_base(ipi), _coluna(dados, "IPI"))
+    if desconto_adicional is not None:
+        desconto = _coluna(dados, "Desconto")
+        restante = dividir((CEM_PORCENTO - desconto) * (CEM_PORCENTO - para_pontos_base(desconto_adicional)),
+                           CEM_PORCENTO)
+        novos["Desconto"] = np.where(mascara, CEM_PORCENTO - restante, desconto)
+    novos["Total Final"] = np.where(mascara, totais(novos), _coluna(dados, "Total Final"))
+    # As contas são feitas em int64; as colunas voltam aos tipos que tinham (ex.: int32)
+    for coluna in ("IPI", "Desconto", "Total Final"):
+        novos[coluna] = novos[coluna].astype(dados[coluna].dtype)
+    return novos, dados.index[mascara]
@@ -0,0 +1,70 @@
+"""Processamento de orçamentos em lote, sem a tela (ex.: rotinas noturnas num servidor).
+
+Exemplos:
+    python processar_lote.py cotacoes.csv --recalcular --pdf comparativo.pdf --graficos graficos/
+    python processar_lote.py orcamentos.parquet --fornecedor huawei --ordem "Menor Preço" --saida huawei.csv
+    python processar_lote.py orcamentos.parquet --melhor-oferta melhor_oferta.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+from dinheiro import formatar_reais
+from nucleo import Orcamento, exportar_graficos, exportar_melhor_oferta, exportar_pdf
+from ordenacao import ORDENS
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Processa um orçamento sem abrir a tela.")
+    parser.add_argument("entrada", help="arquivo do orçamento (.csv, .parquet ou .feather)")
+    parser.add_argument("--recalcular", action="store_true",
+                        help="recalcula o Total Final a partir de preço, quantidade, IPI e desconto")
+    parser.add_argument("--fornecedor", default="", help="só linhas cujo fornecedor contém este texto")
+    parser.add_argument("--produto", default="", help="só linhas cujo produto contém este texto")
+    parser.add_argument("--descricao", default="", help="só linhas cuja descrição contém este texto")
+    parser.add_argument("--ordem", choices=list(ORDENS), help="ordem das linhas (como no \"Ordenar por\")")
+    parser.add_argument("--pdf", help="gera o PDF comparativo neste arquivo")
+    parser.add_argument("--graficos", help="grava os PNGs dos gráficos nesta pasta")
+    parser.add_argument("--melhor-oferta", help="grava a melhor oferta de cada produto neste CSV")
+    parser.add_argument("--saida", help="grava o orçamento resultante (formato pela extensão)")
+    return parser
+
+
+def main(argumentos=None):
+    args = criar_parser().parse_args(argumentos)
+    inicio = time.perf_counter()
+
+    orcamento = Orcamento.carregar(args.entrada)
+    print(f"{len(orcamento.dados)} linhas lidas de {args.entrada}")
+    if args.recalcular:
+        orcamento.recalcular_totais()
+
+    dados = orcamento.filtrar(args.fornecedor, args.produto, args.descricao, args.ordem)
+    if len(dados) != len(orcamento.dados):
+        print(f"{len(dados)} linhas após os filtros")
+    if dados.empty:
+        print("Nenhum dado para exportar", file=sys.stderr)
+        return 1
+
+    if args.saida:
+        Orcamento(dados).salvar(args.saida)
+        print(f"Orçamento gravado em {args.saida}")
+    if args.pdf:
+        exportar_pdf(dados, args.pdf)
+        print(f"PDF comparativo gravado em {args.pdf}")
+    if args.melhor_oferta:
+        exportar_melhor_oferta(dados, args.melhor_oferta)
+        print(f"Melhores ofertas gravadas em {args.melhor_oferta}")
+    if args.graficos:
+        os.makedirs(args.graficos, exist_ok=True)
+        for arquivo in exportar_graficos(dados, args.graficos):
+            print(f"Gráfico gravado em {arquivo}")
+
+    total = dados["Total Final"].sum()
+    print(f"Total geral: {formatar_reais(total)} ({time.perf_counter() - inicio:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""PDF comparativo de orçamentos, montado direto das colunas do DataFrame.
+
+As linhas são agrupadas por produto (na ordem em que aparecem) e fornecedor
+(em ordem alfabética) com uma ordenação vetorizada, e o layout percorre um
+produto por vez: cada "linha" do comparativo traz a k-ésima cotação de cada
+fornecedor, com a altura medida pelo texto que realmente cabe na coluna, e é
+desenhada direto com text/rect (bem mais barato que uma multi_cell por item).
+As quebras de página acontecem entre essas linhas, repetindo o cabeçalho dos
+fornecedores, então nenhum produto precisa caber inteiro numa página.
+
+A melhor oferta de cada produto (comparativo.py) aparece sob o nome do produto,
+com o fornecedor destacado no cabeçalho, e numa tabela de resumo no fim.
+"""
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+from comparativo import Comparativo
+from dinheiro import formatar_coluna_percentual, formatar_coluna_reais, formatar_reais
+
+MARGEM = 10
+ALTURA_LINHA = 4
+# Acima disso, cada produto mostra só os fornecedores que o cotaram, em faixas
+MAX_COLUNAS = 8
+# Fundo do fornecedor com a melhor oferta no cabeçalho
+COR_DESTAQUE = (200, 230, 201)
+# Colunas do resumo de melhores ofertas: (título, fração da largura)
+COLUNAS_RESUMO = [("Produto", .26), ("Melhor Fornecedor", .2), ("Preço Efetivo", .1), ("Total", .12),
+                  ("2º Fornecedor", .2), ("Economia", .12)]
+
+
+class _Medidor:
+    """Largura de textos numa fonte fixa, com cache por caractere"""
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self.larguras = {}
+
+    def largura(self, texto):
+        larguras = self.larguras
+        total = 0.0
+        for caractere in texto:
+            w = larguras.get(caractere)
+            if w is None:
+                w = larguras[caractere] = self.pdf.get_string_width(caractere)
+            total += w
+        return total
+
+    def quebrar(self, texto, largura):
+        """Linhas em que `texto` é quebrado numa coluna de `largura` (mm)"""
+        largura_util = largura - 2 * self.pdf.c_margin
+        espaco = self.largura(" ")
+        linhas = []
+        for paragrafo in texto.split("\n"):
+            atual, w_atual = "", 0.0
+            for palavra in paragrafo.split(" "):
+                w = self.largura(palavra)
+                if atual and w_atual + espaco + w > largura_util:
+                    linhas.append(atual)
+                    atual, w_atual = palavra, w
+                else:
+                    atual = f"{atual} {palavra}" if atual else palavra
+                    w_atual += (espaco if w_atual else 0) + w
+                # Palavra maior que a coluna é quebrada por caracteres
+                while w_atual > largura_util and len(atual) > 1:
+                    corte = len(atual) - 1
+                    while corte > 1 and self.largura(atual[:corte]) > largura_util:
+                        corte -= 1
+                    linhas.append(atual[:corte])
+                    atual = atual[corte:]
+                    w_atual = self.largura(atual)
+            linhas.append(atual)
+        return linhas
+
+
+def textos_itens(dados):
+    """Texto de cada cotação, formatado a partir das colunas tipadas (centavos e pontos-base)"""
+    preco = formatar_coluna_reais(dados["Preço Unitário"])
+    qtd = dados["Quantidade"].to_numpy(dtype=np.int64).tolist()
+    ipi = formatar_coluna_percentual(dados["IPI"])
+    desc = formatar_coluna_percentual(dados["Desconto"])
+    total = formatar_coluna_reais(dados["Total Final"])
+    return [
+        f"Preço: {p}\nQtd: {q}\nIPI: {i}\nDesc: {d}\nTotal: {t}"
+        for p, q, i, d, t in zip(preco, qtd, ipi, desc, total)
+    ]
+
+
+def agrupar_produtos(dados):
+    """Gera (produto, {fornecedor: [textos]}) um produto por vez, sem dicionários aninhados do todo"""
+    produtos = dados["Produto"].astype(str).to_numpy()
+    fornecedores = dados["Fornecedor"].astype(str).to_numpy()
+    codigo_produto, _ = pd.factorize(produtos)  # ordem de aparição
+    codigo_fornecedor, _ = pd.factorize(fornecedores, sort=True)
+    ordem = np.lexsort((codigo_fornecedor, codigo_produto))
+    textos = textos_itens(dados.iloc[ordem])
+
+    produtos = produtos[ordem]
+    fornecedores = fornecedores[ordem]
+    inicios = np.flatnonzero(np.r_[True, produtos[1:] != produtos[:-1]])
+    fins = np.r_[inicios[1:], len(produtos)]
+    for inicio, fim in zip(inicios, fins):
+        itens = {}
+        for fornecedor, texto in zip(fornecedores[inicio:fim], textos[inicio:fim]):
+            itens.setdefault(fornecedor, []).append(texto)
+        yield produtos[inicio], itens
+
+
+def textos_ofertas(ofertas):
+    """{produto: linha de texto da melhor oferta}, formatados numa passada"""
+    precos = formatar_coluna_reais(ofertas["Preço Efetivo"])
+    economias = formatar_coluna_reais(ofertas["Economia"])
+    textos = {}
+    for produto, fornecedor, preco, segundo, economia in zip(
+            ofertas.index, ofertas["Melhor Fornecedor"], precos, ofertas["2º Fornecedor"], economias):
+        texto = f"Melhor oferta: {fornecedor} ({preco}/un.)"
+        if segundo:
+            texto += f" - economia de {economia} sobre {segundo}"
+        textos[produto] = texto
+    return textos
+
+
+class RelatorioComparativo:
+    """Desenha o comparativo produto a produto, quebrando páginas entre as linhas"""
+
+    def __init__(self, titulo, fornecedores):
+        self.titulo = titulo
+        self.fornecedores = fornecedores
+        self.pdf = FPDF(orientation='L', unit='mm', format='A4')
+        self.largura_disponivel = self.pdf.w - (2 * MARGEM)
+        self.limite = self.pdf.h - MARGEM
+        # Cache de larguras para a fonte das cotações (Arial 8)
+        self.medidor = _Medidor(self.pdf)
+        self._nova_pagina()
+
+    def _nova_pagina(self):
+        self.pdf.add_page()
+        self.pdf.set_font("Arial", "B", size=12)
+        self.pdf.cell(0, 10, txt=self.titulo, ln=True, align='C')
+        self.pdf.ln(5)
+
+    def _cabecalho(self, colunas, largura, destaque=None):
+        self.pdf.set_font("Arial", "B", size=10)
+        self.pdf.set_fill_color(*COR_DESTAQUE)
+        y = self.pdf.get_y()
+        for i, fornecedor in enumerate(colunas):
+            self.pdf.set_xy(MARGEM + i * largura, y)
+            self.pdf.cell(largura, 7, fornecedor, border=1, align='C', fill=fornecedor == destaque)
+        self.pdf.set_xy(MARGEM, y + 7)
+
+    def adicionar_produto(self, produto, itens, oferta=None, melhor=None):
+        """`oferta`: texto da melhor oferta, sob o nome; `melhor`: fornecedor destacado no cabeçalho"""
+        pdf = self.pdf
+        if len(self.fornecedores) <= MAX_COLUNAS:
+            todas = self.fornecedores
+        else:
+            todas = sorted(itens)
+        faixas = [todas[i:i + MAX_COLUNAS] for i in range(0, len(todas), MAX_COLUNAS)]
+
+        # Nome do produto (e oferta) + cabeçalho + ao menos uma linha de cotações na mesma página
+        altura_nome = 9 + (5 if oferta else 0)
+        if pdf.get_y() + altura_nome + 7 + 5 * ALTURA_LINHA > self.limite:
+            self._nova_pagina()
+        pdf.set_font("Arial", "B", size=10)
+        pdf.cell(0, 7, f"Produto: {produto}", ln=True, align='L')
+        if oferta:
+            pdf.set_font("Arial", size=9)
+            pdf.cell(0, 5, oferta, ln=True, align='L')
+        pdf.ln(2)
+
+        for colunas in faixas:
+            largura = self.largura_disponivel / len(colunas)
+            if pdf.get_y() + 7 + 5 * ALTURA_LINHA > self.limite:
+                self._nova_pagina()
+            self._cabecalho(colunas, largura, melhor)
+            pdf.set_font("Arial", size=8)
+
+            linhas = max(len(itens.get(f, [])) for f in colunas)
+            for k in range(linhas):
+                textos = [itens[f][k] if k < len(itens.get(f, [])) else None for f in colunas]
+                quebrados = [self.medidor.quebrar(t, largura) if t is not None else None for t in textos]
+                altura = max(len(q) for q in quebrados if q is not None) * ALTURA_LINHA
+                if pdf.get_y() + altura > self.limite:
+                    self._nova_pagina()
+                    self._cabecalho(colunas, largura, melhor)
+                    pdf.set_font("Arial", size=8)
+                y = pdf.get_y()
+                for i, texto in enumerate(quebrados):
+                    x = MARGEM + i * largura
+                    if texto is not None:
+                        pdf.rect(x, y, largura, altura)
+                        base = y + .5 * ALTURA_LINHA + .3 * pdf.font_size
+                        for j, linha in enumerate(texto):
+                            pdf.text(x + pdf.c_margin, base + j * ALTURA_LINHA, linha)
+                    elif k == 0:
+                        pdf.set_xy(x, y)
+                        pdf.cell(largura, altura, "N/A", border=1, align='C')
+                pdf.set_xy(MARGEM, y + altura + 2)
+
+        # Espaço para o próximo produto
+        pdf.ln(8)
+
+    def _cabecalho_resumo(self, larguras):
+        self.pdf.set_font("Arial", "B", size=9)
+        for (titulo, _), largura in zip(COLUNAS_RESUMO, larguras):
+            self.pdf.cell(largura, 7, titulo, border=1, align='C')
+        self.pdf.ln(7)
+        self.pdf.set_font("Arial", size=8)
+
+    def adicionar_resumo(self, ofertas):
+        """Tabela com a melhor oferta de cada produto e a economia total, em páginas novas"""
+        pdf = self.pdf
+        self._nova_pagina()
+        pdf.set_font("Arial", "B", size=11)
+        pdf.cell(0, 7, "Melhor Oferta por Produto", ln=True, align='L')
+        larguras = [fracao * self.largura_disponivel for _, fracao in COLUNAS_RESUMO]
+        self._cabecalho_resumo(larguras)
+        colunas = zip(ofertas.index, ofertas["Melhor Fornecedor"], formatar_coluna_reais(ofertas["Preço Efetivo"]),
+                      formatar_coluna_reais(ofertas["Total"]), ofertas["2º Fornecedor"],
+                      formatar_coluna_reais(ofertas["Economia"]))
+        for valores in colunas:
+            quebrados = [self.medidor.quebrar(str(v), largura) for v, largura in zip(valores, larguras)]
+            altura = max(len(q) for q in quebrados) * ALTURA_LINHA
+            if pdf.get_y() + altura > self.limite:
+                self._nova_pagina()
+                self._cabecalho_resumo(larguras)
+            y = pdf.get_y()
+            x = MARGEM
+            for texto, largura in zip(quebrados, larguras):
+                pdf.rect(x, y, largura, altura)
+                base = y + .5 * ALTURA_LINHA + .3 * pdf.font_size
+                for j, linha in enumerate(texto):
+                    pdf.text(x + pdf.c_margin, base + j * ALTURA_LINHA, linha)
+                x += largura
+            pdf.set_xy(MARGEM, y + altura)
+        pdf.ln(4)
+        pdf.set_font("Arial", "B", size=10)
+        pdf.cell(0, 7, f"Economia total escolhendo a melhor oferta: {formatar_reais(ofertas['Economia'].sum())}",
+                 ln=True, align='L')
+
+    def salvar(self, arquivo):
+        self.pdf.output(arquivo)
+
+
+def gerar_pdf_comparativo(dados, arquivo, data_hoje, progresso=None, comparativo=None):
+    """Gera o PDF comparativo das linhas de `dados` em `arquivo`.
+
+    `progresso(fracao, mensagem)`, se informado, é chamado a cada produto.
+    `comparativo` é o Comparativo de `dados`, se já calculado (ex.: em cache).
+    """
+    ofertas = (comparativo or Comparativo(dados)).ofertas
+    textos = textos_ofertas(ofertas)
+    melhores = dict(zip(ofertas.index, ofertas["Melhor Fornecedor"]))
+    fornecedores = sorted(dados["Fornecedor"].astype(str).unique())
+    total_produtos = dados["Produto"].nunique()
+    relatorio = RelatorioComparativo(f"Comparativo de Orçamentos - {data_hoje}", fornecedores)
+    for i, (produto, itens) in enumerate(agrupar_produtos(dados)):
+        if progresso:
+            progresso(i / total_produtos, f"Produto {i + 1} de {total_produtos}")
+        relatorio.adicionar_produto(produto, itens, textos.get(produto), melhores.get(produto))
+    if len(ofertas):
+        if progresso:
+            progresso(1.0, "Resumo das melhores ofertas")
+        relatorio.adicionar_resumo(ofertas)
+    if progresso:
+        progresso(1.0, "Gravando arquivo")
+    relatorio.salvar(arquivo)
+    return arquivo
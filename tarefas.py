@@ -0,0 +1,144 @@
+"""Tarefas em segundo plano (exportação de PDF e gráficos) sem travar a tela.
+
+As funções rodam num pool de threads e recebem um `progresso(fracao, mensagem)`
+que atualiza a tarefa e lança `Cancelada` se o usuário cancelou. O Tk não é
+thread-safe, então a thread principal consulta as tarefas com `after()` e é
+ela que chama os callbacks de conclusão/erro e avisa os ouvintes (lista de
+tarefas, barra de status).
+"""
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentacao import medidor
+
+AGUARDANDO = "Aguardando"
+EXECUTANDO = "Executando"
+CONCLUIDA = "Concluída"
+CANCELADA = "Cancelada"
+ERRO = "Erro"
+
+
+class Cancelada(Exception):
+    """Lançada dentro da tarefa quando o cancelamento foi pedido"""
+
+
+class Tarefa:
+    _ids = itertools.count(1)
+
+    def __init__(self, nome, ao_concluir=None, ao_falhar=None, interna=False):
+        self.id = next(self._ids)
+        self.nome = nome
+        # Tarefa que o usuário não pediu (índices, sincronização): sai da lista ao terminar
+        self.interna = interna
+        self.estado = AGUARDANDO
+        self.progresso = 0.0
+        self.mensagem = ""
+        self.resultado = None
+        self.erro = None
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self._cancelar = threading.Event()
+        self._future = None
+        self._notificada = False
+
+    def cancelar(self):
+        self._cancelar.set()
+        # Se ainda não começou, nem chega a rodar
+        if self._future is not None and self._future.cancel():
+            self.estado = CANCELADA
+
+    def cancelada(self):
+        return self._cancelar.is_set()
+
+    def informar_progresso(self, fracao, mensagem=None):
+        """Chamado pela função da tarefa (na thread de trabalho)"""
+        if self._cancelar.is_set():
+            raise Cancelada()
+        self.progresso = max(0.0, min(1.0, fracao))
+        if mensagem is not None:
+            self.mensagem = mensagem
+
+    def finalizada(self):
+        return self.estado in (CONCLUIDA, CANCELADA, ERRO)
+
+    def _executar(self, funcao, args, kwargs):
+        if self._cancelar.is_set():
+            self.estado = CANCELADA
+            return
+        self.estado = EXECUTANDO
+        try:
+            with medidor.medir(f"tarefa: {self.nome}"):
+                self.resultado = funcao(*args, progresso=self.informar_progresso, **kwargs)
+            self.progresso = 1.0
+            self.estado = CONCLUIDA
+        except Cancelada:
+            self.estado = CANCELADA
+        except Exception as e:
+            self.erro = e
+            self.estado = ERRO
+
+
+class GerenciadorTarefas:
+    """Pool de threads + lista de tarefas, acompanhado pelo mainloop via after()"""
+
+    def __init__(self, raiz, max_workers=2, intervalo_ms=100):
+        self.raiz = raiz
+        self.intervalo_ms = intervalo_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tarefa")
+        self.tarefas = []
+        self.ouvintes = []
+        self._agendado = None
+
+    def submeter(self, nome, funcao, *args, ao_concluir=None, ao_falhar=None, interna=False, **kwargs):
+        """Roda funcao(*args, progresso=..., **kwargs) em segundo plano.
+
+        Com `interna`, a tarefa aparece na lista só enquanto roda; depois de
+        entregar o resultado, ela é descartada sem esperar "Limpar Finalizadas".
+        """
+        tarefa = Tarefa(nome, ao_concluir, ao_falhar, interna)
+        tarefa._future = self.executor.submit(tarefa._executar, funcao, args, kwargs)
+        self.tarefas.append(tarefa)
+        self._avisar()
+        self._agendar()
+        return tarefa
+
+    def ativas(self):
+        return [t for t in self.tarefas if not t.finalizada()]
+
+    def limpar_finalizadas(self):
+        self.tarefas = [t for t in self.tarefas if not t.finalizada() or not t._notificada]
+        self._avisar()
+
+    def cancelar_todas(self):
+        for tarefa in self.ativas():
+            tarefa.cancelar()
+
+    def encerrar(self):
+        """Cancela o que estiver pendente e libera o pool (ao fechar o programa)"""
+        self.cancelar_todas()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _agendar(self):
+        if self._agendado is None:
+            self._agendado = self.raiz.after(self.intervalo_ms, self._verificar)
+
+    def _avisar(self):
+        for ouvinte in list(self.ouvintes):
+            ouvinte(self)
+
+    def _verificar(self):
+        """Roda na thread do Tk: entrega os resultados e atualiza o progresso"""
+        self._agendado = None
+        for tarefa in self.tarefas:
+            if tarefa.finalizada() and not tarefa._notificada:
+                tarefa._notificada = True
+                if tarefa.estado == CONCLUIDA and tarefa.ao_concluir:
+                    tarefa.ao_concluir(tarefa.resultado)
+                elif tarefa.estado == ERRO and tarefa.ao_falhar:
+                    tarefa.ao_falhar(tarefa.erro)
+        # As internas já entregues saem da lista: ela não cresce a cada sessão longa
+        self.tarefas = [t for t in self.tarefas if not (t.interna and t._notificada)]
+        self._avisar()
+        if any(not t._notificada for t in self.tarefas):
+            self._agendar()
@@ -0,0 +1,41 @@
+"""Recuperação do diário do arquivo principal depois de quedas em sessões seguidas."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nucleo import Orcamento  # noqa: E402
+from persistencia import Diario, caminho_padrao  # noqa: E402
+
+
+def _sessao(caminho):
+    """Como a tela ao abrir: um Diario novo (outro processo) e o orçamento lido dele"""
+    diario = Diario(caminho)
+    return diario, Orcamento(diario.carregar())
+
+
+def _incluir(diario, orcamento, produto):
+    linha = orcamento.adicionar(fornecedor="F", produto=produto, descricao="", preco_unitario="10",
+                                quantidade="1", ipi="0", desconto="0")
+    diario.registrar_adicao([linha])
+
+
+def test_queda_em_duas_sessoes_nao_perde_linhas(tmp_path):
+    caminho = caminho_padrao(str(tmp_path / "orcamentos.csv"))
+
+    # 1ª sessão: A e B chegam ao snapshot, C fica só no diário e a sessão cai
+    diario, orcamento = _sessao(caminho)
+    _incluir(diario, orcamento, "A")
+    _incluir(diario, orcamento, "B")
+    diario.compactar(orcamento.dados)
+    _incluir(diario, orcamento, "C")
+
+    # 2ª sessão: abre com A, B e C; a linha nova ganha um id depois deles e a sessão cai de novo
+    diario, orcamento = _sessao(caminho)
+    assert sorted(orcamento.dados["Produto"].astype(str)) == ["A", "B", "C"]
+    _incluir(diario, orcamento, "NOVA")
+
+    # 3ª sessão: nada se perdeu nem se repetiu
+    _, orcamento = _sessao(caminho)
+    assert sorted(orcamento.dados["Produto"].astype(str)) == ["A", "B", "C", "NOVA"]
+    assert orcamento.dados.index.is_unique
@@ -0,0 +1,359 @@
+"""Sincronização da Treeview de orçamentos com o DataFrame.
+
+A tabela é atualizada a partir de um diff pelos ids das linhas (o índice do
+DataFrame, usado como iid da Treeview): incluir uma cotação insere um item,
+remover três apaga três. Quando a ordem das linhas muda (ordenação) ou a
+atualização é forçada (F5), cai no recarregamento completo.
+
+Para orçamentos muito grandes, TabelaVirtual materializa na Treeview apenas as
+linhas visíveis (mais um buffer), usando o sincronizador sobre essa janela.
+"""
+from tkinter import ttk
+
+import numpy as np
+import pandas as pd
+
+from dinheiro import formatar_coluna_percentual, formatar_coluna_reais
+
+
+def formatar_linhas(dados):
+    """Formata as colunas exibidas de uma vez, coluna a coluna (centavos e pontos-base, sem float)"""
+    precos = formatar_coluna_reais(dados["Preço Unitário"])
+    quantidades = dados["Quantidade"].astype(int).tolist()
+    ipis = formatar_coluna_percentual(dados["IPI"])
+    descontos = formatar_coluna_percentual(dados["Desconto"])
+    totais = formatar_coluna_reais(dados["Total Final"])
+    return list(zip(
+        dados["Fornecedor"].tolist(),
+        dados["Produto"].tolist(),
+        dados["Descrição"].tolist(),
+        precos, quantidades, ipis, descontos, totais
+    ))
+
+
+class SincronizadorTabela:
+    """Mantém a Treeview igual ao DataFrame exibido aplicando só as diferenças"""
+
+    def __init__(self, tabela):
+        self.tabela = tabela
+        # Ids exibidos, na ordem da Treeview
+        self.ids = pd.Index([])
+
+    def recarregar(self, dados):
+        """Recarregamento completo: apaga tudo e insere todas as linhas"""
+        self.tabela.delete(*self.tabela.get_children())
+        for id_linha, valores in zip(dados.index, formatar_linhas(dados)):
+            self.tabela.insert("", "end", iid=str(id_linha), values=valores)
+        self.ids = dados.index.copy()
+
+    def atualizar(self, dados, completo=False, alterados=None):
+        """Atualiza a Treeview pelo diff de ids; `alterados` lista ids cujo conteúdo mudou"""
+        if completo or not self.ids.is_unique or not dados.index.is_unique:
+            self.recarregar(dados)
+            return
+
+        desejados = dados.index
+        removidos = self.ids.difference(desejados, sort=False)
+        mantidos_atual = self.ids[self.ids.isin(desejados)]
+        mantidos_desejado = desejados[desejados.isin(self.ids)]
+
+        # A ordem relativa das linhas mantidas mudou: o diff não compensa
+        if not mantidos_atual.equals(mantidos_desejado):
+            self.recarregar(dados)
+            return
+
+        if len(removidos):
+            self.tabela.delete(*[str(i) for i in removidos])
+
+        novos = ~desejados.isin(self.ids)
+        if novos.any():
+            posicoes = novos.nonzero()[0]
+            valores = formatar_linhas(dados.iloc[posicoes])
+            fim = len(mantidos_desejado) == posicoes[0]
+            for posicao, id_linha, linha in zip(posicoes, desejados[posicoes], valores):
+                # Inserindo em ordem crescente de posição, cada item já cai no lugar final
+                self.tabela.insert("", "end" if fim else int(posicao), iid=str(id_linha), values=linha)
+
+        if alterados is not None:
+            alterados = pd.Index(alterados).intersection(mantidos_desejado)
+            for id_linha, linha in zip(alterados, formatar_linhas(dados.loc[alterados])):
+                self.tabela.item(str(id_linha), values=linha)
+
+        self.ids = desejados.copy()
+
+
+class TabelaVirtual:
+    """Treeview virtualizada: só materializa as linhas visíveis e um buffer abaixo delas.
+
+    O DataFrame exibido inteiro fica em `dados` (e a ordem de exibição, como
+    posições em `dados`, em `ordem`); a barra de rolagem vertical e a seleção
+    (`selecionados`, ids das linhas) trabalham sobre ele, não sobre os itens
+    que existem de fato na Treeview.
+    """
+
+    BUFFER = 20
+
+    def __init__(self, tabela, scrollbar_y):
+        self.tabela = tabela
+        self.scrollbar_y = scrollbar_y
+        self.sincronizador = SincronizadorTabela(tabela)
+        self.dados = pd.DataFrame()
+        self.ordem = None
+        self._inversa = None
+        self.inicio = 0
+        self.selecionados = set()
+        self.ancora = None
+        # iid da Treeview -> id da linha, só para as linhas materializadas
+        self._por_iid = {}
+
+        tabela.configure(yscrollcommand=self._rolagem_nativa)
+        scrollbar_y.configure(command=self.yview)
+        tabela.bind("<<TreeviewSelect>>", self._sincronizar_selecao, add="+")
+        tabela.bind("<Configure>", lambda e: self._renderizar())
+        tabela.bind("<MouseWheel>", self._roda_mouse)
+        tabela.bind("<Button-4>", lambda e: self._rolar_e_parar(-3))
+        tabela.bind("<Button-5>", lambda e: self._rolar_e_parar(3))
+        tabela.bind("<Button-1>", self._clique, add="+")
+        tabela.bind("<Shift-Button-1>", self._selecionar_intervalo)
+        tabela.bind("<Up>", self._tecla_cima)
+        tabela.bind("<Down>", self._tecla_baixo)
+
+    # Dados e janela visível
+
+    def exibir(self, dados, completo=False, alterados=None, ordem=None):
+        """Troca o DataFrame exibido mantendo a posição de rolagem e a seleção válida.
+
+        `ordem` são as posições de `dados` na ordem de exibição (None = a do DataFrame);
+        só as linhas da janela visível são reunidas nessa ordem.
+        """
+        self.dados = dados
+        self.ordem = ordem
+        self._inversa = None
+        self.selecionados = {i for i in self.selecionados if i in dados.index}
+        if self.ancora is not None and self.ancora not in dados.index:
+            self.ancora = None
+        self._renderizar(completo=completo, alterados=alterados)
+
+    def linhas_visiveis(self):
+        altura = self.tabela.winfo_height()
+        if altura <= 1:
+            # Ainda não desenhada: usa a altura configurada (em linhas)
+            return int(self.tabela.cget("height"))
+        altura_linha = ttk.Style().lookup("Treeview", "rowheight") or 20
+        # Desconta a linha do cabeçalho
+        return max(1, altura // int(altura_linha) - 1)
+
+    def _limitar_inicio(self, inicio):
+        return max(0, min(inicio, len(self.dados) - self.linhas_visiveis()))
+
+    def _renderizar(self, completo=False, alterados=None):
+        self.inicio = self._limitar_inicio(self.inicio)
+        fatia = slice(self.inicio, self.inicio + self.linhas_visiveis() + self.BUFFER)
+        janela = self.dados.iloc[fatia] if self.ordem is None else self.dados.iloc[self.ordem[fatia]]
+        self.sincronizador.atualizar(janela, completo=completo, alterados=alterados)
+        self._por_iid = {str(i): i for i in janela.index}
+        self.tabela.selection_set([iid for iid, i in self._por_iid.items() if i in self.selecionados])
+        self.tabela.yview_moveto(0)
+        self._atualizar_barra()
+
+    def _atualizar_barra(self):
+        total = len(self.dados)
+        if total == 0:
+            self.scrollbar_y.set(0, 1)
+            return
+        self.scrollbar_y.set(self.inicio / total, min(1.0, (self.inicio + self.linhas_visiveis()) / total))
+
+    # Rolagem
+
+    def rolar_para(self, inicio):
+        inicio = self._limitar_inicio(inicio)
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._renderizar()
+
+    def yview(self, *args):
+        """Comando da scrollbar_y, interpretado sobre o DataFrame inteiro"""
+        if args[0] == "moveto":
+            self.rolar_para(int(float(args[1]) * len(self.dados)))
+        elif args[0] == "scroll":
+            passo = int(args[1])
+            if args[2] == "pages":
+                passo *= self.linhas_visiveis()
+            self.rolar_para(self.inicio + passo)
+
+    def _rolar_e_parar(self, linhas):
+        self.rolar_para(self.inicio + linhas)
+        return "break"
+
+    def _roda_mouse(self, event):
+        # Windows envia múltiplos de 120; macOS envia valores pequenos
+        passo = -event.delta // 120 if abs(event.delta) >= 120 else -event.delta
+        return self._rolar_e_parar(passo * 3)
+
+    def _rolagem_nativa(self, primeiro, ultimo):
+        """A Treeview rolou sozinha (ex.: foco pelo teclado no buffer): reancora a janela"""
+        if float(primeiro) > 0 and self._por_iid:
+            deslocamento = round(float(primeiro) * len(self._por_iid))
+            self.tabela.after_idle(lambda: self._reancorar(deslocamento))
+        else:
+            self._atualizar_barra()
+
+    def _reancorar(self, deslocamento):
+        inicio = self._limitar_inicio(self.inicio + deslocamento)
+        if inicio != self.inicio:
+            self.inicio = inicio
+            self._renderizar()
+        else:
+            self.tabela.yview_moveto(0)
+
+    # Seleção
+
+    def _sincronizar_selecao(self, event=None):
+        visiveis = {self._por_iid[iid] for iid in self.tabela.selection() if iid in self._por_iid}
+        fora_da_janela = {i for i in self.selecionados if str(i) not in self._por_iid}
+        self.selecionados = fora_da_janela | visiveis
+
+    def _clique(self, event):
+        iid = self.tabela.identify_row(event.y)
+        linha = self._por_iid.get(iid)
+        # Sem Shift nem Ctrl o clique substitui a seleção inteira, inclusive fora da janela
+        if not event.state & 0x0005:
+            self.selecionados = {linha} if linha is not None else set()
+        if linha is not None:
+            self.ancora = linha
+
+    def _selecionar_intervalo(self, event):
+        iid = self.tabela.identify_row(event.y)
+        if iid not in self._por_iid or self.ancora is None:
+            return None
+        a = self._posicao_exibida(self.ancora)
+        b = self._posicao_exibida(self._por_iid[iid])
+        self.selecionados = set(self.ids_exibidos()[min(a, b):max(a, b) + 1])
+        self.tabela.focus(iid)
+        self.tabela.selection_set([i for i, linha in self._por_iid.items() if linha in self.selecionados])
+        return "break"
+
+    def _tecla_cima(self, event):
+        if not event.state & 0x0001:
+            self.selecionados.clear()
+        filhos = self.tabela.get_children()
+        if filhos and self.tabela.focus() == filhos[0] and self.inicio > 0:
+            # Materializa a linha de cima antes de a Treeview mover o foco
+            self.rolar_para(self.inicio - 1)
+        return None
+
+    def _tecla_baixo(self, event):
+        if not event.state & 0x0001:
+            self.selecionados.clear()
+        return None
+
+    def ids_selecionados(self):
+        """Ids selecionados na ordem em que aparecem na tabela"""
+        if not self.selecionados:
+            return []
+        ids = self.ids_exibidos()
+        return list(ids[ids.isin(list(self.selecionados))])
+
+    # Ordem de exibição
+
+    def ids_exibidos(self):
+        """Ids de todas as linhas exibidas, na ordem da tabela"""
+        return self.dados.index if self.ordem is None else self.dados.index[self.ordem]
+
+    def dados_exibidos(self):
+        """DataFrame exibido já na ordem da tabela (reúne todas as linhas)"""
+        return self.dados if self.ordem is None else self.dados.iloc[self.ordem]
+
+    def _posicao_exibida(self, id_linha):
+        posicao = self.dados.index.get_loc(id_linha)
+        if self.ordem is None:
+            return posicao
+        if self._inversa is None:
+            self._inversa = np.empty(len(self.ordem), dtype=np.int64)
+            self._inversa[self.ordem] = np.arange(len(self.ordem))
+        return int(self._inversa[posicao])
+
+
+class ListaArquivos:
+    """Treeview de arquivos (PDFs, backups) ou de melhores ofertas, preenchida aos poucos, com ordenação e busca.
+
+    `entradas` são dicionários; `formatar(entrada)` devolve os valores exibidos,
+    na ordem de `colunas` ({chave: título}). Só o primeiro bloco é inserido;
+    os seguintes entram quando a rolagem se aproxima do fim.
+    """
+
+    BLOCO = 100
+
+    def __init__(self, tabela, scrollbar_y, colunas, formatar):
+        self.tabela = tabela
+        self.scrollbar_y = scrollbar_y
+        self.formatar = formatar
+        self.entradas = []
+        self.textos = []
+        self.exibidas = []
+        self.inseridas = 0
+        self.chave = None
+        self.crescente = True
+        self.termo = ""
+        self._agendado = False
+        for chave, titulo in colunas.items():
+            tabela.heading(chave, text=titulo, command=lambda c=chave: self.ordenar(c))
+        tabela.configure(yscrollcommand=self._rolagem)
+
+    def exibir(self, entradas):
+        self.entradas = list(entradas)
+        # Texto pesquisável de cada entrada, calculado uma vez
+        self.textos = [" ".join(str(v) for v in self.formatar(e)).lower() for e in self.entradas]
+        self._aplicar()
+
+    def ordenar(self, chave):
+        """Clique no cabeçalho: ordena pela coluna (de novo no mesmo, inverte)"""
+        self.crescente = not self.crescente if chave == self.chave else True
+        self.chave = chave
+        self._aplicar()
+
+    def buscar(self, termo):
+        self.termo = termo.strip().lower()
+        self._aplicar()
+
+    def _aplicar(self):
+        posicoes = [i for i, texto in enumerate(self.textos) if self.termo in texto]
+        if self.chave is not None:
+            chave = self.chave
+            # Vazios (sem resumo) sempre no fim
+            com_valor = [i for i in posicoes if self.entradas[i].get(chave) is not None]
+            sem_valor = [i for i in posicoes if self.entradas[i].get(chave) is None]
+            com_valor.sort(key=lambda i: self.entradas[i][chave], reverse=not self.crescente)
+            posicoes = com_valor + sem_valor
+        self.exibidas = [self.entradas[i] for i in posicoes]
+        self.tabela.delete(*self.tabela.get_children())
+        self.inseridas = 0
+        self._inserir_bloco()
+
+    def _inserir_bloco(self):
+        fim = min(self.inseridas + self.BLOCO, len(self.exibidas))
+        for i in range(self.inseridas, fim):
+            self.tabela.insert("", "end", iid=str(i), values=self.formatar(self.exibidas[i]))
+        self.inseridas = fim
+
+    def _rolagem(self, primeiro, ultimo):
+        self.scrollbar_y.set(primeiro, ultimo)
+        # Perto do fim (ou a lista ainda não enche a janela): próximo bloco
+        if float(ultimo) > 0.9 and self.inseridas < len(self.exibidas) and not self._agendado:
+            self._agendado = True
+            self.tabela.after_idle(self._bloco_agendado)
+
+    def _bloco_agendado(self):
+        self._agendado = False
+        self._inserir_bloco()
+
+    def selecionada(self):
+        """Entrada selecionada, ou None"""
+        selecao = self.tabela.selection()
+        return self.exibidas[int(selecao[0])] if selecao else None
+
+    def remover(self, entrada):
+        i = self.entradas.index(entrada)
+        del self.entradas[i]
+        del self.textos[i]
+        self._aplicar()